@@ -1 +1,15 @@
 from .integration.ex_two_datasets.benchmark import IntegrationTwoDatasets
+from .scaling.sequential import ScalingCompartments
+from .scaling.sequential import ScalingDatasets
+from .scaling.sequential import ScalingSpectralPoints
+from .scaling.sequential import ScalingTimePoints
+from .unit.first_evaluation import FirstEvaluation
+from .unit.grouping import FindOverlap
+from .unit.grouping import Grouping
+from .unit.import_time import ImportTime
+from .unit.k_matrix import KMatrixAMatrix
+from .unit.matrix import CalculateMatrix
+from .unit.matrix import CombineMatrices
+from .unit.parameter_group import SetFromLabelAndValueArrays
+from .unit.residual import ResidualFunctions
+from .unit.result_data import CreateResultData
@@ -0,0 +1,187 @@
+"""
+Scaling benchmarks of simulated sequential decays, modelled on :mod:`glotaran.examples.sequential`.
+
+The problems have a sequential decay with a gaussian irf and gaussian spectra, whose sizes
+default to the example. Each benchmark class varies one size and keeps the default of the
+others, so that its results form a scaling curve. The irf gets a dispersion for index
+dependent problems.
+"""
+import numpy as np
+
+from glotaran.analysis.problem_grouped import GroupedProblem
+from glotaran.analysis.problem_ungrouped import UngroupedProblem
+from glotaran.analysis.simulation import simulate
+from glotaran.builtin.models.kinetic_spectrum import KineticSpectrumModel
+from glotaran.parameter import ParameterGroup
+from glotaran.project import Scheme
+
+NUMBER_OF_EVALUATIONS = 5
+"""The number of evaluations of the problem measured by the ``evaluate`` benchmarks."""
+
+DEFAULT_SIZES = {
+    "number_of_time_points": 2100,
+    "number_of_spectral_points": 72,
+    "number_of_datasets": 1,
+    "number_of_compartments": 3,
+}
+
+
+def sequential_model(
+    number_of_compartments: int,
+    number_of_datasets: int,
+    index_dependent: bool,
+    with_shapes: bool = False,
+) -> KineticSpectrumModel:
+    compartments = [f"s{i+1}" for i in range(number_of_compartments)]
+    k_matrix = {
+        (to_compartment, from_compartment): f"kinetic.{i+1}"
+        for i, (from_compartment, to_compartment) in enumerate(
+            zip(compartments, compartments[1:])
+        )
+    }
+    k_matrix[(compartments[-1], compartments[-1])] = f"kinetic.{number_of_compartments}"
+    irf = {"type": "gaussian", "center": "irf.center", "width": "irf.width"}
+    if index_dependent:
+        irf.update(
+            {
+                "type": "spectral-gaussian",
+                "dispersion_center": "irf.dispersion_center",
+                "center_dispersion": ["irf.center_dispersion"],
+            }
+        )
+    dataset = {"initial_concentration": "j1", "megacomplex": ["m1"], "irf": "irf1"}
+    if with_shapes:
+        dataset["shape"] = {compartment: f"sh{i+1}" for i, compartment in enumerate(compartments)}
+    return KineticSpectrumModel.from_dict(
+        {
+            "initial_concentration": {
+                "j1": {
+                    "compartments": compartments,
+                    "parameters": ["j.1"] + ["j.0"] * (number_of_compartments - 1),
+                },
+            },
+            "k_matrix": {"k1": {"matrix": k_matrix}},
+            "megacomplex": {"m1": {"k_matrix": ["k1"]}},
+            "shape": {
+                f"sh{i+1}": {
+                    "type": "gaussian",
+                    "amplitude": f"shapes.amps.{i+1}",
+                    "location": f"shapes.locs.{i+1}",
+                    "width": f"shapes.width.{i+1}",
+                }
+                for i in range(number_of_compartments)
+            },
+            "irf": {"irf1": irf},
+            "dataset": {f"dataset{i+1}": dataset for i in range(number_of_datasets)},
+        }
+    )
+
+
+def sequential_parameters(number_of_compartments: int) -> ParameterGroup:
+    return ParameterGroup.from_dict(
+        {
+            "j": [
+                ["1", 1, {"vary": False, "non-negative": False}],
+                ["0", 0, {"vary": False, "non-negative": False}],
+            ],
+            "kinetic": [float(rate) for rate in np.linspace(0.5, 0.1, number_of_compartments)],
+            "shapes": {
+                "amps": [[30, 20, 40][i % 3] for i in range(number_of_compartments)],
+                "locs": [
+                    float(location) for location in np.linspace(620, 650, number_of_compartments)
+                ],
+                "width": [[40, 20, 60][i % 3] for i in range(number_of_compartments)],
+            },
+            "irf": [
+                ["center", 0.3],
+                ["width", 0.1],
+                ["dispersion_center", 650, {"vary": False}],
+                ["center_dispersion", 0.1],
+            ],
+        }
+    )
+
+
+class _SequentialScaling:
+    """Base of the scaling benchmarks, whose first parameter is the varied size."""
+
+    timeout = 300
+
+    def setup(self, size: int, index_dependent: bool):
+        sizes = {**DEFAULT_SIZES, self.param_names[0]: size}
+        axes = {
+            "time": np.linspace(-1, 20, sizes["number_of_time_points"]),
+            "spectral": np.linspace(600, 700, sizes["number_of_spectral_points"]),
+        }
+        parameters = sequential_parameters(sizes["number_of_compartments"])
+        simulation_model = sequential_model(
+            sizes["number_of_compartments"],
+            sizes["number_of_datasets"],
+            index_dependent,
+            with_shapes=True,
+        )
+        data = {
+            label: simulate(
+                simulation_model,
+                label,
+                parameters,
+                axes,
+                noise=True,
+                noise_std_dev=1e-2,
+                noise_seed=seed,
+            )
+            for seed, label in enumerate(simulation_model.dataset)
+        }
+        model = sequential_model(
+            sizes["number_of_compartments"], sizes["number_of_datasets"], index_dependent
+        )
+        # without the matrix cache each evaluation calculates all matrices
+        scheme = Scheme(model, parameters, data, matrix_cache_size=0)
+        self.problem = GroupedProblem(scheme) if model.grouped() else UngroupedProblem(scheme)
+        self.labels, self.values, _, _ = parameters.get_label_value_and_bounds_arrays(
+            exclude_non_vary=True
+        )
+        # compile the kernels outside of the measurement
+        self.time_evaluate()
+
+    def time_evaluate(self, *params):
+        for evaluation in range(NUMBER_OF_EVALUATIONS):
+            self.problem.update_parameters(self.labels, self.values * (1 + 1e-3 * evaluation))
+            self.problem.full_penalty
+
+    def peakmem_evaluate(self, *params):
+        self.time_evaluate()
+
+    def time_create_result_data(self, *params):
+        self.problem.create_result_data()
+
+    def peakmem_create_result_data(self, *params):
+        self.problem.create_result_data()
+
+
+class ScalingTimePoints(_SequentialScaling):
+    """Benchmark for the scaling with the number of time points."""
+
+    params = ([500, 1000, 2000, 5000, 10000], [False, True])
+    param_names = ["number_of_time_points", "index_dependent"]
+
+
+class ScalingSpectralPoints(_SequentialScaling):
+    """Benchmark for the scaling with the number of wavelengths, or pixels of an image."""
+
+    params = ([10, 50, 100, 500, 1000], [False, True])
+    param_names = ["number_of_spectral_points", "index_dependent"]
+
+
+class ScalingDatasets(_SequentialScaling):
+    """Benchmark for the scaling with the number of datasets, which are grouped."""
+
+    params = ([1, 2, 4, 8], [False, True])
+    param_names = ["number_of_datasets", "index_dependent"]
+
+
+class ScalingCompartments(_SequentialScaling):
+    """Benchmark for the scaling with the number of compartments of the sequential decay."""
+
+    params = ([2, 3, 5, 8, 13], [False, True])
+    param_names = ["number_of_compartments", "index_dependent"]
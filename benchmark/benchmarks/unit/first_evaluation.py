@@ -0,0 +1,69 @@
+SETUP = """
+import numpy as np
+import xarray as xr
+
+from glotaran.analysis.problem_grouped import GroupedProblem
+from glotaran.builtin.models.kinetic_spectrum import KineticSpectrumModel
+from glotaran.parameter import ParameterGroup
+from glotaran.project import Scheme
+
+model = KineticSpectrumModel.from_dict(
+    {
+        "initial_concentration": {
+            "j1": {"compartments": ["s1", "s2"], "parameters": ["j.1", "j.0"]},
+        },
+        "k_matrix": {"k1": {"matrix": {("s2", "s1"): "rates.1", ("s2", "s2"): "rates.2"}}},
+        "megacomplex": {"m1": {"k_matrix": ["k1"]}},
+        "irf": {"irf1": {"type": "gaussian", "center": "irf.center", "width": "irf.width"}},
+        "dataset": {
+            "dataset1": {"initial_concentration": "j1", "megacomplex": ["m1"], "irf": "irf1"},
+        },
+    }
+)
+parameters = ParameterGroup.from_dict(
+    {
+        "j": [["1", 1, {"vary": False}], ["0", 0, {"vary": False}]],
+        "rates": [0.5, 0.1],
+        "irf": [["center", 0.3], ["width", 0.1]],
+    }
+)
+data = xr.DataArray(
+    np.ones((100, 10)),
+    coords=[("time", np.linspace(-1, 20, 100)), ("spectral", np.arange(10.0))],
+).to_dataset(name="data")
+scheme = Scheme(model, parameters, {"dataset1": data}, non_negative_least_squares=True)
+"""
+
+EMPTY_NUMBA_CACHE = """
+import os
+import tempfile
+
+os.environ["NUMBA_CACHE_DIR"] = tempfile.mkdtemp()
+"""
+
+WARMUP = """
+import glotaran
+
+glotaran.warmup()
+"""
+
+
+class FirstEvaluation:
+    """
+    Benchmark for the latency of the first evaluation of a kinetic model in a fresh process,
+    which includes the compilation of the numba kernels or loading them from the disk cache.
+    """
+
+    timeout = 300
+
+    def timeraw_first_evaluation(self):
+        return "GroupedProblem(scheme).full_penalty", SETUP
+
+    def timeraw_first_evaluation_empty_cache(self):
+        return "GroupedProblem(scheme).full_penalty", EMPTY_NUMBA_CACHE + SETUP
+
+    def timeraw_warmup(self):
+        return "glotaran.warmup()", "import glotaran"
+
+    def timeraw_first_evaluation_after_warmup(self):
+        return "GroupedProblem(scheme).full_penalty", WARMUP + SETUP
@@ -0,0 +1,72 @@
+import numpy as np
+import xarray as xr
+
+from glotaran.analysis.problem_grouped import GroupedProblem
+from glotaran.analysis.test.models import SimpleTestModel
+from glotaran.analysis.util import align_axes
+from glotaran.analysis.util import find_overlap
+from glotaran.parameter import ParameterGroup
+from glotaran.project import Scheme
+
+
+class Grouping:
+    """
+    Benchmark for the alignment of the global axes of datasets and the creation of the
+    grouped problem bag.
+    """
+
+    params = ([100, 1000, 10000], [2, 10, 50])
+    param_names = ["axis_length", "number_of_datasets"]
+
+    def setup(self, axis_length, number_of_datasets):
+        rng = np.random.default_rng(42)
+        # shifted and jittered axes, which partially overlap within the group tolerance
+        self.axes = [
+            np.arange(axis_length) + i * axis_length / 10 + rng.uniform(-0.05, 0.05, axis_length)
+            for i in range(number_of_datasets)
+        ]
+        labels = [f"dataset{i+1}" for i in range(number_of_datasets)]
+        model = SimpleTestModel.from_dict(
+            {
+                "megacomplex": {"m1": {"is_index_dependent": False}},
+                "dataset": {label: {"megacomplex": ["m1"]} for label in labels},
+            }
+        )
+        model.grouped = lambda: True
+        model_axis = np.arange(10)
+        data = {
+            label: xr.DataArray(
+                np.ones((axis.size, model_axis.size)), coords=[("e", axis), ("c", model_axis)]
+            ).to_dataset(name="data")
+            for label, axis in zip(labels, self.axes)
+        }
+        self.scheme = Scheme(model, ParameterGroup.from_list([1, 10]), data, group_tolerance=0.1)
+
+    def time_align_axes(self, axis_length, number_of_datasets):
+        align_axes(self.axes, atol=0.1)
+
+    def time_init_bag(self, axis_length, number_of_datasets):
+        GroupedProblem(self.scheme).init_bag()
+
+    def peakmem_init_bag(self, axis_length, number_of_datasets):
+        GroupedProblem(self.scheme).init_bag()
+
+
+class FindOverlap:
+    """
+    Benchmark for matching the values of two shifted and jittered axes within a tolerance.
+    """
+
+    params = [100, 1000, 10000, 100000]
+    param_names = ["axis_length"]
+
+    def setup(self, axis_length):
+        rng = np.random.default_rng(42)
+        self.a = np.arange(axis_length) + rng.uniform(-0.05, 0.05, axis_length)
+        self.b = np.arange(axis_length) + axis_length / 2 + rng.uniform(-0.05, 0.05, axis_length)
+
+    def time_find_overlap(self, axis_length):
+        find_overlap(self.a, self.b, atol=0.1)
+
+    def peakmem_find_overlap(self, axis_length):
+        find_overlap(self.a, self.b, atol=0.1)
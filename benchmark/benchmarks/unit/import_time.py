@@ -0,0 +1,24 @@
+class ImportTime:
+    """
+    Benchmark for the startup time of glotaran and its command line interface, each measured
+    in a fresh interpreter. Plugins are only recorded at import, so neither imports the
+    plugin modules or their dependencies like numba or xarray, which is guarded by
+    ``test_import_glotaran_imports_no_plugin``.
+    """
+
+    def timeraw_import_glotaran(self):
+        return "import glotaran"
+
+    def timeraw_import_cli(self):
+        return "import glotaran.cli.main"
+
+    def timeraw_list_plugins(self):
+        return """
+        from glotaran.plugin_system.data_io_registration import known_data_formats
+        from glotaran.plugin_system.model_registration import known_model_names
+        from glotaran.plugin_system.project_io_registration import known_project_formats
+
+        known_data_formats()
+        known_model_names()
+        known_project_formats()
+        """
@@ -0,0 +1,24 @@
+from .util import sequential_model
+from .util import sequential_parameters
+
+
+class KMatrixAMatrix:
+    """
+    Benchmark for the calculation of the A matrix of a sequential k matrix, which has a
+    closed form, and of a branched one, which needs the eigen decomposition.
+    """
+
+    params = ([3, 10, 30], [False, True])
+    param_names = ["number_of_compartments", "branched"]
+
+    def setup(self, number_of_compartments, branched):
+        model = sequential_model(number_of_compartments, branched=branched)
+        parameters = sequential_parameters(number_of_compartments)
+        self.k_matrix = model.k_matrix["k1"].fill(model, parameters)
+        self.initial_concentration = model.initial_concentration["j1"].fill(model, parameters)
+
+    def time_a_matrix(self, number_of_compartments, branched):
+        self.k_matrix.a_matrix(self.initial_concentration)
+
+    def peakmem_a_matrix(self, number_of_compartments, branched):
+        self.k_matrix.a_matrix(self.initial_concentration)
@@ -0,0 +1,63 @@
+import numpy as np
+
+from glotaran.analysis.util import LabelAndMatrix
+from glotaran.analysis.util import calculate_matrix
+from glotaran.analysis.util import combine_matrices
+
+from .util import random_dataset
+from .util import sequential_model
+from .util import sequential_parameters
+
+
+class CalculateMatrix:
+    """
+    Benchmark for the calculation of the matrix of a dataset with a kinetic model and a
+    gaussian irf.
+    """
+
+    params = ([100, 1000, 10000], [3, 10])
+    param_names = ["number_of_time_points", "number_of_compartments"]
+
+    def setup(self, number_of_time_points, number_of_compartments):
+        dataset = random_dataset(number_of_time_points, 1)
+        self.model = sequential_model(number_of_compartments)
+        self.dataset_descriptor = (
+            self.model.dataset["dataset1"]
+            .fill(self.model, sequential_parameters(number_of_compartments))
+            .set_data(dataset)
+        )
+        self.axis = {"time": dataset.time.values, "spectral": dataset.spectral.values}
+        self.indices = {"spectral": 0}
+        # compile the kernels outside of the measurement
+        self.time_calculate_matrix(number_of_time_points, number_of_compartments)
+
+    def time_calculate_matrix(self, number_of_time_points, number_of_compartments):
+        calculate_matrix(self.model, self.dataset_descriptor, self.indices, self.axis)
+
+    def peakmem_calculate_matrix(self, number_of_time_points, number_of_compartments):
+        calculate_matrix(self.model, self.dataset_descriptor, self.indices, self.axis)
+
+
+class CombineMatrices:
+    """
+    Benchmark for the combination of the matrices of a group of datasets, whose clp labels
+    partially overlap.
+    """
+
+    params = ([100, 1000, 10000], [2, 10, 50])
+    param_names = ["number_of_rows", "number_of_matrices"]
+
+    def setup(self, number_of_rows, number_of_matrices):
+        rng = np.random.default_rng(42)
+        self.labels_and_matrices = [
+            LabelAndMatrix(
+                [f"s{i+j}" for j in range(10)], rng.uniform(size=(number_of_rows, 10))
+            )
+            for i in range(number_of_matrices)
+        ]
+
+    def time_combine_matrices(self, number_of_rows, number_of_matrices):
+        combine_matrices(self.labels_and_matrices)
+
+    def peakmem_combine_matrices(self, number_of_rows, number_of_matrices):
+        combine_matrices(self.labels_and_matrices)
@@ -0,0 +1,35 @@
+import numpy as np
+
+from glotaran.parameter import ParameterGroup
+
+
+class SetFromLabelAndValueArrays:
+    """
+    Benchmark for updating the values of a parameter group from the optimizer, with groups of
+    ten parameters of which every tenth is an expression.
+    """
+
+    params = [10, 100, 1000]
+    param_names = ["number_of_parameters"]
+
+    def setup(self, number_of_parameters):
+        self.parameters = ParameterGroup.from_dict(
+            {
+                f"group{group}": [
+                    [f"{index}", 1.0 + index, {"non-negative": index % 2 == 0}]
+                    for index in range(9)
+                ]
+                + [["expression", {"expr": f"$group{group}.0 * 2"}]]
+                for group in range(max(number_of_parameters // 10, 1))
+            }
+        )
+        self.labels, values, _, _ = self.parameters.get_label_value_and_bounds_arrays(
+            exclude_non_vary=True
+        )
+        self.values = values * np.random.default_rng(42).uniform(0.9, 1.1, values.size)
+
+    def time_set_from_label_and_value_arrays(self, number_of_parameters):
+        self.parameters.set_from_label_and_value_arrays(self.labels, self.values)
+
+    def peakmem_set_from_label_and_value_arrays(self, number_of_parameters):
+        self.parameters.set_from_label_and_value_arrays(self.labels, self.values)
@@ -0,0 +1,41 @@
+import numpy as np
+
+from glotaran.analysis.nnls import residual_nnls
+from glotaran.analysis.variable_projection import residual_variable_projection
+
+
+class ResidualFunctions:
+    """
+    Benchmark for the calculation of the clps and the residual of a matrix and a single data
+    vector or a block of data columns sharing the matrix.
+    """
+
+    params = ([100, 1000, 10000], [3, 10], [1, 100])
+    param_names = ["number_of_rows", "number_of_clps", "number_of_data_columns"]
+
+    def setup(self, number_of_rows, number_of_clps, number_of_data_columns):
+        rng = np.random.default_rng(42)
+        self.matrix = rng.uniform(size=(number_of_rows, number_of_clps))
+        clps = rng.uniform(size=(number_of_clps, number_of_data_columns))
+        noise = rng.normal(0, 0.01, (number_of_rows, number_of_data_columns))
+        self.data = self.matrix @ clps + noise
+        if number_of_data_columns == 1:
+            self.data = self.data[:, 0]
+        # compile the nnls kernel outside of the measurement
+        residual_nnls(self.matrix, self.data)
+
+    def time_residual_variable_projection(
+        self, number_of_rows, number_of_clps, number_of_data_columns
+    ):
+        residual_variable_projection(self.matrix, self.data)
+
+    def peakmem_residual_variable_projection(
+        self, number_of_rows, number_of_clps, number_of_data_columns
+    ):
+        residual_variable_projection(self.matrix, self.data)
+
+    def time_residual_nnls(self, number_of_rows, number_of_clps, number_of_data_columns):
+        residual_nnls(self.matrix, self.data)
+
+    def peakmem_residual_nnls(self, number_of_rows, number_of_clps, number_of_data_columns):
+        residual_nnls(self.matrix, self.data)
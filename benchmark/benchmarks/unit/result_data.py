@@ -0,0 +1,28 @@
+from glotaran.analysis.problem_grouped import GroupedProblem
+from glotaran.project import Scheme
+
+from .util import random_dataset
+from .util import sequential_model
+from .util import sequential_parameters
+
+
+class CreateResultData:
+    """
+    Benchmark for the creation of the result datasets of an evaluated problem with a kinetic
+    model.
+    """
+
+    params = ([100, 1000], [1, 5])
+    param_names = ["number_of_time_points", "number_of_datasets"]
+
+    def setup(self, number_of_time_points, number_of_datasets):
+        model = sequential_model(3, number_of_datasets)
+        data = {label: random_dataset(number_of_time_points, 50) for label in model.dataset}
+        self.problem = GroupedProblem(Scheme(model, sequential_parameters(3), data))
+        self.problem.full_penalty
+
+    def time_create_result_data(self, number_of_time_points, number_of_datasets):
+        self.problem.create_result_data()
+
+    def peakmem_create_result_data(self, number_of_time_points, number_of_datasets):
+        self.problem.create_result_data()
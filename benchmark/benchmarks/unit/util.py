@@ -0,0 +1,70 @@
+"""Models, parameters and datasets shared by the unit benchmarks."""
+import numpy as np
+import xarray as xr
+
+from glotaran.builtin.models.kinetic_spectrum import KineticSpectrumModel
+from glotaran.parameter import ParameterGroup
+
+
+def sequential_model(
+    number_of_compartments: int, number_of_datasets: int = 1, branched: bool = False
+) -> KineticSpectrumModel:
+    """A sequential decay with a gaussian irf, optionally with a branch from the first to the
+    third compartment."""
+    compartments = [f"s{i+1}" for i in range(number_of_compartments)]
+    k_matrix = {
+        (to_compartment, from_compartment): f"rates.{i+1}"
+        for i, (from_compartment, to_compartment) in enumerate(
+            zip(compartments, compartments[1:])
+        )
+    }
+    k_matrix[(compartments[-1], compartments[-1])] = f"rates.{number_of_compartments}"
+    if branched:
+        k_matrix[(compartments[2], compartments[0])] = "branch.rate"
+    return KineticSpectrumModel.from_dict(
+        {
+            "initial_concentration": {
+                "j1": {
+                    "compartments": compartments,
+                    "parameters": ["j.1"] + ["j.0"] * (number_of_compartments - 1),
+                },
+            },
+            "k_matrix": {"k1": {"matrix": k_matrix}},
+            "megacomplex": {"m1": {"k_matrix": ["k1"]}},
+            "irf": {
+                "irf1": {"type": "gaussian", "center": "irf.center", "width": "irf.width"},
+            },
+            "dataset": {
+                f"dataset{i+1}": {
+                    "initial_concentration": "j1",
+                    "megacomplex": ["m1"],
+                    "irf": "irf1",
+                }
+                for i in range(number_of_datasets)
+            },
+        }
+    )
+
+
+def sequential_parameters(number_of_compartments: int) -> ParameterGroup:
+    """The parameters of :func:`sequential_model` with rates from 1 to 0.01."""
+    return ParameterGroup.from_dict(
+        {
+            "j": [["1", 1, {"vary": False}], ["0", 0, {"vary": False}]],
+            "rates": [float(rate) for rate in np.geomspace(1, 0.01, number_of_compartments)],
+            "branch": [["rate", 0.05]],
+            "irf": [["center", 0.3], ["width", 0.1]],
+        }
+    )
+
+
+def random_dataset(number_of_time_points: int, number_of_spectral_points: int) -> xr.Dataset:
+    """A dataset of random values on a time and a spectral axis."""
+    rng = np.random.default_rng(42)
+    return xr.DataArray(
+        rng.uniform(size=(number_of_time_points, number_of_spectral_points)),
+        coords=[
+            ("time", np.linspace(-1, 100, number_of_time_points)),
+            ("spectral", np.linspace(400, 700, number_of_spectral_points)),
+        ],
+    ).to_dataset(name="data")
@@ -0,0 +1,20 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import pytest
+
+from glotaran.io.dataset_cache import dataset_cache
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    from _pytest.monkeypatch import MonkeyPatch
+
+
+@pytest.fixture(autouse=True)
+def isolated_dataset_cache(tmp_path: Path, monkeypatch: MonkeyPatch):
+    """Keeps the dataset cache of the tests out of the cache directory of the user."""
+    directory = tmp_path / "dataset_cache"
+    monkeypatch.setenv("GLOTARAN_DATASET_CACHE_DIR", str(directory))
+    monkeypatch.setattr(dataset_cache, "directory", directory)
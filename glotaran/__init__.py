@@ -1,19 +1,58 @@
 """Glotaran package __init__.py"""
-from glotaran.deprecation.modules.glotaran_root import read_model_from_yaml
-from glotaran.deprecation.modules.glotaran_root import read_model_from_yaml_file
-from glotaran.deprecation.modules.glotaran_root import read_parameters_from_csv_file
-from glotaran.deprecation.modules.glotaran_root import read_parameters_from_yaml
-from glotaran.deprecation.modules.glotaran_root import read_parameters_from_yaml_file
 from glotaran.plugin_system.base_registry import load_plugins
 
 load_plugins()
 
+# the plugin registration functions need the io interfaces, which import them in turn
+import glotaran.io  # noqa: E402, F401, I100
+
 __version__ = "0.4.0"
 
+_DEPRECATED_ROOT_FUNCTIONS = (
+    "read_model_from_yaml",
+    "read_model_from_yaml_file",
+    "read_parameters_from_csv_file",
+    "read_parameters_from_yaml",
+    "read_parameters_from_yaml_file",
+)
+
+_SUBPACKAGES = (
+    "analysis",
+    "builtin",
+    "cli",
+    "deprecation",
+    "examples",
+    "io",
+    "model",
+    "parameter",
+    "plugin_system",
+    "project",
+    "utils",
+)
+
+
+def warmup():
+    """Compiles the numba kernels of glotaran ahead of their first use.
+
+    See :func:`glotaran.utils.warmup.warmup`.
+    """
+    from glotaran.utils.warmup import warmup as warmup_kernels
+
+    warmup_kernels()
+
 
 def __getattr__(attribute_name: str):
+    # subpackages and deprecated functions are imported on first access to keep the import fast
+    from importlib import import_module
+
     from glotaran.deprecation.deprecation_utils import deprecate_module_attribute
 
+    if attribute_name in _SUBPACKAGES:
+        return import_module(f"glotaran.{attribute_name}")
+
+    if attribute_name in _DEPRECATED_ROOT_FUNCTIONS:
+        return getattr(import_module("glotaran.deprecation.modules.glotaran_root"), attribute_name)
+
     if attribute_name == "ParameterGroup":
         return deprecate_module_attribute(
             deprecated_qual_name="glotaran.ParameterGroup",
@@ -0,0 +1,85 @@
+"""A least recently used cache for model matrices."""
+from __future__ import annotations
+
+import collections
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from typing import Hashable
+
+    from glotaran.analysis.util import LabelAndMatrix
+
+
+class MatrixCache:
+    """A least recently used cache for the matrices of datasets.
+
+    A matrix is cached together with the values of the parameters the dataset descriptor reads,
+    so it is reused as long as these values do not change.
+    """
+
+    def __init__(self, size: int):
+        """Initializes an empty cache.
+
+        Parameters
+        ----------
+        size : int
+            The maximum number of cached matrices. If the cache is full, the least recently used
+            matrix gets evicted.
+        """
+        self._size = size
+        self._entries: collections.OrderedDict[Hashable, LabelAndMatrix] = (
+            collections.OrderedDict()
+        )
+        self.hits = 0
+        """The number of matrices found in the cache."""
+        self.misses = 0
+        """The number of matrices not found in the cache."""
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> LabelAndMatrix | None:
+        """Gets a matrix from the cache and marks it as recently used.
+
+        Parameters
+        ----------
+        key : Hashable
+            The key of the matrix.
+
+        Returns
+        -------
+        LabelAndMatrix | None
+            The cached matrix or ``None`` if the matrix is not in the cache.
+        """
+        if key not in self._entries:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return self._entries[key]
+
+    def put(self, key: Hashable, value: LabelAndMatrix):
+        """Adds a matrix to the cache, evicting the least recently used matrix if needed.
+
+        Parameters
+        ----------
+        key : Hashable
+            The key of the matrix.
+        value : LabelAndMatrix
+            The matrix and its clp labels.
+        """
+        if self._size <= 0:
+            return
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._size:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        """Removes all matrices from the cache."""
+        self._entries.clear()
+
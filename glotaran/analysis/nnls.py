@@ -1,26 +1,197 @@
 """Functions for calculating conditionally linear parameters and residual with the non-negative
 least-squares method."""
+from __future__ import annotations
 
-import typing
-
+import numba as nb
 import numpy as np
 from scipy.optimize import nnls
 
+NNLS_MAX_ITERATIONS_FACTOR = 3
+"""The maximum number of iterations per column in multiples of the number of clps."""
+
+NNLS_MAX_GRAM_CONDITION_NUMBER = 1e8
+"""The largest condition number of the cross product of the matrix with itself, up to which
+the clps are calculated from the normal equations."""
+
 
 def residual_nnls(
-    matrix: np.ndarray, data: np.ndarray
-) -> typing.Tuple[typing.List[str], np.ndarray]:
+    matrix: np.ndarray, data: np.ndarray, initial_clp: np.ndarray | None = None
+) -> tuple[np.ndarray, np.ndarray]:
     """Calculate the conditionally linear parameters and residual with the nnls method.
 
     nnls stands for 'non-negative least-squares'.
 
+    The data can either be a single vector or a 2D array where each column is a data vector
+    sharing the same matrix. The clps of all columns are calculated with the fast
+    non-negative least-squares algorithm by Bro and De Jong, which shares the cross products
+    of the matrix between all columns. The cross products are accumulated and solved in
+    double precision, the residual has the dtype of the data.
+
+    Solving the normal equations squares the condition number of the matrix, the relative
+    error of the clps is about the condition number of the cross product times the machine
+    epsilon. Matrices whose cross product has a condition number above
+    :data:`NNLS_MAX_GRAM_CONDITION_NUMBER` are solved column by column with
+    :func:`scipy.optimize.nnls` instead, which ignores ``initial_clp``. So are the columns
+    whose solution has not converged within the maximum number of iterations.
+
     Parameters
     ----------
     matrix :
         The model matrix.
     data : np.ndarray
         The data to analyze.
+    initial_clp : np.ndarray | None
+        Clps of a previous solution with the same shape as the result. The positive clps are
+        used as initial passive set, which usually saves most of the iterations if the
+        solution changes only slightly.
+
+    Raises
+    ------
+    RuntimeError
+        If :func:`scipy.optimize.nnls` does not converge for a column either.
     """
-    clp, _ = nnls(matrix, data)
-    residual = data - np.dot(matrix, clp)
+    columns = data.reshape(data.shape[0], -1)
+    matrix_64 = np.asarray(matrix, dtype=np.float64)
+    columns_64 = columns.astype(np.float64, copy=False)
+    gram = matrix_64.T @ matrix_64
+
+    if gram.size > 0 and np.linalg.cond(gram) > NNLS_MAX_GRAM_CONDITION_NUMBER:
+        clp = np.empty((matrix.shape[1], columns.shape[1]))
+        unsolved_columns = np.arange(columns.shape[1])
+    else:
+        if initial_clp is None:
+            passive_set = np.zeros((matrix.shape[1], columns.shape[1]), dtype=np.bool_)
+        else:
+            passive_set = initial_clp.reshape(matrix.shape[1], -1) > 0
+        clp, converged = _fnnls(
+            gram,
+            matrix_64.T @ columns_64,
+            passive_set,
+            NNLS_MAX_ITERATIONS_FACTOR * matrix.shape[1],
+        )
+        unsolved_columns = np.flatnonzero(~converged)
+    for column in unsolved_columns:
+        clp[:, column] = nnls(matrix_64, columns_64[:, column])[0]
+
+    clp = clp.astype(np.result_type(matrix, data), copy=False)
+    residual = columns - matrix @ clp
+    if data.ndim == 1:
+        return clp[:, 0], residual[:, 0]
     return clp, residual
+
+
+@nb.jit(nopython=True, parallel=True, nogil=True, cache=True)
+def _fnnls(
+    gram: np.ndarray, cross: np.ndarray, passive_set: np.ndarray, max_iterations: int
+) -> tuple[np.ndarray, np.ndarray]:
+    """Solves the normal equations of non-negative least-squares problems for each column.
+
+    Parameters
+    ----------
+    gram : np.ndarray
+        The cross product of the matrix with itself.
+    cross : np.ndarray
+        The cross product of the matrix with the data, one column per problem.
+    passive_set : np.ndarray
+        The initial passive set for each column.
+    max_iterations : int
+        The maximum number of clps added to the passive set of a column.
+
+    Returns
+    -------
+    tuple[np.ndarray, np.ndarray]
+        The clps of all columns and whether the solution of each column has converged.
+    """
+    number_of_clps = gram.shape[0]
+    relative_tolerance = 10 * np.finfo(np.float64).eps * max(number_of_clps, 1)
+    gram_maximum = np.abs(gram).max()
+    clp = np.zeros(cross.shape)
+    converged = np.zeros(cross.shape[1], dtype=np.bool_)
+    for column in nb.prange(cross.shape[1]):
+        column_clp, column_converged = _fnnls_column(
+            gram,
+            cross[:, column],
+            passive_set[:, column].copy(),
+            relative_tolerance,
+            gram_maximum,
+            max_iterations,
+        )
+        clp[:, column] = column_clp
+        converged[column] = column_converged
+    return clp, converged
+
+
+@nb.jit(nopython=True, nogil=True, cache=True)
+def _fnnls_column(
+    gram: np.ndarray,
+    cross: np.ndarray,
+    passive: np.ndarray,
+    relative_tolerance: float,
+    gram_maximum: float,
+    max_iterations: int,
+) -> tuple[np.ndarray, bool]:
+    number_of_clps = gram.shape[0]
+    x = np.zeros(number_of_clps)
+    # the tolerances scale with the data, which is solved like the same data scaled to one
+    gradient_tolerance = relative_tolerance * np.abs(cross).max()
+    clp_tolerance = gradient_tolerance / gram_maximum if gram_maximum > 0 else 0.0
+
+    # warm start with the initial passive set, reduced until the solution is positive
+    while passive.any():
+        solution = _solve_passive(gram, cross, passive)
+        if (solution[passive] > clp_tolerance).all():
+            x = solution
+            break
+        for i in range(number_of_clps):
+            if passive[i] and solution[i] <= clp_tolerance:
+                passive[i] = False
+
+    iteration = 0
+    while True:
+        gradient = cross - gram @ x
+        candidate = -1
+        maximum = gradient_tolerance
+        for i in range(number_of_clps):
+            if not passive[i] and gradient[i] > maximum:
+                candidate = i
+                maximum = gradient[i]
+        if candidate == -1:
+            return x, True
+        if iteration == max_iterations:
+            return x, False
+        iteration += 1
+        passive[candidate] = True
+        x = _solve_feasible(gram, cross, passive, x, clp_tolerance)
+
+
+@nb.jit(nopython=True, nogil=True, cache=True)
+def _solve_feasible(
+    gram: np.ndarray, cross: np.ndarray, passive: np.ndarray, x: np.ndarray, tolerance: float
+) -> np.ndarray:
+    """Solves the unconstrained problem on the passive set and moves clps which become
+    non-positive to the active set, until the solution is feasible."""
+    while passive.any():
+        solution = _solve_passive(gram, cross, passive)
+        if (solution[passive] > tolerance).all():
+            return solution
+
+        step = 1.0
+        for i in range(x.size):
+            if passive[i] and solution[i] <= tolerance:
+                difference = x[i] - solution[i]
+                step = min(step, x[i] / difference) if difference > 0 else 0.0
+        x = x + step * (solution - x)
+        for i in range(x.size):
+            if passive[i] and x[i] <= tolerance:
+                passive[i] = False
+                x[i] = 0.0
+    return np.zeros_like(x)
+
+
+@nb.jit(nopython=True, nogil=True, cache=True)
+def _solve_passive(gram: np.ndarray, cross: np.ndarray, passive: np.ndarray) -> np.ndarray:
+    """Solves the unconstrained normal equations of the clps in the passive set."""
+    indices = np.nonzero(passive)[0]
+    solution = np.zeros(gram.shape[0])
+    solution[indices] = np.linalg.lstsq(gram[indices][:, indices], cross[indices])[0]
+    return solution
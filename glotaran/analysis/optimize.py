@@ -1,16 +1,50 @@
 from __future__ import annotations
 
+import dataclasses
+import functools
+import inspect
+import multiprocessing.util
+import os
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED
+from concurrent.futures import wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import TYPE_CHECKING
+from typing import NamedTuple
 from warnings import warn
 
 import numpy as np
 from scipy.optimize import OptimizeResult
 from scipy.optimize import least_squares
 
+try:
+    # private functions of scipy, without them the dense finite differences are used
+    from scipy.optimize._numdiff import approx_derivative
+    from scipy.optimize._numdiff import group_columns
+except ImportError:  # pragma: no cover
+    approx_derivative = None
+    group_columns = None
+
 from glotaran.analysis.problem import Problem
 from glotaran.analysis.problem_grouped import GroupedProblem
 from glotaran.analysis.problem_ungrouped import UngroupedProblem
+from glotaran.analysis.util import SharedDatasets
+from glotaran.analysis.util import create_executor
+from glotaran.io import load_dataset
+from glotaran.io import load_model
+from glotaran.io import load_parameters
 from glotaran.project import Result
 from glotaran.project import Scheme
+from glotaran.utils.warmup import warmup
+
+if TYPE_CHECKING:
+    from concurrent.futures import Future
+    from typing import Iterable
+    from typing import Iterator
+    from typing import Literal
+
+    from glotaran.model import Model
+    from glotaran.parameter import ParameterGroup
 
 SUPPORTED_METHODS = {
     "TrustRegionReflection": "trf",
@@ -18,10 +52,389 @@ SUPPORTED_METHODS = {
     "Levenberg-Marquardt": "lm",
 }
 
+SUPPORTED_JACOBIAN_METHODS = ["FiniteDifferences", "Kaufman"]
+
+SUPPORTED_START_METHODS = ["LatinHypercube", "Perturbation"]
+
+SPARSE_FINITE_DIFFERENCE_ARGUMENTS = {"method", "rel_step", "f0", "bounds", "sparsity", "kwargs"}
+"""The arguments of the private ``approx_derivative`` of scipy, which the sparse finite
+difference Jacobian passes."""
+
+if approx_derivative is not None and not SPARSE_FINITE_DIFFERENCE_ARGUMENTS.issubset(
+    inspect.signature(approx_derivative).parameters
+):  # pragma: no cover
+    # the private function has changed, the dense finite differences are used
+    approx_derivative = None
+    group_columns = None
+
+_multistart_worker_state: tuple[Scheme, SharedDatasets] | None = None
+"""The scheme of a multi-start worker process and the shared datasets it references."""
+
+TASKS_IN_FLIGHT_PER_WORKER = 2
+"""The number of schemes submitted to an :class:`OptimizationPool` per worker at a time."""
+
+
+class BatchOptimizationResult(NamedTuple):
+    """The outcome of optimizing one scheme of a batch."""
+
+    index: int
+    """The index of the scheme in the batch."""
+    result: Result | None
+    """The result, or ``None`` if the optimization raised an error."""
+    error: BaseException | None
+    """The error raised by the optimization, or ``None``."""
+
+
+class OptimizationPool:
+    """A persistent pool of worker processes for optimizing many independent schemes.
+
+    The workers live as long as the pool, so compiled numba kernels and models loaded from files
+    are reused by all schemes they optimize. The kernels are compiled, or loaded from the disk
+    cache, when a worker starts, see :func:`glotaran.warmup`.
+    """
+
+    def __init__(self, number_of_workers: int | None = None):
+        """Starts the pool.
+
+        Parameters
+        ----------
+        number_of_workers : int | None
+            The number of worker processes. Defaults to the number of CPUs.
+        """
+        self._number_of_workers = number_of_workers or os.cpu_count()
+        self._executor = create_executor("process", self._number_of_workers, initializer=warmup)
+
+    def optimize_many(self, schemes: Iterable[Scheme]) -> Iterator[BatchOptimizationResult]:
+        """Optimizes schemes and yields the outcomes as they finish.
+
+        An error raised while optimizing a scheme is reported in its outcome and does not stop
+        the other optimizations. If a worker process dies, e.g. by a crash of a compiled
+        library, the pool is restarted and the schemes which were in flight are optimized again
+        one at a time, so that only the scheme causing the crash fails.
+
+        Parameters
+        ----------
+        schemes : Iterable[Scheme]
+            The schemes, which are consumed lazily. The model, parameters and datasets of a
+            scheme can also be file paths, which get loaded by the workers.
+
+        Yields
+        ------
+        BatchOptimizationResult
+            The outcome of each scheme, in order of completion.
+        """
+        schemes = enumerate(schemes)
+        # the value of a pending future is the index, the scheme and if it runs in isolation
+        pending: dict[Future, tuple[int, Scheme, bool]] = {}
+        suspects: deque[tuple[int, Scheme]] = deque()
+        exhausted = False
+        try:
+            while True:
+                if suspects:
+                    if not pending:
+                        index, scheme = suspects.popleft()
+                        pending[self._submit(scheme)] = (index, scheme, True)
+                else:
+                    while not exhausted and len(pending) < (
+                        TASKS_IN_FLIGHT_PER_WORKER * self._number_of_workers
+                    ):
+                        try:
+                            index, scheme = next(schemes)
+                        except StopIteration:
+                            exhausted = True
+                        else:
+                            pending[self._submit(scheme)] = (index, scheme, False)
+                if not pending:
+                    return
+
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index, scheme, isolated = pending.pop(future)
+                    error = future.exception()
+                    if isinstance(error, BrokenProcessPool) and not isolated:
+                        suspects.append((index, scheme))
+                    elif error is not None:
+                        yield BatchOptimizationResult(index, None, error)
+                    else:
+                        result = future.result()
+                        result.scheme = _restore_scheme_data(result.scheme, scheme)
+                        yield BatchOptimizationResult(index, result, None)
+        finally:
+            for future in pending:
+                future.cancel()
+
+    def shutdown(self):
+        """Stops the worker processes."""
+        self._executor.shutdown()
+
+    def __enter__(self) -> OptimizationPool:
+        return self
+
+    def __exit__(self, *exc_info):
+        self.shutdown()
+
+    def _submit(self, scheme: Scheme) -> Future:
+        try:
+            return self._executor.submit(_optimize_scheme, scheme)
+        except BrokenProcessPool:
+            self._executor.shutdown(wait=False)
+            self._executor = create_executor(
+                "process", self._number_of_workers, initializer=warmup
+            )
+            return self._executor.submit(_optimize_scheme, scheme)
+
 
 def optimize(scheme: Scheme, verbose: bool = True) -> Result:
     problem = GroupedProblem(scheme) if scheme.model.grouped() else UngroupedProblem(scheme)
-    return optimize_problem(problem, verbose=verbose)
+    with problem:
+        return optimize_problem(problem, verbose=verbose)
+
+
+def generate_start_parameters(
+    parameters: ParameterGroup,
+    number_of_starts: int,
+    method: Literal["LatinHypercube", "Perturbation"] = "LatinHypercube",
+    spread: float = 0.5,
+    seed: int | None = None,
+) -> list[ParameterGroup]:
+    """Generates starting parameters for a multi-start optimization.
+
+    The first start are the initial parameters. The free parameters of the other starts are
+    sampled in the optimization space, i.e. non-negative parameters on a logarithmic scale.
+
+    A free parameter is sampled within ``spread * max(1, |value|)`` around its initial value,
+    limited by its bounds. With ``'LatinHypercube'`` parameters with both bounds finite are
+    sampled across their bounds instead, and the samples of each parameter are stratified. With
+    ``'Perturbation'`` the samples are uniformly random.
+
+    Parameters
+    ----------
+    parameters : ParameterGroup
+        The initial parameters.
+    number_of_starts : int
+        The number of starts, including the initial parameters.
+    method : Literal["LatinHypercube", "Perturbation"]
+        The sampling method.
+    spread : float
+        The relative spread of the samples around the initial values.
+    seed : int | None
+        The seed of the random number generator.
+
+    Returns
+    -------
+    list[ParameterGroup]
+        The starting parameters.
+
+    Raises
+    ------
+    ValueError
+        If the method is not supported or the number of starts is smaller than one.
+    """
+    if method not in SUPPORTED_START_METHODS:
+        raise ValueError(
+            f"Unsupported start method {method}. "
+            f"Supported methods are '{SUPPORTED_START_METHODS}'"
+        )
+    if number_of_starts < 1:
+        raise ValueError(f"The number of starts must be positive, got {number_of_starts}.")
+
+    labels, values, lower_bounds, upper_bounds = parameters.get_label_value_and_bounds_arrays(
+        exclude_non_vary=True
+    )
+    width = spread * np.maximum(1.0, np.abs(values))
+    lower = np.maximum(values - width, lower_bounds)
+    upper = np.minimum(values + width, upper_bounds)
+
+    rng = np.random.default_rng(seed)
+    shape = (number_of_starts - 1, len(labels))
+    if method == "LatinHypercube":
+        bounded = np.isfinite(lower_bounds) & np.isfinite(upper_bounds)
+        lower = np.where(bounded, lower_bounds, lower)
+        upper = np.where(bounded, upper_bounds, upper)
+        # one random permutation of the strata per parameter
+        strata = np.argsort(rng.random(shape), axis=0)
+        samples = (strata + rng.random(shape)) / max(shape[0], 1)
+    else:
+        samples = rng.random(shape)
+
+    starts = [parameters.copy()]
+    for start_values in lower + samples * (upper - lower):
+        start = parameters.copy()
+        start.set_from_label_and_value_arrays(labels, start_values)
+        starts.append(start)
+    return starts
+
+
+def optimize_multistart(
+    scheme: Scheme,
+    starts: int | list[ParameterGroup] = 10,
+    method: Literal["LatinHypercube", "Perturbation"] = "LatinHypercube",
+    spread: float = 0.5,
+    seed: int | None = None,
+    executor: Literal["serial", "thread", "process"] = "process",
+    number_of_workers: int | None = None,
+) -> list[Result]:
+    """Optimizes a scheme from multiple starting parameters concurrently.
+
+    With the process executor the data of the scheme is placed in shared memory once, instead of
+    being pickled for every start. The executor of the scheme is used within each start.
+
+    Parameters
+    ----------
+    scheme : Scheme
+        The scheme to optimize.
+    starts : int | list[ParameterGroup]
+        The number of starts, see :func:`generate_start_parameters`, or the starting parameters.
+    method : Literal["LatinHypercube", "Perturbation"]
+        The sampling method of the generated starts.
+    spread : float
+        The relative spread of the generated starts around the initial values.
+    seed : int | None
+        The seed for generating the starts.
+    executor : Literal["serial", "thread", "process"]
+        The executor running the starts.
+    number_of_workers : int | None
+        The number of workers of the executor. Defaults to the number of CPUs.
+
+    Returns
+    -------
+    list[Result]
+        The results ranked by their chi-square, failed optimizations last. The scheme of each
+        result holds its starting parameters.
+    """
+    if isinstance(starts, int):
+        starts = generate_start_parameters(scheme.parameters, starts, method, spread, seed)
+
+    if executor != "process":
+        schemes = [dataclasses.replace(scheme, parameters=start) for start in starts]
+        pool = create_executor(executor, number_of_workers)
+        if pool is None:
+            results = list(map(_optimize_quietly, schemes))
+        else:
+            with pool:
+                results = list(pool.map(_optimize_quietly, schemes))
+    else:
+        shared_datasets = SharedDatasets(scheme.data)
+        try:
+            with create_executor(
+                executor,
+                number_of_workers,
+                initializer=_initialize_multistart_worker,
+                initargs=(dataclasses.replace(scheme, data={}), shared_datasets),
+            ) as pool:
+                results = list(pool.map(_optimize_start, starts))
+        finally:
+            shared_datasets.unlink()
+        for result, start in zip(results, starts):
+            result.scheme = dataclasses.replace(scheme, parameters=start)
+
+    return sorted(
+        results,
+        key=lambda result: (
+            not result.success,
+            result.chi_square if result.chi_square is not None else np.inf,
+        ),
+    )
+
+
+def _optimize_quietly(scheme: Scheme) -> Result:
+    return optimize(scheme, verbose=False)
+
+
+def _initialize_multistart_worker(scheme: Scheme, shared_datasets: SharedDatasets):
+    global _multistart_worker_state
+    _multistart_worker_state = (
+        dataclasses.replace(scheme, data=shared_datasets.datasets),
+        shared_datasets,
+    )
+    # the worker closes the shared memory when it exits, the parent process releases it
+    multiprocessing.util.Finalize(None, _close_multistart_worker, exitpriority=0)
+
+
+def _close_multistart_worker():
+    global _multistart_worker_state
+    _, shared_datasets = _multistart_worker_state
+    _multistart_worker_state = None
+    shared_datasets.close()
+
+
+def _optimize_start(parameters: ParameterGroup) -> Result:
+    scheme, _ = _multistart_worker_state
+    result = optimize(dataclasses.replace(scheme, parameters=parameters), verbose=False)
+    # the data of the scheme is already known to the parent process
+    result.scheme = None
+    return result
+
+
+def optimize_many(
+    schemes: Iterable[Scheme], number_of_workers: int | None = None
+) -> Iterator[BatchOptimizationResult]:
+    """Optimizes many independent schemes on a pool of worker processes.
+
+    To reuse the workers for several batches use an :class:`OptimizationPool` directly.
+
+    Parameters
+    ----------
+    schemes : Iterable[Scheme]
+        The schemes, see :meth:`OptimizationPool.optimize_many`.
+    number_of_workers : int | None
+        The number of worker processes. Defaults to the number of CPUs.
+
+    Yields
+    ------
+    BatchOptimizationResult
+        The outcome of each scheme, in order of completion.
+    """
+    with OptimizationPool(number_of_workers) as pool:
+        yield from pool.optimize_many(schemes)
+
+
+def _optimize_scheme(scheme: Scheme) -> Result:
+    dataset_labels_to_return = {
+        label for label, dataset in scheme.data.items() if isinstance(dataset, str)
+    }
+    scheme = dataclasses.replace(
+        scheme,
+        model=(
+            _load_model_cached(scheme.model, os.path.getmtime(scheme.model))
+            if isinstance(scheme.model, str)
+            else scheme.model
+        ),
+        parameters=(
+            load_parameters(scheme.parameters)
+            if isinstance(scheme.parameters, str)
+            else scheme.parameters
+        ),
+        data={
+            label: load_dataset(dataset) if isinstance(dataset, str) else dataset
+            for label, dataset in scheme.data.items()
+        },
+    )
+    result = optimize(scheme, verbose=False)
+    # the datasets which have not been loaded by the worker are already known to the caller
+    result.scheme = dataclasses.replace(
+        result.scheme,
+        data={
+            label: dataset
+            for label, dataset in result.scheme.data.items()
+            if label in dataset_labels_to_return
+        },
+    )
+    return result
+
+
+@functools.lru_cache(maxsize=16)
+def _load_model_cached(path: str, modification_time: float) -> Model:
+    return load_model(path)
+
+
+def _restore_scheme_data(result_scheme: Scheme, scheme: Scheme) -> Scheme:
+    return dataclasses.replace(
+        result_scheme,
+        data={
+            label: result_scheme.data.get(label, dataset) for label, dataset in scheme.data.items()
+        },
+    )
 
 
 def optimize_problem(problem: Problem, verbose: bool = True) -> Result:
@@ -32,6 +445,12 @@ def optimize_problem(problem: Problem, verbose: bool = True) -> Result:
             f"Supported methods are '{list(SUPPORTED_METHODS.keys())}'"
         )
 
+    if problem.scheme.jacobian_method not in SUPPORTED_JACOBIAN_METHODS:
+        raise ValueError(
+            f"Unsupported jacobian method {problem.scheme.jacobian_method}. "
+            f"Supported methods are '{SUPPORTED_JACOBIAN_METHODS}'"
+        )
+
     (
         free_parameter_labels,
         initial_parameter,
@@ -39,6 +458,27 @@ def optimize_problem(problem: Problem, verbose: bool = True) -> Result:
         upper_bounds,
     ) = problem.scheme.parameters.get_label_value_and_bounds_arrays(exclude_non_vary=True)
     method = SUPPORTED_METHODS[problem.scheme.optimization_method]
+    # the default step of the finite differences is too small for single precision penalties
+    diff_step = None if problem.dtype == np.float64 else problem.finite_difference_step
+    if problem.scheme.jacobian_sparsity and approx_derivative is None:
+        warn(
+            "The sparse finite difference Jacobian is not supported by this version of scipy, "
+            "using the dense finite difference Jacobian instead."
+        )
+    # The finite differences evaluate the penalty repeatedly, with the non-negative least-squares
+    # method each evaluation is warm started with the clps of the previous one, see
+    # Problem.solve_weighted_matrix_batches.
+    if problem.scheme.jacobian_method == "Kaufman":
+        jac = _calculate_jacobian
+    elif problem.scheme.jacobian_sparsity and approx_derivative is not None:
+        jac = functools.partial(
+            _calculate_sparse_finite_difference_jacobian,
+            bounds=(lower_bounds, upper_bounds),
+            diff_step=diff_step,
+            sparsity_cache={},
+        )
+    else:
+        jac = "2-point"
     nfev = problem.scheme.maximum_number_function_evaluations
     ftol = problem.scheme.ftol
     gtol = problem.scheme.gtol
@@ -47,36 +487,104 @@ def optimize_problem(problem: Problem, verbose: bool = True) -> Result:
     termination_reason = ""
 
     try:
-        ls_result = least_squares(
-            _calculate_penalty,
-            initial_parameter,
-            bounds=(lower_bounds, upper_bounds),
-            method=method,
-            max_nfev=nfev,
-            verbose=verbose,
-            ftol=ftol,
-            gtol=gtol,
-            xtol=xtol,
-            kwargs={"free_parameter_labels": free_parameter_labels, "problem": problem},
-        )
+        with problem.timer.phase("optimize"):
+            ls_result = least_squares(
+                _calculate_penalty,
+                initial_parameter,
+                jac=jac,
+                diff_step=diff_step,
+                bounds=(lower_bounds, upper_bounds),
+                method=method,
+                max_nfev=nfev,
+                verbose=verbose,
+                ftol=ftol,
+                gtol=gtol,
+                xtol=xtol,
+                kwargs={"free_parameter_labels": free_parameter_labels, "problem": problem},
+            )
         termination_reason = ls_result.message
     except Exception as e:
         warn(f"Optimization failed:\n\n{e}")
         termination_reason = str(e)
         ls_result = None
 
-    problem.save_parameters_for_history()
-
     return _create_result(problem, ls_result, free_parameter_labels, termination_reason)
 
 
 def _calculate_penalty(
     parameters: np.ndarray, free_parameter_labels: list[str] = None, problem: Problem = None
 ):
+    with problem.timer.phase("evaluate_penalty"):
+        problem.update_parameters(free_parameter_labels, parameters)
+        penalty = problem.full_penalty
     problem.save_parameters_for_history()
-    problem.parameters.set_from_label_and_value_arrays(free_parameter_labels, parameters)
-    problem.reset()
-    return problem.full_penalty
+    if penalty.dtype != np.float64:
+        return penalty.astype(np.float64)
+    # the optimizer keeps previous penalties, which would be overwritten in the buffer
+    return penalty.copy() if problem.scheme.preallocate_buffers else penalty
+
+
+def _calculate_jacobian(
+    parameters: np.ndarray, free_parameter_labels: list[str] = None, problem: Problem = None
+):
+    # The optimizer may request the jacobian after evaluating rejected trial parameters.
+    _, current_parameters, _, _ = problem.parameters.get_label_value_and_bounds_arrays(
+        exclude_non_vary=True
+    )
+    with problem.timer.phase("evaluate_jacobian"):
+        if not np.allclose(parameters, current_parameters, rtol=1e-12, atol=0):
+            problem.update_parameters(free_parameter_labels, parameters)
+        return problem.calculate_kaufman_jacobian(free_parameter_labels)
+
+
+def _calculate_sparse_finite_difference_jacobian(
+    parameters: np.ndarray,
+    free_parameter_labels: list[str] = None,
+    problem: Problem = None,
+    bounds: tuple[np.ndarray, np.ndarray] = None,
+    diff_step: float | None = None,
+    sparsity_cache: dict = None,
+):
+    """Calculates the Jacobian with forward differences, perturbing all parameters which do not
+    share a row of the sparsity structure at once.
+
+    The sparsity structure is calculated once per size of the penalty and stored in
+    ``sparsity_cache``. See :meth:`glotaran.analysis.problem.Problem.calculate_jacobian_sparsity`.
+    With the non-negative least-squares method, each perturbed penalty is warm started with
+    the clps of the previous evaluation, see
+    :meth:`glotaran.analysis.problem.Problem.solve_weighted_matrix_batches`.
+    """
+    _, current_parameters, _, _ = problem.parameters.get_label_value_and_bounds_arrays(
+        exclude_non_vary=True
+    )
+    with problem.timer.phase("evaluate_jacobian"):
+        if not np.allclose(parameters, current_parameters, rtol=1e-12, atol=0):
+            problem.update_parameters(free_parameter_labels, parameters)
+        penalty = np.array(problem.full_penalty, dtype=np.float64)
+        if penalty.size not in sparsity_cache:
+            sparsity_cache[penalty.size] = _get_jacobian_sparsity(problem, free_parameter_labels)
+        sparsity = sparsity_cache[penalty.size]
+        jacobian = approx_derivative(
+            _calculate_penalty,
+            parameters,
+            method="2-point",
+            rel_step=diff_step,
+            f0=penalty,
+            bounds=bounds,
+            sparsity=sparsity,
+            kwargs={"free_parameter_labels": free_parameter_labels, "problem": problem},
+        )
+        # the problem is reset to the parameters of the Jacobian, it is evaluated lazily
+        problem.update_parameters(free_parameter_labels, parameters)
+    return jacobian.toarray() if sparsity is not None else jacobian
+
+
+def _get_jacobian_sparsity(problem: Problem, free_parameter_labels: list[str]) -> tuple | None:
+    """Gets the sparsity structure and the column groups for the finite differences, or
+    ``None`` if no columns can be grouped."""
+    structure = problem.calculate_jacobian_sparsity(free_parameter_labels)
+    groups = group_columns(structure)
+    return (structure, groups) if groups.max(initial=-1) + 1 < groups.size else None
 
 
 def _create_result(
@@ -93,7 +601,8 @@ def _create_result(
     )
     number_of_jacobian_evaluation = ls_result.njev if success else None
     optimality = ls_result.optimality if success else None
-    number_of_data_points = ls_result.fun.size if success else None
+    # the penalty of compressed data is smaller than the number of data points
+    number_of_data_points = problem.number_of_data_points if success else None
     number_of_variables = ls_result.x.size if success else None
     degrees_of_freedom = number_of_data_points - number_of_variables if success else None
     chi_square = np.sum(ls_result.fun ** 2) if success else None
@@ -101,9 +610,11 @@ def _create_result(
     root_mean_square_error = np.sqrt(reduced_chi_square) if success else None
     jacobian = ls_result.jac if success else None
 
-    problem.save_parameters_for_history()
-    history_index = None if success else -2
-    data = problem.create_result_data(history_index=history_index)
+    # roll back to the last successfully evaluated parameters if the optimization has crashed
+    history_index = None if success or len(problem.parameter_history) == 0 else -1
+    data = problem.create_result_data(
+        history_index=history_index, mode=problem.scheme.result_data_mode
+    )
     # the optimized parameters are those of the last run if the optimization has crashed
     parameters = problem.parameters
     covariance_matrix = None
@@ -138,4 +649,5 @@ def _create_result(
         optimality=optimality,
         reduced_chi_square=reduced_chi_square,
         root_mean_square_error=root_mean_square_error,
+        timings=problem.timings,
     )
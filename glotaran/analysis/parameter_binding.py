@@ -0,0 +1,272 @@
+"""The binding of filled dataset descriptors to a parameter group."""
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+from glotaran.parameter import Parameter
+
+if TYPE_CHECKING:
+    from typing import Any
+    from typing import Iterable
+    from typing import Sized
+
+    from glotaran.model import DatasetDescriptor
+    from glotaran.model import Model
+    from glotaran.parameter import ParameterGroup
+
+
+class ParameterBinding:
+    """Binds the parameters of filled dataset descriptors to the parameters of a group.
+
+    Filling a dataset descriptor copies all model items it references and looks up each
+    parameter by its label. The binding resolves the parameters once, so that the values of
+    the filled dataset descriptors can be updated in place after the values of the parameter
+    group have changed.
+    """
+
+    def __init__(
+        self,
+        parameters: ParameterGroup,
+        filled_dataset_descriptors: dict[str, DatasetDescriptor],
+    ):
+        """Binds the filled dataset descriptors to a parameter group.
+
+        Parameters
+        ----------
+        parameters : ParameterGroup
+            The parameter group the dataset descriptors have been filled from.
+        filled_dataset_descriptors : dict[str, DatasetDescriptor]
+            The filled dataset descriptors.
+        """
+        self._parameters = parameters
+        self._has_expressions = any(p.expression is not None for _, p in parameters.all())
+        self._resolved_labels: list[str] = []
+        self._resolved_parameters: list[Parameter] = []
+
+        sources = {}
+        self._bindings: dict[int, tuple[Parameter, Parameter]] = {}
+        self._matrix_parameters: dict[str, list[tuple[str, Parameter]]] = {}
+        self._dataset_parameter_labels: dict[str, set[str]] = {}
+        for label, descriptor in filled_dataset_descriptors.items():
+            targets = find_parameters(descriptor)
+            self._dataset_parameter_labels[label] = {target.full_label for target in targets}
+            for target in targets:
+                if target.full_label not in sources:
+                    sources[target.full_label] = parameters.get(target.full_label)
+                self._bindings[id(target)] = (target, sources[target.full_label])
+            self._matrix_parameters[label] = [
+                (full_label, sources[full_label])
+                for full_label in dict.fromkeys(
+                    p.full_label for p in find_parameters(descriptor, exclude=["scale"])
+                )
+            ]
+
+    @property
+    def parameters(self) -> ParameterGroup:
+        return self._parameters
+
+    def update(self):
+        """Updates the values of the filled dataset descriptors from the parameter group."""
+        for target, source in self._bindings.values():
+            target.value = source.value
+
+    def set_free_parameter_values(self, labels: list[str], values: np.ndarray):
+        """Sets the values of the free parameters from the optimizer and updates the filled
+        dataset descriptors.
+
+        Parameters
+        ----------
+        labels : list[str]
+            The labels of the free parameters.
+        values : np.ndarray
+            The values in the optimization space, see
+            :meth:`glotaran.parameter.Parameter.set_value_from_optimization`.
+        """
+        for parameter, value in zip(self._resolve_parameters(labels, values), values):
+            parameter.set_value_from_optimization(value)
+        if self._has_expressions:
+            self._parameters.update_parameter_expression()
+        self.update()
+
+    def set_parameter_values(self, labels: list[str], values: np.ndarray):
+        """Sets the values of parameters and updates the filled dataset descriptors.
+
+        Parameters
+        ----------
+        labels : list[str]
+            The labels of the parameters.
+        values : np.ndarray
+            The values.
+        """
+        for parameter, value in zip(self._resolve_parameters(labels, values), values):
+            parameter.value = value
+        if self._has_expressions:
+            self._parameters.update_parameter_expression()
+        self.update()
+
+    def get_parameter_values(self, labels: list[str]) -> np.ndarray:
+        """Gets the values of parameters.
+
+        Parameters
+        ----------
+        labels : list[str]
+            The labels of the parameters.
+
+        Returns
+        -------
+        np.ndarray
+            The values.
+        """
+        return np.fromiter(
+            (p.value for p in self._resolve_parameters(labels, labels)),
+            dtype=np.float64,
+            count=len(labels),
+        )
+
+    def _resolve_parameters(self, labels: list[str], values: Sized) -> list[Parameter]:
+        if len(labels) != len(values):
+            raise ValueError(
+                f"Length of labels({len(labels)}) not equal to length of values({len(values)})."
+            )
+        if labels != self._resolved_labels:
+            self._resolved_labels = list(labels)
+            self._resolved_parameters = [self._parameters.get(label) for label in labels]
+        return self._resolved_parameters
+
+    def get_dataset_parameter_labels(self, label: str) -> set[str]:
+        """Gets the labels of the parameters a dataset depends on.
+
+        These are the parameters referenced by the dataset descriptor and the model items it
+        references, including the parameters used in their expressions.
+
+        Parameters
+        ----------
+        label : str
+            The label of the dataset.
+
+        Returns
+        -------
+        set[str]
+            The full labels of the parameters.
+        """
+        return find_expression_dependencies(
+            self._parameters, self._dataset_parameter_labels[label]
+        )
+
+    def get_matrix_parameter_values(self, label: str) -> tuple:
+        """Gets the values of the parameters which are read for the matrix of a dataset.
+
+        These are the parameters of the filled dataset descriptor and all model items it
+        references. The scale of the dataset is excluded, since it is applied to the matrix
+        after its calculation. The values are the key of the matrix in the matrix cache.
+
+        Parameters
+        ----------
+        label : str
+            The label of the dataset.
+
+        Returns
+        -------
+        tuple
+            A hashable tuple of parameter labels and values.
+        """
+        return tuple(
+            (full_label, source.value) for full_label, source in self._matrix_parameters[label]
+        )
+
+
+def find_parameters(item: Any, exclude: list[str] | None = None) -> list[Parameter]:
+    """Finds the parameters of a filled model item and all model items it references.
+
+    Parameters
+    ----------
+    item : Any
+        The filled model item.
+    exclude : list[str] | None
+        Names of properties of the item itself to skip.
+
+    Returns
+    -------
+    list[Parameter]
+        The parameters in the order they are found, including duplicate labels.
+    """
+    parameters = []
+    visited = {id(item)}
+    for name in item._glotaran_properties:
+        if exclude is None or name not in exclude:
+            _collect_parameters(getattr(item, name), parameters, visited)
+    return parameters
+
+
+def find_unlabeled_model_item_parameters(
+    model: Model, parameters: ParameterGroup
+) -> list[Parameter]:
+    """Finds the parameters of the model items which are not referenced by label.
+
+    Model items without label, e.g. relations, constraints or penalties, are applied by the
+    model functions to every dataset, rather than being referenced by a dataset descriptor.
+
+    Parameters
+    ----------
+    model : Model
+        The model.
+    parameters : ParameterGroup
+        The parameters to fill the model items from.
+
+    Returns
+    -------
+    list[Parameter]
+        The parameters in the order they are found.
+    """
+    found = []
+    for name in model._glotaran_model_attributes:
+        items = getattr(model, name)
+        if isinstance(items, list):
+            for item in items:
+                found += find_parameters(item.fill(model, parameters))
+    return found
+
+
+def find_expression_dependencies(parameters: ParameterGroup, labels: Iterable[str]) -> set[str]:
+    """Adds the parameters used in the expressions of parameters, recursively.
+
+    Parameters
+    ----------
+    parameters : ParameterGroup
+        The parameter group.
+    labels : Iterable[str]
+        The full labels of the parameters.
+
+    Returns
+    -------
+    set[str]
+        The labels and the labels of all parameters their values depend on.
+    """
+    dependencies = set()
+    pending = list(labels)
+    while pending:
+        label = pending.pop()
+        if label in dependencies:
+            continue
+        dependencies.add(label)
+        expression = parameters.get(label).expression
+        if expression is not None:
+            pending += [match[1:] for match in Parameter._find_parameter.findall(expression)]
+    return dependencies
+
+
+def _collect_parameters(value: Any, parameters: list[Parameter], visited: set[int]):
+    if isinstance(value, Parameter):
+        parameters.append(value)
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            _collect_parameters(item, parameters, visited)
+    elif isinstance(value, dict):
+        for item in value.values():
+            _collect_parameters(item, parameters, visited)
+    elif hasattr(value, "_glotaran_properties") and id(value) not in visited:
+        visited.add(id(value))
+        for name in value._glotaran_properties:
+            _collect_parameters(getattr(value, name), parameters, visited)
@@ -0,0 +1,189 @@
+"""A bounded history of the parameters of an optimization."""
+from __future__ import annotations
+
+import os
+import tempfile
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from typing import IO
+    from typing import Union
+
+    PathLike = Union[str, os.PathLike]
+
+
+class ParameterHistory:
+    """A history of the free parameter values and the cost of each evaluation.
+
+    The records are stored in a preallocated ring buffer, which retains the most recent
+    records. Records which don't fit into the ring buffer get spilled to a file, so that all
+    records stay accessible. By default this is an anonymous temporary file, which is only
+    created once the ring buffer overflows and is deleted when the history is closed. A given
+    spill file gets all records and holds one row of ``float64`` values per record, the cost
+    followed by the parameter values, which can be read with ``numpy.fromfile``.
+    """
+
+    def __init__(self, labels: list[str], size: int, spill_file: PathLike | None = None):
+        """Initializes an empty history.
+
+        Parameters
+        ----------
+        labels : list[str]
+            The labels of the recorded parameters.
+        size : int
+            The number of records retained in memory.
+        spill_file : PathLike | None
+            A file to write all records to. An existing file gets overwritten. Defaults to a
+            temporary file.
+
+        Raises
+        ------
+        ValueError
+            If the size is smaller than one.
+        """
+        if size < 1:
+            raise ValueError(f"The size of the parameter history must be positive, got {size}.")
+        self._labels = list(labels)
+        self._values = np.empty((size, len(labels)), dtype=np.float64)
+        self._costs = np.empty(size, dtype=np.float64)
+        self._number_of_records = 0
+        self._number_of_spilled_records = 0
+        self._first_spilled_record = 0
+        self._spill_file = spill_file
+        self._spill: IO[bytes] | None = None
+
+    @property
+    def labels(self) -> list[str]:
+        return self._labels
+
+    @property
+    def size(self) -> int:
+        return self._costs.size
+
+    @property
+    def spill_file(self) -> PathLike | None:
+        return self._spill_file
+
+    @property
+    def number_of_retained_records(self) -> int:
+        return min(self._number_of_records, self.size)
+
+    @property
+    def values(self) -> np.ndarray:
+        """The parameter values of the retained records, oldest first."""
+        return self._values[self._retained_slots()]
+
+    @property
+    def costs(self) -> np.ndarray:
+        """The costs of the retained records, oldest first."""
+        return self._costs[self._retained_slots()]
+
+    def __len__(self) -> int:
+        return self._number_of_records
+
+    def __getitem__(self, index: int) -> tuple[np.ndarray, float]:
+        """Gets the parameter values and the cost of a record.
+
+        Parameters
+        ----------
+        index : int
+            The index of the record, counting from the first record. Negative indices count
+            from the last record.
+
+        Returns
+        -------
+        tuple[np.ndarray, float]
+            The parameter values and the cost.
+
+        Raises
+        ------
+        IndexError
+            If the index is out of range or the record has been spilled to a temporary file,
+            which has been closed.
+        """
+        if index < 0:
+            index += self._number_of_records
+        if not 0 <= index < self._number_of_records:
+            raise IndexError(f"Parameter history index {index} out of range.")
+
+        if index >= self._number_of_records - self.size:
+            slot = index % self.size
+            return self._values[slot].copy(), float(self._costs[slot])
+
+        if index < self._first_spilled_record:
+            raise IndexError(
+                f"Parameter history record {index} has been spilled to a closed temporary file."
+            )
+        self._spill_records()
+        if self._spill is None:
+            self._open_spill()
+        record_size = (len(self._labels) + 1) * np.dtype(np.float64).itemsize
+        self._spill.seek((index - self._first_spilled_record) * record_size)
+        record = np.fromfile(self._spill, dtype=np.float64, count=len(self._labels) + 1)
+        return record[1:], float(record[0])
+
+    def append(self, values: np.ndarray, cost: float):
+        """Appends a record, replacing the oldest retained record if the history is full.
+
+        Parameters
+        ----------
+        values : np.ndarray
+            The parameter values.
+        cost : float
+            The cost.
+        """
+        if self._number_of_records - self._number_of_spilled_records == self.size:
+            self._spill_records()
+        slot = self._number_of_records % self.size
+        self._values[slot] = values
+        self._costs[slot] = cost
+        self._number_of_records += 1
+
+    def flush(self):
+        """Writes the records which have not been spilled yet to the spill file, if one is
+        given."""
+        if self._spill_file is not None:
+            self._spill_records()
+
+    def close(self):
+        """Flushes and closes the spill file.
+
+        The spill file is opened again if more records get spilled. Records in a temporary
+        spill file can't be read after closing it.
+        """
+        if self._spill_file is not None:
+            self.flush()
+        if self._spill is not None:
+            self._spill.close()
+            self._spill = None
+            if self._spill_file is None:
+                self._first_spilled_record = self._number_of_spilled_records
+
+    def _spill_records(self):
+        if self._number_of_spilled_records == self._number_of_records:
+            return
+        if self._spill is None:
+            self._open_spill()
+        slots = np.arange(self._number_of_spilled_records, self._number_of_records) % self.size
+        self._spill.seek(0, os.SEEK_END)
+        np.column_stack([self._costs[slots], self._values[slots]]).tofile(self._spill)
+        self._spill.flush()
+        self._number_of_spilled_records = self._number_of_records
+
+    def _open_spill(self):
+        if self._spill_file is None:
+            self._spill = tempfile.TemporaryFile()
+        else:
+            # the file gets overwritten by the first spill and appended to after closing
+            mode = "a+b" if self._number_of_spilled_records > 0 else "w+b"
+            self._spill = open(self._spill_file, mode)
+
+    def _retained_slots(self) -> np.ndarray:
+        return (
+            np.arange(
+                self._number_of_records - self.number_of_retained_records, self._number_of_records
+            )
+            % self.size
+        )
@@ -0,0 +1,75 @@
+"""Low overhead instrumentation of the phases of an optimization."""
+from __future__ import annotations
+
+import threading
+from contextlib import contextmanager
+from time import perf_counter
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from typing import Iterator
+
+
+class PhaseTimer:
+    """Records the accumulated wall time and the number of calls of named phases.
+
+    Phases can be nested, the time of a phase includes the time of the phases it contains.
+    Phases can be recorded from multiple threads.
+    """
+
+    def __init__(self):
+        """Initializes a timer without any recorded phase."""
+        self._times: dict[str, float] = {}
+        self._calls: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Records a call of a phase, which lasts until the context is left.
+
+        Parameters
+        ----------
+        name : str
+            The name of the phase.
+        """
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, perf_counter() - start)
+
+    def add(self, name: str, time: float, calls: int = 1):
+        """Adds time and calls to a phase.
+
+        Parameters
+        ----------
+        name : str
+            The name of the phase.
+        time : float
+            The wall time in seconds.
+        calls : int
+            The number of calls.
+        """
+        with self._lock:
+            self._times[name] = self._times.get(name, 0.0) + time
+            self._calls[name] = self._calls.get(name, 0) + calls
+
+    def time(self, name: str) -> float:
+        """The accumulated wall time of a phase in seconds."""
+        return self._times.get(name, 0.0)
+
+    def calls(self, name: str) -> int:
+        """The number of calls of a phase."""
+        return self._calls.get(name, 0)
+
+    def as_dict(self) -> dict[str, dict[str, float]]:
+        """The recorded phases as plain dictionary.
+
+        Returns
+        -------
+        dict[str, dict[str, float]]
+            The ``'time'`` in seconds and the number of ``'calls'`` for each phase.
+        """
+        return {
+            name: {"time": self._times[name], "calls": self._calls[name]} for name in self._times
+        }
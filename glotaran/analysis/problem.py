@@ -1,17 +1,37 @@
 from __future__ import annotations
 
+import contextlib
+import functools
+import os
+import threading
 import warnings
+from collections.abc import Sequence
 from typing import TYPE_CHECKING
-from typing import Deque
 from typing import Dict
 from typing import NamedTuple
 from typing import TypeVar
 
 import numpy as np
 import xarray as xr
+from scipy import sparse
 
+from glotaran.analysis.matrix_cache import MatrixCache
 from glotaran.analysis.nnls import residual_nnls
+from glotaran.analysis.parameter_binding import ParameterBinding
+from glotaran.analysis.parameter_binding import find_expression_dependencies
+from glotaran.analysis.parameter_binding import find_unlabeled_model_item_parameters
+from glotaran.analysis.parameter_history import ParameterHistory
+from glotaran.analysis.phase_timer import PhaseTimer
+from glotaran.analysis.result_data import LazyResultData
+from glotaran.analysis.result_data import add_lazy_svd_to_dataset
+from glotaran.analysis.util import THREADSAFE_NUMBA_THREADING_LAYERS
+from glotaran.analysis.util import LabelAndMatrix
+from glotaran.analysis.util import calculate_matrix
+from glotaran.analysis.util import create_executor
 from glotaran.analysis.util import get_min_max_from_interval
+from glotaran.analysis.util import numba_threading_layer
+from glotaran.analysis.util import parallel_map
+from glotaran.analysis.util import validate_executor
 from glotaran.analysis.variable_projection import residual_variable_projection
 from glotaran.io.prepare_dataset import add_svd_to_dataset
 from glotaran.model import DatasetDescriptor
@@ -20,7 +40,10 @@ from glotaran.parameter import ParameterGroup
 from glotaran.project import Scheme
 
 if TYPE_CHECKING:
+    from typing import Any
+    from typing import Callable
     from typing import Hashable
+    from typing import Iterable
 
 
 class ParameterError(ValueError):
@@ -42,6 +65,16 @@ class GroupedProblemDescriptor(NamedTuple):
     axis: dict[str, np.ndarray]
 
 
+class WeightedMatrixBatch(NamedTuple):
+    indices: list[int]
+    """The indices of the weighted residuals sharing the matrix.
+
+    The indices refer to the weighted residuals in the order they appear in the full penalty.
+    """
+    matrix: np.ndarray
+    """The weighted and scaled reduced matrix."""
+
+
 class ProblemGroup(NamedTuple):
     data: np.ndarray
     weight: np.ndarray
@@ -54,11 +87,137 @@ class ProblemGroup(NamedTuple):
     descriptor: list[GroupedProblemDescriptor]
 
 
+class GroupedDatasetIndex(NamedTuple):
+    groups: np.ndarray
+    """The index of the problem group for each index on the global axis of the dataset."""
+    offsets: np.ndarray
+    """The offset of the dataset data in the data of the problem group for each global index."""
+
+
+class GroupedBag(Sequence):
+    """A bag of problem groups which is backed by contiguous data and weight buffers.
+
+    The data of all problem groups is stored back to back in a single buffer. The data and
+    weight of each :class:`ProblemGroup` in the bag is a view into these buffers.
+    """
+
+    def __init__(
+        self,
+        data: np.ndarray,
+        weight: np.ndarray,
+        offsets: np.ndarray,
+        groups: list[str],
+        data_sizes: list[list[int]],
+        has_scaling: list[bool],
+        descriptors: list[list[GroupedProblemDescriptor]],
+        dataset_indices: dict[str, GroupedDatasetIndex],
+    ):
+        """Initializes the bag from the buffers and the group tables.
+
+        Parameters
+        ----------
+        data : np.ndarray
+            The concatenated data of all problem groups.
+        weight : np.ndarray
+            The concatenated weight of all problem groups.
+        offsets : np.ndarray
+            The start of the data of each problem group in the buffers, followed by the
+            size of the buffers.
+        groups : list[str]
+            The group label of each problem group.
+        data_sizes : list[list[int]]
+            The sizes of the dataset data in each problem group.
+        has_scaling : list[bool]
+            Whether a dataset in the problem group needs scaling.
+        descriptors : list[list[GroupedProblemDescriptor]]
+            The descriptors of the datasets in each problem group.
+        dataset_indices : dict[str, GroupedDatasetIndex]
+            The location of the data of each dataset in the problem groups.
+        """
+        self.data = data
+        self.weight = weight
+        self.offsets = offsets
+        self.dataset_indices = dataset_indices
+        self._problems = [
+            ProblemGroup(
+                data=data[start:end],
+                weight=weight[start:end],
+                has_scaling=group_has_scaling,
+                group=group,
+                data_sizes=group_data_sizes,
+                descriptor=group_descriptors,
+            )
+            for start, end, group, group_data_sizes, group_has_scaling, group_descriptors in zip(
+                offsets[:-1], offsets[1:], groups, data_sizes, has_scaling, descriptors
+            )
+        ]
+
+    def __getitem__(self, index):
+        return self._problems[index]
+
+    def __len__(self) -> int:
+        return len(self._problems)
+
+    def stack_indices(self, indices: np.ndarray) -> np.ndarray:
+        """Gets the buffer indices of problem groups with equal size as columns of a 2D array.
+
+        Parameters
+        ----------
+        indices : np.ndarray
+            The indices of the problem groups.
+
+        Returns
+        -------
+        np.ndarray
+            The indices into the buffers.
+        """
+        starts = self.offsets[indices]
+        size = self.offsets[indices[0] + 1] - starts[0]
+        return np.arange(size)[:, np.newaxis] + starts[np.newaxis, :]
+
+    def stack_data(self, indices: np.ndarray) -> np.ndarray:
+        """Stacks the data of problem groups with equal size as columns of a 2D array.
+
+        Parameters
+        ----------
+        indices : np.ndarray
+            The indices of the problem groups.
+
+        Returns
+        -------
+        np.ndarray
+            The stacked data.
+        """
+        return self.data[self.stack_indices(indices)]
+
+
 UngroupedBag = Dict[str, UngroupedProblemDescriptor]
-GroupedBag = Deque[ProblemGroup]
 
 XrDataContainer = TypeVar("XrDataContainer", xr.DataArray, xr.Dataset)
 
+_EVALUATION_STATE = (
+    "_clp_labels",
+    "_matrices",
+    "_reduced_clp_labels",
+    "_reduced_matrices",
+    "_reduced_clps",
+    "_clps",
+    "_weighted_residuals",
+    "_residuals",
+    "_additional_penalty",
+    "_full_penalty",
+    "_penalty",
+    "_weighted_matrix_batches",
+    "_batch_clps",
+)
+"""The attributes which hold the state of an evaluation of the problem."""
+
+_MATRIX_STATE = ("_clp_labels", "_matrices", "_reduced_clp_labels", "_reduced_matrices")
+"""The attributes which hold the matrices of an evaluation of the problem."""
+
+SUPPORTED_PRECISIONS = ["float64", "float32"]
+SUPPORTED_RESULT_DATA_MODES = ["eager", "lazy", "parallel"]
+
 
 class Problem:
     """A Problem class"""
@@ -73,6 +232,18 @@ class Problem:
 
         self._scheme = scheme
 
+        if scheme.precision not in SUPPORTED_PRECISIONS:
+            raise ValueError(
+                f"Unsupported precision '{scheme.precision}'. "
+                f"Supported precisions are '{SUPPORTED_PRECISIONS}'"
+            )
+        self._dtype = np.dtype(scheme.precision)
+        if scheme.result_data_mode not in SUPPORTED_RESULT_DATA_MODES:
+            raise ValueError(
+                f"Unsupported result data mode '{scheme.result_data_mode}'. "
+                f"Supported result data modes are '{SUPPORTED_RESULT_DATA_MODES}'"
+            )
+
         self._model = scheme.model
 
         self._grouped = scheme.model.grouped()
@@ -87,8 +258,29 @@ class Problem:
 
         self._overwrite_index_dependent = hasattr(scheme.model, "overwrite_index_dependent")
         self._parameters = scheme.parameters.copy()
-        self._parameter_history = []
+        free_parameter_labels, _, _, _ = self._parameters.get_label_value_and_bounds_arrays(
+            exclude_non_vary=True
+        )
+        self._parameter_history = ParameterHistory(
+            free_parameter_labels, scheme.parameter_history_size, scheme.parameter_history_file
+        )
+        validate_executor(scheme.executor)
+        self._number_of_workers = scheme.number_of_workers or os.cpu_count()
+        # the executor is created on the first use
+        self._executor = None
+        self._serial_map = threading.local()
+        self._timer = PhaseTimer()
+        self._preallocate_buffers = scheme.preallocate_buffers
+        self._buffers: dict[Hashable, np.ndarray] = {}
+        self._additional_penalty_size = 0
+        # the clps of the last evaluation, used as warm start of the nnls method
+        self._previous_batch_clps = None
         self._prepare_data(scheme.data)
+        self._matrix_cache = MatrixCache(
+            scheme.matrix_cache_size
+            if scheme.matrix_cache_size is not None
+            else 2 * self.number_of_matrices
+        )
 
         # all of the above are always not None
 
@@ -103,6 +295,9 @@ class Problem:
         self._additional_penalty = None
         self._full_axis = None
         self._full_penalty = None
+        self._penalty = None
+        self._weighted_matrix_batches = None
+        self._batch_clps = None
 
     @property
     def scheme(self) -> Scheme:
@@ -143,7 +338,7 @@ class Problem:
         self.reset()
 
     @property
-    def parameter_history(self) -> list[ParameterGroup]:
+    def parameter_history(self) -> ParameterHistory:
         return self._parameter_history
 
     @property
@@ -154,6 +349,54 @@ class Problem:
     def filled_dataset_descriptors(self) -> dict[str, DatasetDescriptor]:
         return self._filled_dataset_descriptors
 
+    @property
+    def matrix_cache(self) -> MatrixCache:
+        return self._matrix_cache
+
+    @property
+    def dtype(self) -> np.dtype:
+        """The floating point type of the data, matrices and residuals."""
+        return self._dtype
+
+    @property
+    def finite_difference_step(self) -> float:
+        """The relative step for finite differences, the square root of the machine epsilon of
+        the dtype."""
+        return float(np.sqrt(np.finfo(self._dtype).eps))
+
+    @property
+    def timer(self) -> PhaseTimer:
+        return self._timer
+
+    @property
+    def timings(self) -> dict[str, dict[str, float]]:
+        """The wall times and calls of the phases recorded by the timer and the hits and misses
+        of the matrix cache."""
+        timings = self._timer.as_dict()
+        timings["matrix_cache"] = {
+            "hits": self._matrix_cache.hits,
+            "misses": self._matrix_cache.misses,
+        }
+        return timings
+
+    @property
+    def number_of_data_points(self) -> int:
+        """The number of data points of all datasets and the additional penalty."""
+        return (
+            sum(dataset.data.size for dataset in self._data.values())
+            + self._additional_penalty_size
+        )
+
+    @property
+    def number_of_matrices(self) -> int:
+        """The number of dataset matrices calculated in one evaluation."""
+        return sum(
+            self._data[label].coords[dataset_model.get_global_dimension()].size
+            if dataset_model.index_dependent()
+            else 1
+            for label, dataset_model in self._filled_dataset_descriptors.items()
+        )
+
     @property
     def bag(self) -> UngroupedBag | GroupedBag:
         if not self._bag:
@@ -240,28 +483,188 @@ class Problem:
 
     @property
     def full_penalty(self) -> np.ndarray:
+        """The weighted residuals followed by the additional penalty.
+
+        The weighted residuals are calculated directly into the full penalty, so only the
+        additional penalty needs to be written.
+        """
         if self._full_penalty is None:
-            residuals = self.weighted_residuals
+            if self._penalty is None:
+                self.calculate_residual()
+            penalty = self._penalty
+            residual_size = penalty.size - self._additional_penalty_size
             additional_penalty = self.additional_penalty
-            if not self.grouped:
-                residuals = [np.concatenate(residuals[label]) for label in residuals.keys()]
-
-            self._full_penalty = (
-                np.concatenate((np.concatenate(residuals), additional_penalty))
-                if additional_penalty is not None
-                else np.concatenate(residuals)
-            )
+            additional_penalty_size = 0 if additional_penalty is None else additional_penalty.size
+
+            if additional_penalty_size != self._additional_penalty_size:
+                self._additional_penalty_size = additional_penalty_size
+                penalty = self._get_buffer("penalty", (residual_size + additional_penalty_size,))
+                penalty[:residual_size] = self._penalty[:residual_size]
+            if additional_penalty is not None:
+                penalty[residual_size:] = additional_penalty
+            self._full_penalty = penalty
         return self._full_penalty
 
+    def _get_penalty_buffer(self, residual_size: int) -> np.ndarray:
+        """Gets the array the weighted residuals of an evaluation are calculated into.
+
+        The array has room for the additional penalty of the previous evaluation.
+        """
+        self._penalty = self._get_buffer(
+            "penalty", (residual_size + self._additional_penalty_size,)
+        )
+        return self._penalty
+
+    def _get_buffer(self, key: Hashable, shape: tuple[int, ...]) -> np.ndarray:
+        """Gets an uninitialized Fortran ordered work array of the dtype of the problem.
+
+        If `Scheme.preallocate_buffers` is set, the array is allocated once per key and reused
+        in later evaluations, otherwise a new array is allocated.
+
+        Parameters
+        ----------
+        key : Hashable
+            The key of the buffer.
+        shape : tuple[int, ...]
+            The shape of the array.
+
+        Returns
+        -------
+        np.ndarray
+            The array.
+        """
+        if not self._preallocate_buffers:
+            return np.empty(shape, dtype=self._dtype, order="F")
+        buffer = self._buffers.get(key)
+        if buffer is None or buffer.shape != shape:
+            buffer = np.empty(shape, dtype=self._dtype, order="F")
+            self._buffers[key] = buffer
+        return buffer
+
+    @property
+    def flat_weighted_residuals(self) -> list[np.ndarray]:
+        """The weighted residuals in the order they appear in the full penalty."""
+        residuals = self.weighted_residuals
+        if not self.grouped:
+            residuals = [
+                residual for label in residuals.keys() for residual in residuals[label]
+            ]
+        return residuals
+
+    @property
+    def weighted_matrix_batches(self) -> list[WeightedMatrixBatch]:
+        if self._weighted_matrix_batches is None:
+            self.calculate_residual()
+        return self._weighted_matrix_batches
+
     @property
     def cost(self) -> float:
-        return np.sum(self._full_penalty)
+        return np.sum(self.full_penalty)
+
+    def parallel_map(self, function: Callable[..., Any], *iterables: Iterable) -> list[Any]:
+        """Maps a function over iterables with the executor of the scheme.
+
+        The executor is created on the first call. Within :meth:`_map_serially` the function is
+        mapped serially in the calling thread. See :func:`glotaran.analysis.util.parallel_map`.
+        """
+        if getattr(self._serial_map, "active", False):
+            return parallel_map(None, 1, function, *iterables)
+        if self._executor is None and self._scheme.executor != "serial":
+            self._executor = create_executor(self._scheme.executor, self._number_of_workers)
+        return parallel_map(self._executor, self._number_of_workers, function, *iterables)
+
+    @contextlib.contextmanager
+    def _map_serially(self):
+        """Makes :meth:`parallel_map` map serially in the current thread, without creating an
+        executor."""
+        self._serial_map.active = True
+        try:
+            yield
+        finally:
+            self._serial_map.active = False
+
+    def close(self):
+        """Shuts down the executor of the problem and closes the parameter history.
+
+        A new executor is created if the problem is evaluated again.
+        """
+        self._shutdown_executor()
+        parameter_history = getattr(self, "_parameter_history", None)
+        if parameter_history is not None:
+            parameter_history.close()
+
+    def _shutdown_executor(self):
+        executor = getattr(self, "_executor", None)
+        if executor is not None:
+            executor.shutdown()
+            self._executor = None
+
+    def __enter__(self) -> Problem:
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __del__(self):
+        self._shutdown_executor()
 
     def save_parameters_for_history(self):
-        self._parameter_history.append(self._parameters)
+        """Records the values of the free parameters and the cost of the current evaluation.
+
+        The cost is ``nan`` if the full penalty has not been calculated yet.
+        """
+        if self._full_penalty is not None:
+            penalty = self._full_penalty.astype(np.float64, copy=False)
+            cost = 0.5 * np.dot(penalty, penalty)
+        else:
+            cost = np.nan
+        self._parameter_history.append(
+            self._parameter_binding.get_parameter_values(self._parameter_history.labels), cost
+        )
+
+    def restore_parameters_from_history(self, index: int):
+        """Sets the free parameters to the values of a record in the parameter history and
+        resets the problem.
+
+        Parameters
+        ----------
+        index : int
+            The index of the record, see :class:`ParameterHistory`.
+        """
+        values, _ = self._parameter_history[index]
+        if self._parameter_binding.parameters is not self._parameters:
+            self._fill_dataset_descriptors()
+        self._parameter_binding.set_parameter_values(self._parameter_history.labels, values)
+        self._reset_results()
 
     def reset(self):
-        """Resets all results and `DatasetDescriptors`. Use after updating parameters."""
+        """Resets all results and `DatasetDescriptors`. Use after updating parameters.
+
+        The values of the filled `DatasetDescriptors` get updated in place. They only get
+        filled again if the parameter group has been replaced.
+        """
+        if self._parameter_binding.parameters is self._parameters:
+            self._parameter_binding.update()
+        else:
+            self._fill_dataset_descriptors()
+        self._reset_results()
+
+    def update_parameters(self, labels: list[str], values: np.ndarray):
+        """Sets the values of the free parameters from the optimizer and resets the problem.
+
+        Parameters
+        ----------
+        labels : list[str]
+            The labels of the free parameters.
+        values : np.ndarray
+            The values in the optimization space.
+        """
+        if self._parameter_binding.parameters is not self._parameters:
+            self._fill_dataset_descriptors()
+        self._parameter_binding.set_free_parameter_values(labels, values)
+        self._reset_results()
+
+    def _fill_dataset_descriptors(self):
         self._filled_dataset_descriptors = {
             label: dataset_model.fill(self._model, self._parameters).set_data(self.data[label])
             for label, dataset_model in self._model.dataset.items()
@@ -269,7 +672,9 @@ class Problem:
         if self._overwrite_index_dependent:
             for d in self._filled_dataset_descriptors.values():
                 d.overwrite_index_dependent(self.model.overwrite_index_dependent())
-        self._reset_results()
+        self._parameter_binding = ParameterBinding(
+            self._parameters, self._filled_dataset_descriptors
+        )
 
     def _reset_results(self):
         self._clp_labels = None
@@ -282,6 +687,9 @@ class Problem:
         self._residuals = None
         self._additional_penalty = None
         self._full_penalty = None
+        self._penalty = None
+        self._weighted_matrix_batches = None
+        self._batch_clps = None
 
     def _prepare_data(self, data: dict[str, xr.DataArray | xr.Dataset]):
         self._data = {}
@@ -302,12 +710,24 @@ class Problem:
             dataset = self._transpose_dataset(
                 dataset, ordered_dims=[model_dimension, global_dimension]
             )
+            if dataset.data.dtype != self._dtype:
+                dataset["data"] = dataset.data.astype(self._dtype)
+            # chunked data is computed once instead of on every evaluation
+            if dataset.data.chunks is not None:
+                dataset["data"] = dataset.data.compute()
 
             if self.scheme.add_svd:
                 add_svd_to_dataset(dataset, lsv_dim=model_dimension, rsv_dim=global_dimension)
 
             self._add_weight(label, dataset)
+            if "weight" in dataset and dataset.weight.dtype != self._dtype:
+                dataset["weight"] = dataset.weight.astype(self._dtype)
+            if "weight" in dataset and dataset.weight.chunks is not None:
+                dataset["weight"] = dataset.weight.compute()
             self._data[label] = dataset
+        self._parameter_binding = ParameterBinding(
+            self._parameters, self._filled_dataset_descriptors
+        )
 
     def _transpose_dataset(
         self, datacontainer: XrDataContainer, ordered_dims: list[Hashable]
@@ -372,38 +792,437 @@ class Problem:
     def calculate_residual(self):
         raise NotImplementedError
 
+    def _retrieve_clps(self, batch_clps: list[np.ndarray]):
+        """Calculates the reduced and the full clps from the clps of the weighted matrix
+        batches."""
+        raise NotImplementedError
+
+    def solve_weighted_matrix_batches(
+        self, matrices: list[np.ndarray], data: list[np.ndarray]
+    ) -> list[tuple[np.ndarray, np.ndarray]]:
+        """Calculates the clps and weighted residuals of weighted matrix batches.
+
+        With the non-negative least-squares method, the clps of the previous evaluation are
+        used as warm start for the batches which have the same shape. The solution does not
+        depend on the warm start in exact arithmetic, but its rounding does, so evaluating the
+        same parameters after different evaluations can give penalties which differ by
+        rounding errors.
+
+        Parameters
+        ----------
+        matrices : list[np.ndarray]
+            The weighted matrices of the batches.
+        data : list[np.ndarray]
+            The weighted data of the batches, one column per index.
+
+        Returns
+        -------
+        list[tuple[np.ndarray, np.ndarray]]
+            The clps and weighted residuals of each batch.
+        """
+        with self._timer.phase("solve"):
+            if not self.scheme.non_negative_least_squares:
+                return self.parallel_map(self._residual_function, matrices, data)
+
+            initial_clps = [None] * len(matrices)
+            if self._previous_batch_clps is not None and len(self._previous_batch_clps) == len(
+                matrices
+            ):
+                initial_clps = [
+                    clps if clps.shape == (matrix.shape[1], batch_data.shape[1]) else None
+                    for clps, matrix, batch_data in zip(self._previous_batch_clps, matrices, data)
+                ]
+            results = self.parallel_map(self._residual_function, matrices, data, initial_clps)
+            self._previous_batch_clps = [clps for clps, _ in results]
+            return results
+
+    def calculate_dataset_matrices(
+        self, label: str, indices: list[dict[str, int]], axis: dict[str, np.ndarray]
+    ) -> list[LabelAndMatrix]:
+        """Calculates the matrices of a dataset, reusing matrices from the matrix cache.
+
+        Only the matrices which are not cached for the current values of the parameters the
+        dataset reads are calculated.
+
+        Parameters
+        ----------
+        label : str
+            The label of the dataset.
+        indices : list[dict[str, int]]
+            The indices to calculate the matrices for.
+        axis : dict[str, np.ndarray]
+            The axes of the dataset.
+
+        Returns
+        -------
+        list[LabelAndMatrix]
+            The clp labels and matrices for the indices.
+        """
+        dataset_model = self._filled_dataset_descriptors[label]
+        parameter_values = self._parameter_binding.get_matrix_parameter_values(label)
+        keys = [(label, tuple(index.items()), parameter_values) for index in indices]
+        results = [self._matrix_cache.get(key) for key in keys]
+        missing = [i for i, result in enumerate(results) if result is None]
+
+        with self._timer.phase("calculate_matrix"):
+            calculated = self.parallel_map(
+                functools.partial(calculate_matrix, self._model, dataset_model, axis=axis),
+                [indices[i] for i in missing],
+            )
+        for i, result in zip(missing, calculated):
+            result = LabelAndMatrix(
+                result.clp_label, result.matrix.astype(self._dtype, copy=False)
+            )
+            self._matrix_cache.put(keys[i], result)
+            results[i] = result
+        return results
+
+    def calculate_jacobian_sparsity(self, free_parameter_labels: list[str]) -> sparse.csr_matrix:
+        """Calculates the sparsity structure of the Jacobian of the full penalty.
+
+        The residuals of a dataset only depend on the parameters referenced by its dataset
+        descriptor, while the residuals of a group depend on the parameters of all datasets in
+        the group. The parameters of model items without label, e.g. relations or constraints,
+        are applied to all datasets and the additional penalty depends on all parameters.
+
+        Parameters
+        ----------
+        free_parameter_labels : list[str]
+            The labels of the free parameters in the order of the columns of the Jacobian.
+
+        Returns
+        -------
+        sparse.csr_matrix
+            A boolean matrix with the shape of the Jacobian, which is ``True`` where the
+            Jacobian can be non-zero.
+        """
+        columns = {label: i for i, label in enumerate(free_parameter_labels)}
+        model_parameter_labels = find_expression_dependencies(
+            self._parameters,
+            {
+                parameter.full_label
+                for parameter in find_unlabeled_model_item_parameters(
+                    self._model, self._parameters
+                )
+            },
+        )
+        dataset_columns = {
+            label: {
+                columns[parameter_label]
+                for parameter_label in self._parameter_binding.get_dataset_parameter_labels(label)
+                | model_parameter_labels
+                if parameter_label in columns
+            }
+            for label in self._filled_dataset_descriptors
+        }
+
+        self.full_penalty
+        block_columns = [
+            (size, sorted(set().union(*(dataset_columns[label] for label in labels))))
+            for size, labels in self._residual_blocks()
+        ]
+        block_columns.append((self._additional_penalty_size, list(range(len(columns)))))
+
+        row_columns = [
+            np.tile(np.asarray(block, dtype=np.int64), size) for size, block in block_columns
+        ]
+        row_lengths = np.repeat(
+            [len(block) for _, block in block_columns], [size for size, _ in block_columns]
+        )
+        indices = np.concatenate(row_columns) if row_columns else np.zeros(0, dtype=np.int64)
+        return sparse.csr_matrix(
+            (
+                np.ones(indices.size, dtype=bool),
+                indices,
+                np.concatenate([[0], np.cumsum(row_lengths)]),
+            ),
+            shape=(row_lengths.size, len(columns)),
+        )
+
+    def _residual_blocks(self) -> list[tuple[int, list[str]]]:
+        """The number of weighted residuals and the dataset labels they depend on for each
+        consecutive block of the full penalty, without the additional penalty."""
+        raise NotImplementedError
+
+    def calculate_kaufman_jacobian(self, free_parameter_labels: list[str]) -> np.ndarray:
+        """Calculates the Jacobian of the full penalty with the Kaufman approximation.
+
+        With the conditionally linear parameters :math:`c` projected out, the derivative of a
+        weighted residual with respect to a free parameter :math:`\\theta_k` is approximated by
+        :math:`-P^\\perp \\frac{\\partial A}{\\partial \\theta_k} c`, where :math:`A` is the
+        weighted matrix and :math:`P^\\perp` the projector onto the orthogonal complement of its
+        column space. The derivative of the clps is approximated accordingly by
+        :math:`-A^+ \\frac{\\partial A}{\\partial \\theta_k} c`.
+
+        The derivatives of the matrices are approximated with forward differences of the matrix
+        calculation. There are no analytic derivatives of the megacomplexes, so the Jacobian
+        costs one matrix calculation per free parameter like finite differences of the full
+        penalty, but no clps are solved for the perturbed parameters. The projection factorizes
+        each :class:`WeightedMatrixBatch` once for all parameters, with the non-negative
+        least-squares method once per set of clps at the bound of zero.
+
+        The rows of the additional penalty are forward differences of the penalty, evaluated
+        with the perturbed matrices and the clps moved along their approximated derivative, so
+        they are consistent with the rows of the weighted residuals.
+
+        Parameters
+        ----------
+        free_parameter_labels : list[str]
+            The labels of the free parameters in the order of the columns of the Jacobian.
+
+        Returns
+        -------
+        np.ndarray
+            The Jacobian at the current parameters.
+        """
+        full_penalty = self.full_penalty
+        batches = self.weighted_matrix_batches
+        batch_clps = self._batch_clps
+        additional_penalty = self.additional_penalty
+        residual_offsets = np.cumsum([0] + [r.size for r in self.flat_weighted_residuals])
+        batch_rows = [
+            residual_offsets[batch.indices][np.newaxis, :]
+            + np.arange(batch.matrix.shape[0])[:, np.newaxis]
+            for batch in batches
+        ]
+
+        jacobian = np.zeros((full_penalty.size, len(free_parameter_labels)), dtype=np.float64)
+        values = np.empty(len(free_parameter_labels), dtype=np.float64)
+        steps = np.empty(len(free_parameter_labels), dtype=np.float64)
+        perturbed_matrices = []
+        state = {name: getattr(self, name) for name in _EVALUATION_STATE}
+        # the perturbed evaluations must not overwrite the buffers of the current evaluation
+        preallocate_buffers, self._preallocate_buffers = self._preallocate_buffers, False
+        try:
+            for k, label in enumerate(free_parameter_labels):
+                values[k], steps[k] = self._get_forward_difference_step(label)
+                self._set_optimization_value(label, values[k] + steps[k])
+                for batch, perturbed_batch, clps, rows in zip(
+                    batches, self.calculate_weighted_matrix_batches(), batch_clps, batch_rows
+                ):
+                    jacobian[rows, k] = (perturbed_batch.matrix - batch.matrix) @ clps / steps[k]
+                if additional_penalty is not None:
+                    perturbed_matrices.append(
+                        {name: getattr(self, name) for name in _MATRIX_STATE}
+                    )
+                self._set_optimization_value(label, values[k])
+
+            clp_derivatives = []
+            for batch, clps, rows in zip(batches, batch_clps, batch_rows):
+                derivatives = jacobian[rows]
+                clp_derivatives.append(
+                    self._project_matrix_derivatives(batch.matrix, clps, derivatives)
+                )
+                jacobian[rows] = -derivatives
+
+            if additional_penalty is not None:
+                for k, label in enumerate(free_parameter_labels):
+                    self._set_optimization_value(label, values[k] + steps[k])
+                    for name, value in perturbed_matrices[k].items():
+                        setattr(self, name, value)
+                    self._weighted_matrix_batches = batches
+                    self._retrieve_clps(
+                        [
+                            clps + steps[k] * derivative[:, :, k]
+                            for clps, derivative in zip(batch_clps, clp_derivatives)
+                        ]
+                    )
+                    jacobian[residual_offsets[-1] :, k] = (
+                        self.calculate_additional_penalty() - additional_penalty
+                    ) / steps[k]
+                    self._set_optimization_value(label, values[k])
+        finally:
+            self._preallocate_buffers = preallocate_buffers
+        self.parameters.update_parameter_expression()
+        self._parameter_binding.update()
+        for name, value in state.items():
+            setattr(self, name, value)
+
+        return jacobian
+
+    def _get_forward_difference_step(self, label: str) -> tuple[float, float]:
+        """Gets the value of a parameter in the optimization space and its forward difference
+        step, which is reversed if it would exceed the upper bound of the parameter."""
+        value, _, maximum = self.parameters.get(label).get_value_and_bounds_for_optimization()
+        step = self.finite_difference_step * max(1.0, abs(value))
+        return value, -step if value + step > maximum else step
+
+    def _set_optimization_value(self, label: str, value: float):
+        """Sets the value of a parameter in the optimization space and resets the problem."""
+        self.parameters.get(label).set_value_from_optimization(value)
+        self.parameters.update_parameter_expression()
+        self.reset()
+
+    def _project_matrix_derivatives(
+        self, matrix: np.ndarray, clps: np.ndarray, derivatives: np.ndarray
+    ) -> np.ndarray:
+        """Projects the derivatives of a weighted matrix batch in place onto the orthogonal
+        complement of the column space of the matrix and calculates the derivatives of the clps.
+
+        Parameters
+        ----------
+        matrix : np.ndarray
+            The weighted matrix of the batch.
+        clps : np.ndarray
+            The clps of the batch, one column per index.
+        derivatives : np.ndarray
+            The derivatives of the matrix times the clps, with the shape of the weighted
+            residuals of the batch followed by one axis for the parameters.
+
+        Returns
+        -------
+        np.ndarray
+            The derivatives of the clps, with the shape of the clps followed by one axis for
+            the parameters.
+        """
+        clp_derivatives = np.zeros(clps.shape + derivatives.shape[2:], dtype=np.float64)
+        if self.scheme.non_negative_least_squares:
+            # clps at the bound of zero are held fixed by the active set, the indices with the
+            # same active set share a factorization
+            masks, groups = np.unique(clps > 0, axis=1, return_inverse=True)
+        else:
+            masks = np.ones((clps.shape[0], 1), dtype=bool)
+            groups = np.zeros(clps.shape[1], dtype=np.int64)
+
+        for group, mask in enumerate(masks.T):
+            if not np.any(mask):
+                continue
+            columns = np.flatnonzero(groups == group)
+            group_derivatives = derivatives[:, columns]
+            group_clp_derivatives, projected = residual_variable_projection(
+                matrix[:, mask], group_derivatives.reshape(group_derivatives.shape[0], -1)
+            )
+            derivatives[:, columns] = projected.reshape(group_derivatives.shape)
+            clp_derivatives[np.ix_(mask, columns)] = -group_clp_derivatives.reshape(
+                (-1,) + group_derivatives.shape[1:]
+            )
+        return clp_derivatives
+
     def calculate_additional_penalty(self) -> np.ndarray | dict[str, np.ndarray]:
         """Calculates additional penalties by calling the model.additional_penalty function."""
         if (
             callable(self.model.has_additional_penalty_function)
             and self.model.has_additional_penalty_function()
         ):
-            self._additional_penalty = self.model.additional_penalty_function(
-                self.parameters,
-                self.clp_labels,
-                self.clps,
-                self.matrices,
-                self.data,
-                self._scheme.group_tolerance,
-            )
+            clp_labels, clps, matrices = self.clp_labels, self.clps, self.matrices
+            with self._timer.phase("additional_penalty"):
+                self._additional_penalty = self.model.additional_penalty_function(
+                    self.parameters,
+                    clp_labels,
+                    clps,
+                    matrices,
+                    self.data,
+                    self._scheme.group_tolerance,
+                )
         else:
             self._additional_penalty = None
         return self._additional_penalty
 
     def create_result_data(
-        self, copy: bool = True, history_index: int | None = None
-    ) -> dict[str, xr.Dataset]:
+        self, copy: bool = True, history_index: int | None = None, mode: str = "eager"
+    ) -> dict[str, xr.Dataset] | LazyResultData:
+        """Creates the result datasets.
+
+        Parameters
+        ----------
+        copy : bool
+            Whether to add the results to copies of the datasets.
+        history_index : int | None
+            The index of the parameters in the history to create the results for, defaults to
+            the current parameters.
+        mode : str
+            With ``'eager'`` all datasets are created serially. With ``'lazy'`` a
+            :class:`LazyResultData` is returned, which creates each dataset on first access,
+            with singular value decompositions which are calculated once they are read. It
+            keeps the problem alive until all datasets are created and the problem must not be
+            evaluated again until then. The lazily created datasets never use the executor of
+            the problem, which may have been shut down already. ``'parallel'`` creates all
+            datasets with :attr:`Scheme.number_of_workers` threads, or serially if the threading
+            layer of numba can't run parallel kernels from concurrent threads.
+
+        Returns
+        -------
+        dict[str, xr.Dataset] | LazyResultData
+            The result datasets by label.
+
+        Raises
+        ------
+        ValueError
+            If the mode is not supported.
+        """
+        if mode not in SUPPORTED_RESULT_DATA_MODES:
+            raise ValueError(
+                f"Unsupported result data mode '{mode}'. "
+                f"Supported result data modes are '{SUPPORTED_RESULT_DATA_MODES}'"
+            )
+        if history_index is not None:
+            self.restore_parameters_from_history(history_index)
+
+        with self._timer.phase("create_result_data"):
+            if mode == "eager":
+                result_data = {
+                    label: self.create_result_dataset(label, copy=copy) for label in self.data
+                }
+
+                if callable(self.model.finalize_data):
+                    self.model.finalize_data(self, result_data)
+
+                return result_data
+
+            # evaluate the problem before datasets are created from multiple threads
+            self.residuals
+            self.additional_penalty
+            if mode == "lazy":
+                return LazyResultData(
+                    list(self.data),
+                    functools.partial(self._create_finalized_result_dataset, copy=copy, lazy=True),
+                )
+            result_data = LazyResultData(
+                list(self.data),
+                functools.partial(self._create_finalized_result_dataset, copy=copy),
+            )
+            number_of_workers = (
+                self._scheme.number_of_workers
+                if numba_threading_layer() in THREADSAFE_NUMBA_THREADING_LAYERS
+                else 1
+            )
+            return result_data.materialize(number_of_workers)
 
-        if history_index is not None and history_index != -1:
-            self.parameters = self.parameter_history[history_index]
-        result_data = {label: self.create_result_dataset(label, copy=copy) for label in self.data}
+    def _create_finalized_result_dataset(
+        self, label: str, copy: bool = True, lazy: bool = False
+    ) -> xr.Dataset:
+        """Creates the result dataset of a label and finalizes it with the model alone.
 
-        if callable(self.model.finalize_data):
-            self.model.finalize_data(self, result_data)
+        Lazily created datasets are created serially in the calling thread and get lazy singular
+        value decompositions. The time is recorded as phase ``'create_result_dataset'``.
+        """
+        with self._timer.phase("create_result_dataset"):
+            with self._map_serially() if lazy else contextlib.nullcontext():
+                dataset = self.create_result_dataset(label, copy=copy, lazy_svd=lazy)
+                if callable(self.model.finalize_data):
+                    self.model.finalize_data(self, {label: dataset})
+        return dataset
 
-        return result_data
+    def create_result_dataset(
+        self, label: str, copy: bool = True, lazy_svd: bool = False
+    ) -> xr.Dataset:
+        """Creates the result dataset of a label.
+
+        Parameters
+        ----------
+        label : str
+            The label of the dataset.
+        copy : bool
+            Whether to add the results to a copy of the dataset.
+        lazy_svd : bool
+            Whether the singular value decompositions of the residuals are only calculated once
+            their variables are read.
 
-    def create_result_dataset(self, label: str, copy: bool = True) -> xr.Dataset:
+        Returns
+        -------
+        xr.Dataset
+            The result dataset.
+        """
         dataset = self.data[label]
         dataset_model = self._filled_dataset_descriptors[label]
         global_dimension = dataset_model.get_global_dimension()
@@ -417,8 +1236,8 @@ class Problem:
 
         # TODO: adapt tests to handle add_svd=False
         if self.scheme.add_svd:
-            self._create_svd("weighted_residual", dataset, model_dimension, global_dimension)
-            self._create_svd("residual", dataset, model_dimension, global_dimension)
+            for name in ["weighted_residual", "residual"]:
+                self._create_svd(name, dataset, model_dimension, global_dimension, lazy=lazy_svd)
 
         # Calculate RMS
         size = dataset.residual.shape[0] * dataset.residual.shape[1]
@@ -434,7 +1253,9 @@ class Problem:
         dataset["fitted_data"] = dataset.data - dataset.residual
         return dataset
 
-    def _create_svd(self, name: str, dataset: xr.Dataset, lsv_dim: str, rsv_dim: str):
+    def _create_svd(
+        self, name: str, dataset: xr.Dataset, lsv_dim: str, rsv_dim: str, lazy: bool = False
+    ):
         """Calculate the SVD of a data matrix in the dataset and add it to the dataset.
 
         Parameters
@@ -443,15 +1264,16 @@ class Problem:
             Name of the data matrix.
         dataset : xr.Dataset
             Dataset containing the data, which will be updated with the SVD values.
+        lazy : bool
+            Whether the SVD is only calculated once its variables are read.
         """
         data_array: xr.DataArray = self._transpose_dataset(
             dataset[name],
             ordered_dims=[lsv_dim, rsv_dim],
         )
 
-        add_svd_to_dataset(
-            dataset, name=name, lsv_dim=lsv_dim, rsv_dim=rsv_dim, data_array=data_array
-        )
+        add_svd = add_lazy_svd_to_dataset if lazy else add_svd_to_dataset
+        add_svd(dataset, name=name, lsv_dim=lsv_dim, rsv_dim=rsv_dim, data_array=data_array)
 
     def init_bag(self):
         """Initializes a problem bag."""
@@ -479,26 +1301,12 @@ class Problem:
         """Calculates the index independent model matrices."""
         raise NotImplementedError
 
-    def calculate_index_dependent_residual(
-        self,
-    ) -> tuple[
-        dict[str, list[np.ndarray]],
-        dict[str, list[np.ndarray]],
-        dict[str, list[np.ndarray]],
-        dict[str, list[np.ndarray]],
-    ]:
-        """Calculates the index dependent residuals."""
-        raise NotImplementedError
+    def calculate_weighted_matrix_batches(self) -> list[WeightedMatrixBatch]:
+        """Calculates the weighted and scaled reduced matrices.
 
-    def calculate_index_independent_residual(
-        self,
-    ) -> tuple[
-        dict[str, list[np.ndarray]],
-        dict[str, list[np.ndarray]],
-        dict[str, list[np.ndarray]],
-        dict[str, list[np.ndarray]],
-    ]:
-        """Calculates the index independent residuals."""
+        Weighted residuals which share the same weighted matrix are batched together, so that
+        the matrix needs to be factorized only once.
+        """
         raise NotImplementedError
 
     def create_index_dependent_result_dataset(self, label: str, dataset: xr.Dataset) -> xr.Dataset:
@@ -1,23 +1,23 @@
 from __future__ import annotations
 
-import collections
-import itertools
-from typing import Deque
+import functools
 
 import numpy as np
 import xarray as xr
 
+from glotaran.analysis.problem import GroupedBag
+from glotaran.analysis.problem import GroupedDatasetIndex
 from glotaran.analysis.problem import GroupedProblemDescriptor
 from glotaran.analysis.problem import ParameterError
 from glotaran.analysis.problem import Problem
 from glotaran.analysis.problem import ProblemGroup
+from glotaran.analysis.problem import WeightedMatrixBatch
 from glotaran.analysis.util import LabelAndMatrix
-from glotaran.analysis.util import calculate_matrix
+from glotaran.analysis.util import align_axes
 from glotaran.analysis.util import combine_matrices
-from glotaran.analysis.util import find_closest_index
-from glotaran.analysis.util import find_overlap
 from glotaran.analysis.util import reduce_matrix
-from glotaran.model import DatasetDescriptor
+from glotaran.model import Model
+from glotaran.parameter import ParameterGroup
 from glotaran.project import Scheme
 
 
@@ -32,6 +32,8 @@ class GroupedProblem(Problem):
                 which defines your model, parameters, and data
         """
         super().__init__(scheme=scheme)
+        if scheme.svd_compression is not None:
+            raise ValueError("SVD compression is not supported for grouped problems.")
 
         # TODO: grouping should be user controlled not inferred automatically
         global_dimensions = {
@@ -53,132 +55,75 @@ class GroupedProblem(Problem):
         )
         self._global_dimension = global_dimensions.pop()
         self._model_dimension = model_dimensions.pop()
+        self._index_independent_bag_groups = None
 
     def init_bag(self):
-        """Initializes a grouped problem bag."""
-        datasets = None
-        for label in self._model.dataset:
+        """Initializes a grouped problem bag.
+
+        The data of all datasets gets written into a single buffer, where the data of each
+        problem group is stored contiguously.
+        """
+        labels = list(self._model.dataset)
+        self._full_axis, aligned_indices = align_axes(
+            [self._data[label].coords[self._global_dimension].values for label in labels],
+            atol=self._scheme.group_tolerance,
+        )
+        group_indices = dict(zip(labels, aligned_indices))
+        number_of_groups = self._full_axis.size
+
+        model_sizes = {
+            label: self._data[label].coords[self._model_dimension].size for label in labels
+        }
+        group_sizes = np.zeros(number_of_groups, dtype=np.int64)
+        dataset_offsets = {}
+        for label in labels:
+            dataset_offsets[label] = group_sizes[group_indices[label]]
+            group_sizes[group_indices[label]] += model_sizes[label]
+        offsets = np.concatenate([[0], np.cumsum(group_sizes)])
+
+        data = np.empty(offsets[-1], dtype=self._dtype)
+        weight = np.ones(offsets[-1], dtype=self._dtype)
+        members = [[] for _ in range(number_of_groups)]
+        for label in labels:
             dataset = self._data[label]
+            rows = (offsets[group_indices[label]] + dataset_offsets[label])[
+                np.newaxis, :
+            ] + np.arange(model_sizes[label])[:, np.newaxis]
             if "weight" in dataset:
-                weight = dataset.weight
-                data = dataset.data * weight
-                dataset["weighted_data"] = data
+                dataset["weighted_data"] = dataset.data * dataset.weight
+                data[rows] = dataset.weighted_data.values
+                weight[rows] = dataset.weight.values
             else:
-                weight = xr.DataArray(np.ones_like(dataset.data), coords=dataset.data.coords)
-                data = dataset.data
-            global_axis = dataset.coords[self._global_dimension].values
-            model_axis = dataset.coords[self._model_dimension].values
-            has_scaling = self._model.dataset[label].scale is not None
-            if self._bag is None:
-                self._bag = collections.deque(
-                    ProblemGroup(
-                        data=data.isel({self._global_dimension: i}).values,
-                        weight=weight.isel({self._global_dimension: i}).values,
-                        has_scaling=has_scaling,
-                        group=label,
-                        data_sizes=[data.isel({self._global_dimension: i}).values.size],
-                        descriptor=[
-                            GroupedProblemDescriptor(
-                                label,
-                                {
-                                    self._global_dimension: i,
-                                },
-                                {
-                                    self._model_dimension: model_axis,
-                                    self._global_dimension: global_axis,
-                                },
-                            )
-                        ],
-                    )
-                    for i, value in enumerate(global_axis)
-                )
-                datasets = collections.deque([label] for _, _ in enumerate(global_axis))
-                self._full_axis = collections.deque(global_axis)
-            else:
-                self._append_to_grouped_bag(
-                    label, datasets, global_axis, model_axis, data, weight, has_scaling
+                data[rows] = dataset.data.values
+
+            axis = {
+                self._model_dimension: dataset.coords[self._model_dimension].values,
+                self._global_dimension: dataset.coords[self._global_dimension].values,
+            }
+            for i, group_index in enumerate(group_indices[label]):
+                members[group_index].append(
+                    GroupedProblemDescriptor(label, {self._global_dimension: i}, axis)
                 )
-        self._full_axis = np.asarray(self._full_axis)
-        self._groups = {"".join(d): d for d in datasets}
 
-    def _append_to_grouped_bag(
-        self,
-        label: str,
-        datasets: Deque[str],
-        global_axis: np.ndarray,
-        model_axis: np.ndarray,
-        data: xr.DataArray,
-        weight: xr.DataArray,
-        has_scaling: bool,
-    ):
-        i1, i2 = find_overlap(self._full_axis, global_axis, atol=self._scheme.group_tolerance)
-
-        for i, j in enumerate(i1):
-            datasets[j].append(label)
-            data_stripe = data.isel({self._global_dimension: i2[i]}).values
-            self._bag[j] = ProblemGroup(
-                data=np.concatenate(
-                    [
-                        self._bag[j].data,
-                        data_stripe,
-                    ]
-                ),
-                weight=np.concatenate(
-                    [
-                        self._bag[j].weight,
-                        weight.isel({self._global_dimension: i2[i]}).values,
-                    ]
-                ),
-                has_scaling=has_scaling or self._bag[j].has_scaling,
-                group=self._bag[j].group + label,
-                data_sizes=self._bag[j].data_sizes + [data_stripe.size],
-                descriptor=self._bag[j].descriptor
-                + [
-                    GroupedProblemDescriptor(
-                        label,
-                        {
-                            self._global_dimension: i2[i],
-                        },
-                        {
-                            self._model_dimension: model_axis,
-                            self._global_dimension: global_axis,
-                        },
-                    )
-                ],
-            )
-
-        # Add non-overlaping regions
-        begin_overlap = i2[0] if len(i2) != 0 else 0
-        end_overlap = i2[-1] + 1 if len(i2) != 0 else 0
-        for i in itertools.chain(range(begin_overlap), range(end_overlap, len(global_axis))):
-            data_stripe = data.isel({self._global_dimension: i}).values
-            problem = ProblemGroup(
-                data=data_stripe,
-                weight=weight.isel({self._global_dimension: i}).values,
-                has_scaling=has_scaling,
-                group=label,
-                data_sizes=[data_stripe.size],
-                descriptor=[
-                    GroupedProblemDescriptor(
-                        label,
-                        {
-                            self._global_dimension: i,
-                        },
-                        {
-                            self._model_dimension: model_axis,
-                            self._global_dimension: global_axis,
-                        },
-                    )
-                ],
-            )
-            if i < end_overlap:
-                datasets.appendleft([label])
-                self._full_axis.appendleft(global_axis[i])
-                self._bag.appendleft(problem)
-            else:
-                datasets.append([label])
-                self._full_axis.append(global_axis[i])
-                self._bag.append(problem)
+        self._bag = GroupedBag(
+            data=data,
+            weight=weight,
+            offsets=offsets,
+            groups=["".join(d.label for d in descriptors) for descriptors in members],
+            data_sizes=[[model_sizes[d.label] for d in descriptors] for descriptors in members],
+            has_scaling=[
+                any(self._model.dataset[d.label].scale is not None for d in descriptors)
+                for descriptors in members
+            ],
+            descriptors=members,
+            dataset_indices={
+                label: GroupedDatasetIndex(group_indices[label], dataset_offsets[label])
+                for label in labels
+            },
+        )
+        self._groups = {
+            problem.group: [d.label for d in problem.descriptor] for problem in self._bag
+        }
 
     def calculate_matrices(self):
         if self._parameters is None:
@@ -198,61 +143,56 @@ class GroupedProblem(Problem):
     ]:
         """Calculates the index dependent model matrices."""
 
-        def calculate_group(
-            group: ProblemGroup, descriptors: dict[str, DatasetDescriptor]
-        ) -> tuple[list[tuple[LabelAndMatrix, str]], float]:
-            result = [
-                (
-                    calculate_matrix(
-                        self._model,
-                        descriptors[problem.label],
-                        problem.indices,
-                        problem.axis,
-                    ),
-                    problem.label,
-                )
-                for problem in group.descriptor
-            ]
-            global_index = group.descriptor[0].indices[self._global_dimension]
-            global_index = group.descriptor[0].axis[self._global_dimension][global_index]
-            return result, global_index
-
-        def reduce_and_combine_matrices(
-            results: tuple[list[tuple[LabelAndMatrix, str]], float],
-        ) -> LabelAndMatrix:
-            index_results, index = results
-            constraint_labels_and_matrices = list(
-                map(
-                    lambda result: reduce_matrix(
-                        self._model, result[1], self.parameters, result[0], index
-                    ),
-                    index_results,
-                )
-            )
-            clp, matrix = combine_matrices(constraint_labels_and_matrices)
-            return LabelAndMatrix(clp, matrix)
-
-        results = list(
-            map(lambda group: calculate_group(group, self._filled_dataset_descriptors), self._bag)
-        )
-
-        clp_labels = list(map(lambda result: [r[0].clp_label for r in result[0]], results))
-        matrices = list(map(lambda result: [r[0].matrix for r in result[0]], results))
-
         self._clp_labels = {}
         self._matrices = {}
 
-        for i, grouped_problem in enumerate(self._bag):
-            for j, descriptor in enumerate(grouped_problem.descriptor):
-                if descriptor.label not in self._clp_labels:
-                    self._clp_labels[descriptor.label] = []
-                    self._matrices[descriptor.label] = []
-                self._clp_labels[descriptor.label].append(clp_labels[i][j])
-                self._matrices[descriptor.label].append(matrices[i][j])
-
-        reduced_results = list(map(reduce_and_combine_matrices, results))
-        self._reduced_clp_labels = list(map(lambda result: result.clp_label, reduced_results))
-        self._reduced_matrices = list(map(lambda result: result.matrix, reduced_results))
+        for label, dataset_index in self.bag.dataset_indices.items():
+            results = self.calculate_dataset_matrices(
+                label,
+                [{self._global_dimension: i} for i in range(dataset_index.groups.size)],
+                {
+                    self._model_dimension: self._data[label].coords[self._model_dimension].values,
+                    self._global_dimension: self._data[label]
+                    .coords[self._global_dimension]
+                    .values,
+                },
+            )
+            self._clp_labels[label] = [result.clp_label for result in results]
+            self._matrices[label] = [result.matrix for result in results]
+
+        group_labels = []
+        group_results = []
+        group_indices = []
+        for grouped_problem in self._bag:
+            labels = []
+            results = []
+            for descriptor in grouped_problem.descriptor:
+                index = descriptor.indices[self._global_dimension]
+                labels.append(descriptor.label)
+                results.append(
+                    LabelAndMatrix(
+                        self._clp_labels[descriptor.label][index],
+                        self._matrices[descriptor.label][index],
+                    )
+                )
+            descriptor = grouped_problem.descriptor[0]
+            group_labels.append(labels)
+            group_results.append(results)
+            group_indices.append(
+                descriptor.axis[self._global_dimension][
+                    descriptor.indices[self._global_dimension]
+                ]
+            )
+
+        with self._timer.phase("reduce_matrix"):
+            reduced_results = self.parallel_map(
+                functools.partial(_reduce_and_combine_matrices, self._model, self._parameters),
+                group_labels,
+                group_results,
+                group_indices,
+            )
+        self._reduced_clp_labels = [result.clp_label for result in reduced_results]
+        self._reduced_matrices = [result.matrix for result in reduced_results]
         return self._clp_labels, self._matrices, self._reduced_clp_labels, self._reduced_matrices
 
     def calculate_index_independent_matrices(
@@ -267,10 +207,9 @@ class GroupedProblem(Problem):
         for label, descriptor in self._filled_dataset_descriptors.items():
             model_axis = self._data[label].coords[self._model_dimension].values
             global_axis = self._data[label].coords[self._global_dimension].values
-            result = calculate_matrix(
-                self._model,
-                descriptor,
-                {},
+            (result,) = self.calculate_dataset_matrices(
+                label,
+                [{}],
                 {
                     self._model_dimension: model_axis,
                     self._global_dimension: global_axis,
@@ -279,113 +218,148 @@ class GroupedProblem(Problem):
 
             self._clp_labels[label] = result.clp_label
             self._matrices[label] = result.matrix
-            reduced_result = reduce_matrix(self._model, label, self._parameters, result, None)
+            with self._timer.phase("reduce_matrix"):
+                reduced_result = reduce_matrix(self._model, label, self._parameters, result, None)
             self._reduced_clp_labels[label] = reduced_result.clp_label
             self._reduced_matrices[label] = reduced_result.matrix
 
-        for group_label, group in self.groups.items():
-            if group_label not in self._matrices:
-                reduced_labels_and_matrix = combine_matrices(
-                    [
-                        LabelAndMatrix(
-                            self._reduced_clp_labels[label], self._reduced_matrices[label]
-                        )
-                        for label in group
-                    ]
-                )
-                self._reduced_clp_labels[group_label] = reduced_labels_and_matrix.clp_label
-                self._reduced_matrices[group_label] = reduced_labels_and_matrix.matrix
+        with self._timer.phase("reduce_matrix"):
+            for group_label, group in self.groups.items():
+                if group_label not in self._matrices:
+                    reduced_labels_and_matrix = combine_matrices(
+                        [
+                            LabelAndMatrix(
+                                self._reduced_clp_labels[label], self._reduced_matrices[label]
+                            )
+                            for label in group
+                        ]
+                    )
+                    self._reduced_clp_labels[group_label] = reduced_labels_and_matrix.clp_label
+                    self._reduced_matrices[group_label] = reduced_labels_and_matrix.matrix
 
         return self._clp_labels, self._matrices, self._reduced_clp_labels, self._reduced_matrices
 
-    def calculate_residual(self):
+    def calculate_weighted_matrix_batches(self) -> list[WeightedMatrixBatch]:
+        """Calculates the weighted and scaled reduced matrices.
+
+        Weighted residuals which share the same weighted matrix are batched together, so that
+        the matrix needs to be factorized only once.
+        """
+        bag = self.bag
         if self._index_dependent:
-            self.calculate_index_dependent_residual()
-        else:
-            self.calculate_index_independent_residual()
+            return [
+                WeightedMatrixBatch(
+                    np.asarray([i]), self._weight_and_scale_matrix(i, problem, matrix)
+                )
+                for i, (problem, matrix) in enumerate(zip(bag, self.reduced_matrices))
+            ]
+        return [
+            WeightedMatrixBatch(
+                np.asarray(indices),
+                self._weight_and_scale_matrix(
+                    i, bag[indices[0]], self.reduced_matrices[bag[indices[0]].group]
+                ),
+            )
+            for i, indices in enumerate(self.index_independent_bag_groups)
+        ]
 
-    def calculate_index_dependent_residual(
+    def _weight_and_scale_matrix(
+        self, batch_index: int, problem: ProblemGroup, matrix: np.ndarray
+    ) -> np.ndarray:
+        matrix = np.multiply(
+            matrix,
+            problem.weight[:, np.newaxis],
+            out=self._get_buffer(("matrix", batch_index), matrix.shape),
+        )
+        if problem.has_scaling:
+            for i, descriptor in enumerate(problem.descriptor):
+                scale = self.filled_dataset_descriptors[descriptor.label].scale
+                if scale is not None:
+                    start = sum(problem.data_sizes[0:i])
+                    end = start + problem.data_sizes[i]
+                    matrix[start:end, :] *= scale
+        return matrix
+
+    def calculate_residual(
         self,
     ) -> tuple[list[np.ndarray], list[np.ndarray], list[np.ndarray], list[np.ndarray],]:
-        """Calculates the index dependent residuals."""
+        """Calculates the residuals."""
 
-        def residual_function(
-            problem: ProblemGroup, matrix: np.ndarray
-        ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        bag = self.bag
+        weighted_residual = self._get_penalty_buffer(bag.data.size)[: bag.data.size]
+        residual = self._get_buffer("residual", bag.data.shape)
+        self._weighted_matrix_batches = self.calculate_weighted_matrix_batches()
+        self._batch_clps = []
 
-            matrix = matrix.copy()
-            for i in range(matrix.shape[1]):
-                matrix[:, i] *= problem.weight
-            data = problem.data
-            if problem.has_scaling:
-                for i, descriptor in enumerate(problem.descriptor):
-                    label = descriptor.label
-                    if self.filled_dataset_descriptors[label] is not None:
-                        start = sum(problem.data_sizes[0:i])
-                        end = start + problem.data_sizes[i]
-                        matrix[start:end, :] *= self.filled_dataset_descriptors[label].scale
+        results = self.solve_weighted_matrix_batches(
+            [batch.matrix for batch in self._weighted_matrix_batches],
+            [self.bag.stack_data(batch.indices) for batch in self._weighted_matrix_batches],
+        )
 
-            clp, residual = self._residual_function(matrix, data)
-            return clp, residual, residual / problem.weight
+        for (indices, _), (clps, weighted_residuals) in zip(
+            self._weighted_matrix_batches, results
+        ):
+            self._batch_clps.append(clps)
+            weighted_residual[bag.stack_indices(indices)] = weighted_residuals
 
-        results = list(map(residual_function, self.bag, self.reduced_matrices))
+        np.divide(weighted_residual, bag.weight, out=residual)
+        self._weighted_residuals = [
+            weighted_residual[start:end] for start, end in zip(bag.offsets[:-1], bag.offsets[1:])
+        ]
+        self._residuals = [
+            residual[start:end] for start, end in zip(bag.offsets[:-1], bag.offsets[1:])
+        ]
+        self._retrieve_clps(self._batch_clps)
 
-        self._weighted_residuals = list(map(lambda result: result[1], results))
-        self._residuals = list(map(lambda result: result[2], results))
+        return self._reduced_clps, self._clps, self._weighted_residuals, self._residuals
 
-        reduced_clps = list(map(lambda result: result[0], results))
-        self._ungroup_clps(reduced_clps)
+    def _residual_blocks(self) -> list[tuple[int, list[str]]]:
+        blocks = []
+        previous_group = None
+        for problem, size in zip(self.bag, np.diff(self.bag.offsets)):
+            if problem.group == previous_group:
+                blocks[-1] = (blocks[-1][0] + int(size), blocks[-1][1])
+            else:
+                blocks.append((int(size), self.groups[problem.group]))
+                previous_group = problem.group
+        return blocks
 
-        return self._reduced_clps, self._clps, self._weighted_residuals, self._residuals
+    @property
+    def index_independent_bag_groups(self) -> list[list[int]]:
+        """Indices of the problems in the bag which share the same weighted matrix.
 
-    def calculate_index_independent_residual(
-        self,
-    ) -> tuple[list[np.ndarray], list[np.ndarray], list[np.ndarray], list[np.ndarray],]:
-        """Calculates the index independent residuals."""
-
-        def residual_function(problem: ProblemGroup):
-            matrix = self.reduced_matrices[problem.group].copy()
-            for i in range(matrix.shape[1]):
-                matrix[:, i] *= problem.weight
-            data = problem.data
-            if problem.has_scaling:
-                for i, descriptor in enumerate(problem.descriptor):
-                    label = descriptor.label
-                    if self.filled_dataset_descriptors[label] is not None:
-                        start = sum(problem.data_sizes[0:i])
-                        end = start + problem.data_sizes[i]
-                        matrix[start:end, :] *= self.filled_dataset_descriptors[label].scale
-            clp, residual = self._residual_function(matrix, data)
-            return clp, residual, residual / problem.weight
-
-        results = list(map(residual_function, self.bag))
-
-        self._weighted_residuals = list(map(lambda result: result[1], results))
-        self._residuals = list(map(lambda result: result[2], results))
-
-        reduced_clps = list(map(lambda result: result[0], results))
+        In the index independent case problems of the same group with the same weight have an
+        identical weighted matrix and can be solved together.
+        """
+        if self._index_independent_bag_groups is None:
+            bag_groups = {}
+            for i, problem in enumerate(self.bag):
+                key = (problem.group, problem.weight.tobytes())
+                bag_groups.setdefault(key, []).append(i)
+            self._index_independent_bag_groups = list(bag_groups.values())
+        return self._index_independent_bag_groups
+
+    def _retrieve_clps(self, batch_clps: list[np.ndarray]):
+        """Calculates the reduced and the full clps from the clps of the weighted matrix
+        batches."""
+        reduced_clps = [None] * len(self.bag)
+        for (indices, _), clps in zip(self.weighted_matrix_batches, batch_clps):
+            for i, index in enumerate(indices):
+                reduced_clps[index] = clps[:, i]
         self._ungroup_clps(reduced_clps)
 
-        return self._reduced_clps, self._clps, self._weighted_residuals, self._residuals
-
     def _ungroup_clps(self, reduced_clps: np.ndarray):
         reduced_clp_labels = self.reduced_clp_labels
         self._reduced_clp_labels = {}
         self._reduced_clps = {}
         for label, clp_labels in self.clp_labels.items():
-
-            # find offset in the full axis
-            offset = find_closest_index(
-                self.data[label].coords[self._global_dimension][0].values, self._full_axis
-            )
-
             self._reduced_clp_labels[label] = []
             self._reduced_clps[label] = []
-            for i in range(self.data[label].coords[self._global_dimension].size):
-                group_label = self.bag[i].group
+            for i, group_index in enumerate(self.bag.dataset_indices[label].groups):
+                group_label = self.bag[group_index].group
                 dataset_clp_labels = clp_labels[i] if self._index_dependent else clp_labels
                 index_clp_labels = (
-                    reduced_clp_labels[i + offset]
+                    reduced_clp_labels[group_index]
                     if self._index_dependent
                     else reduced_clp_labels[group_label]
                 )
@@ -401,7 +375,7 @@ class GroupedProblem(Problem):
                     clp_label in self._reduced_clp_labels[label][i]
                     for clp_label in index_clp_labels
                 ]
-                self._reduced_clps[label].append(reduced_clps[i + offset][mask])
+                self._reduced_clps[label].append(reduced_clps[group_index][mask])
         self._clps = (
             self.model.retrieve_clp_function(
                 self.parameters,
@@ -417,19 +391,7 @@ class GroupedProblem(Problem):
     def create_index_dependent_result_dataset(self, label: str, dataset: xr.Dataset) -> xr.Dataset:
         """Creates a result datasets for index dependent matrices."""
 
-        for index, grouped_problem in enumerate(self.bag):
-
-            if label in grouped_problem.group:
-                group_index = [
-                    descriptor.label for descriptor in grouped_problem.descriptor
-                ].index(label)
-                group_descriptor = grouped_problem.descriptor[group_index]
-                global_index = group_descriptor.indices[self._global_dimension]
-                global_index = group_descriptor.axis[self._global_dimension][global_index]
-
-                self._add_grouped_residual_to_dataset(
-                    dataset, grouped_problem, index, group_index, global_index
-                )
+        self._add_grouped_residual_to_dataset(label, dataset)
 
         # we assume that the labels are the same, this might not be true in
         # future models
@@ -459,19 +421,7 @@ class GroupedProblem(Problem):
 
         self._add_index_independent_matrix_to_dataset(label, dataset)
 
-        for index, grouped_problem in enumerate(self.bag):
-
-            if label in grouped_problem.group:
-                group_index = [
-                    descriptor.label for descriptor in grouped_problem.descriptor
-                ].index(label)
-                group_descriptor = grouped_problem.descriptor[group_index]
-                global_index = group_descriptor.indices[self._global_dimension]
-                global_index = group_descriptor.axis[self._global_dimension][global_index]
-
-                self._add_grouped_residual_to_dataset(
-                    dataset, grouped_problem, index, group_index, global_index
-                )
+        self._add_grouped_residual_to_dataset(label, dataset)
 
         dataset["clp"] = (
             (
@@ -493,35 +443,41 @@ class GroupedProblem(Problem):
             np.asarray(self.matrices[label]),
         )
 
-    def _add_grouped_residual_to_dataset(
-        self,
-        dataset: xr.Dataset,
-        grouped_problem: ProblemGroup,
-        index: int,
-        group_index: int,
-        global_index: int,
-    ):
-        if "residual" not in dataset:
-            dim1 = dataset.coords[self._model_dimension].size
-            dim2 = dataset.coords[self._global_dimension].size
-            dataset["weighted_residual"] = (
-                (self._model_dimension, self._global_dimension),
-                np.zeros((dim1, dim2), dtype=np.float64),
-            )
-            dataset["residual"] = (
+    def _add_grouped_residual_to_dataset(self, label: str, dataset: xr.Dataset):
+        dataset_index = self.bag.dataset_indices[label]
+        model_size = dataset.coords[self._model_dimension].size
+        for name, residuals in [
+            ("weighted_residual", self.weighted_residuals),
+            ("residual", self.residuals),
+        ]:
+            dataset[name] = (
                 (self._model_dimension, self._global_dimension),
-                np.zeros((dim1, dim2), dtype=np.float64),
+                np.stack(
+                    [
+                        residuals[group_index][offset : offset + model_size]
+                        for group_index, offset in zip(
+                            dataset_index.groups, dataset_index.offsets
+                        )
+                    ],
+                    axis=1,
+                ),
             )
 
-        start = sum(
-            self.data[grouped_problem.descriptor[i].label].coords[self._model_dimension].size
-            for i in range(group_index)
-        )
 
-        end = start + dataset.coords[self._model_dimension].size
-        dataset.weighted_residual.loc[
-            {self._global_dimension: global_index}
-        ] = self.weighted_residuals[index][start:end]
-        dataset.residual.loc[{self._global_dimension: global_index}] = self.residuals[index][
-            start:end
+def _reduce_and_combine_matrices(
+    model: Model,
+    parameters: ParameterGroup,
+    labels: list[str],
+    results: list[LabelAndMatrix],
+    index: float,
+) -> LabelAndMatrix:
+    """Reduces the matrices of a problem group and combines them.
+
+    This is a module level function, so that it can be sent to the workers of an executor.
+    """
+    return combine_matrices(
+        [
+            reduce_matrix(model, label, parameters, result, index)
+            for label, result in zip(labels, results)
         ]
+    )
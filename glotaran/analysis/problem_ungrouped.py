@@ -6,7 +6,8 @@ import xarray as xr
 from glotaran.analysis.problem import ParameterError
 from glotaran.analysis.problem import Problem
 from glotaran.analysis.problem import UngroupedProblemDescriptor
-from glotaran.analysis.util import calculate_matrix
+from glotaran.analysis.problem import WeightedMatrixBatch
+from glotaran.analysis.util import find_identical_columns
 from glotaran.analysis.util import reduce_matrix
 from glotaran.model import DatasetDescriptor
 
@@ -15,8 +16,15 @@ class UngroupedProblem(Problem):
     """Represents a problem where the data is not grouped."""
 
     def init_bag(self):
-        """Initializes an ungrouped problem bag."""
+        """Initializes an ungrouped problem bag.
+
+        With :attr:`Scheme.svd_compression` the data of each dataset is replaced by its
+        projection onto the right singular vectors of the largest singular values, see
+        :meth:`_compress_data`.
+        """
         self._bag = {}
+        self._weight_column_groups = {}
+        self._compression_bases = {}
         for label, dataset_model in self.filled_dataset_descriptors.items():
             dataset = self._data[label]
             data = dataset.data
@@ -24,6 +32,9 @@ class UngroupedProblem(Problem):
             if weight is not None:
                 data = data * weight
                 dataset["weighted_data"] = data
+                self._weight_column_groups[label] = find_identical_columns(weight.values)
+            if self._scheme.svd_compression is not None:
+                data = self._compress_data(label, dataset_model, dataset)
             self._bag[label] = UngroupedProblemDescriptor(
                 dataset_model,
                 data,
@@ -32,6 +43,67 @@ class UngroupedProblem(Problem):
                 weight,
             )
 
+    def _residual_blocks(self) -> list[tuple[int, list[str]]]:
+        return [(problem.data.size, [label]) for label, problem in self.bag.items()]
+
+    def _compress_data(
+        self, label: str, dataset_model: DatasetDescriptor, dataset: xr.Dataset
+    ) -> xr.DataArray:
+        """Compresses the data of a dataset to its largest singular values.
+
+        With the singular value decomposition :math:`D = U S V^T` of the data, the residual of
+        an index independent matrix :math:`A` is :math:`(I - P_A) D`. Since :math:`V` has
+        orthonormal columns, its norm equals the norm of :math:`(I - P_A) U S`. Fitting
+        :math:`U_k S_k` of the ``k`` largest singular values is exact if ``k`` is at least the
+        rank of the data, otherwise it fits the projection of the data onto these components.
+        The clps are recovered by multiplying with :math:`V_k^T`, which is kept as compression
+        basis.
+
+        Parameters
+        ----------
+        label : str
+            The label of the dataset.
+        dataset_model : DatasetDescriptor
+            The filled dataset descriptor.
+        dataset : xr.Dataset
+            The prepared dataset.
+
+        Returns
+        -------
+        xr.DataArray
+            The compressed data.
+
+        Raises
+        ------
+        ValueError
+            If the dataset can not be compressed.
+        """
+        if dataset_model.index_dependent():
+            raise ValueError(f"Cannot compress index dependent dataset '{label}'.")
+        if "weight" in dataset:
+            raise ValueError(f"Cannot compress weighted dataset '{label}'.")
+        if self._scheme.non_negative_least_squares:
+            raise ValueError("SVD compression is not supported with non-negative least-squares.")
+
+        model_dimension = dataset_model.get_model_dimension()
+        if (
+            "data_singular_values" in dataset
+            and dataset.data_left_singular_vectors.dims[0] == model_dimension
+        ):
+            left_singular_vectors = dataset.data_left_singular_vectors.values
+            singular_values = dataset.data_singular_values.values
+            right_singular_vectors = dataset.data_right_singular_vectors.values
+        else:
+            left_singular_vectors, singular_values, right_singular_vectors = np.linalg.svd(
+                dataset.data.values, full_matrices=False
+            )
+        rank = min(self._scheme.svd_compression, singular_values.size)
+        self._compression_bases[label] = right_singular_vectors[:rank]
+        return xr.DataArray(
+            left_singular_vectors[:, :rank] * singular_values[:rank],
+            dims=(model_dimension, "singular_value_index"),
+        )
+
     def calculate_matrices(
         self,
     ) -> tuple[
@@ -66,24 +138,25 @@ class UngroupedProblem(Problem):
     def _calculate_index_dependent_matrix(
         self, label: str, problem: UngroupedProblemDescriptor, dataset_model: DatasetDescriptor
     ):
-        for i, index in enumerate(problem.global_axis):
-            result = calculate_matrix(
-                self._model,
-                dataset_model,
-                {dataset_model.get_global_dimension(): i},
-                {
-                    dataset_model.get_model_dimension(): problem.model_axis,
-                    dataset_model.get_global_dimension(): problem.global_axis,
-                },
-            )
+        global_dimension = dataset_model.get_global_dimension()
+        results = self.calculate_dataset_matrices(
+            label,
+            [{global_dimension: i} for i in range(problem.global_axis.size)],
+            {
+                dataset_model.get_model_dimension(): problem.model_axis,
+                global_dimension: problem.global_axis,
+            },
+        )
 
-            self._clp_labels[label].append(result.clp_label)
-            self._matrices[label].append(result.matrix)
-            reduced_labels_and_matrix = reduce_matrix(
-                self._model, label, self._parameters, result, index
-            )
-            self._reduced_clp_labels[label].append(reduced_labels_and_matrix.clp_label)
-            self._reduced_matrices[label].append(reduced_labels_and_matrix.matrix)
+        with self._timer.phase("reduce_matrix"):
+            for result, index in zip(results, problem.global_axis):
+                self._clp_labels[label].append(result.clp_label)
+                self._matrices[label].append(result.matrix)
+                reduced_labels_and_matrix = reduce_matrix(
+                    self._model, label, self._parameters, result, index
+                )
+                self._reduced_clp_labels[label].append(reduced_labels_and_matrix.clp_label)
+                self._reduced_matrices[label].append(reduced_labels_and_matrix.matrix)
 
     def _calculate_index_independent_matrix(
         self, label: str, problem: UngroupedProblemDescriptor, dataset_model: DatasetDescriptor
@@ -91,10 +164,9 @@ class UngroupedProblem(Problem):
 
         model_dimension = dataset_model.get_model_dimension()
         global_dimension = dataset_model.get_global_dimension()
-        result = calculate_matrix(
-            self._model,
-            dataset_model,
-            {},
+        (result,) = self.calculate_dataset_matrices(
+            label,
+            [{}],
             {
                 model_dimension: problem.model_axis,
                 global_dimension: problem.global_axis,
@@ -103,10 +175,100 @@ class UngroupedProblem(Problem):
 
         self._clp_labels[label] = result.clp_label
         self._matrices[label] = result.matrix
-        reduced_result = reduce_matrix(self._model, label, self._parameters, result, None)
+        with self._timer.phase("reduce_matrix"):
+            reduced_result = reduce_matrix(self._model, label, self._parameters, result, None)
         self._reduced_clp_labels[label] = reduced_result.clp_label
         self._reduced_matrices[label] = reduced_result.matrix
 
+    def calculate_weighted_matrix_batches(self) -> list[WeightedMatrixBatch]:
+        """Calculates the weighted and scaled reduced matrices.
+
+        Weighted residuals which share the same weighted matrix are batched together, so that
+        the matrix needs to be factorized only once.
+        """
+        batches = []
+        offset = 0
+        for label, problem in self.bag.items():
+            batches += [
+                WeightedMatrixBatch(indices + offset, matrix)
+                for indices, matrix in self._calculate_weighted_matrix_batches_for_problem(
+                    label, problem
+                )
+            ]
+            offset += problem.data.shape[1]
+        return batches
+
+    def _calculate_weighted_matrix_batches_for_problem(
+        self, label: str, problem: UngroupedProblemDescriptor
+    ) -> list[WeightedMatrixBatch]:
+        """Calculates the weighted matrix batches of a dataset.
+
+        The indices of the batches refer to the columns of the data in the bag, which are the
+        global indices of the dataset, unless it is compressed. The batches of index independent
+        datasets are split into chunks of at most :attr:`Scheme.global_chunk_size` indices.
+        """
+        dataset_model = self._filled_dataset_descriptors[label]
+        weight = problem.weight.values if problem.weight is not None else None
+        scale = dataset_model.scale
+
+        if dataset_model.index_dependent():
+            return [
+                WeightedMatrixBatch(
+                    np.asarray([i]),
+                    self._weight_and_scale_matrix(
+                        (label, i), matrix, scale, None if weight is None else weight[:, i]
+                    ),
+                )
+                for i, matrix in enumerate(self.reduced_matrices[label])
+            ]
+
+        # The matrix is the same for every global index, thus all data columns with the same
+        # weight can be solved together.
+        matrix = self.reduced_matrices[label]
+        if weight is None:
+            batches = [
+                WeightedMatrixBatch(
+                    np.arange(problem.data.shape[1]),
+                    self._weight_and_scale_matrix((label, 0), matrix, scale, None),
+                )
+            ]
+        else:
+            batches = [
+                WeightedMatrixBatch(
+                    indices,
+                    self._weight_and_scale_matrix(
+                        (label, i), matrix, scale, weight[:, indices[0]]
+                    ),
+                )
+                for i, indices in enumerate(self._weight_column_groups[label])
+            ]
+        if self._scheme.global_chunk_size is None:
+            return batches
+        return [
+            WeightedMatrixBatch(indices, batch.matrix)
+            for batch in batches
+            for indices in np.array_split(
+                batch.indices, -(-batch.indices.size // self._scheme.global_chunk_size)
+            )
+        ]
+
+    def _weight_and_scale_matrix(
+        self,
+        key: tuple[str, int],
+        matrix: np.ndarray,
+        scale: float | None,
+        weight: np.ndarray | None,
+    ) -> np.ndarray:
+        if scale is None and weight is None:
+            return matrix
+        out = self._get_buffer(("matrix", *key), matrix.shape)
+        if scale is None:
+            return np.multiply(matrix, weight[:, np.newaxis], out=out)
+        np.multiply(matrix, scale, out=out)
+        if weight is not None:
+            out *= weight[:, np.newaxis]
+        return out
+
     def calculate_residual(
         self,
     ) -> tuple[
@@ -117,12 +279,78 @@ class UngroupedProblem(Problem):
     ]:
         """Calculates the residuals."""
 
-        self._reduced_clps = {}
         self._weighted_residuals = {}
         self._residuals = {}
+        self._weighted_matrix_batches = []
+        self._batch_clps = []
 
+        labels = []
+        batches = []
+        offset = 0
         for label, problem in self.bag.items():
-            self._calculate_residual_for_problem(label, problem)
+            for batch in self._calculate_weighted_matrix_batches_for_problem(label, problem):
+                labels.append(label)
+                batches.append(batch)
+                self._weighted_matrix_batches.append(
+                    WeightedMatrixBatch(batch.indices + offset, batch.matrix)
+                )
+            offset += problem.data.shape[1]
+
+        results = self.solve_weighted_matrix_batches(
+            [batch.matrix for batch in batches],
+            [
+                _select_columns(self.bag[label].data.values, batch.indices)
+                for label, batch in zip(labels, batches)
+            ],
+        )
+
+        # The weighted residuals of each dataset are a Fortran ordered view into the penalty,
+        # so that the weighted residual of each global index is contiguous.
+        penalty = self._get_penalty_buffer(sum(problem.data.size for problem in self.bag.values()))
+        weighted_residuals = {}
+        offset = 0
+        for label, problem in self.bag.items():
+            model_size, global_size = problem.data.shape
+            weighted_residuals[label] = (
+                penalty[offset : offset + problem.data.size].reshape((global_size, model_size)).T
+            )
+            offset += problem.data.size
+
+        for label, batch, (clps, batch_residuals) in zip(labels, batches, results):
+            weighted_residuals[label][:, batch.indices] = batch_residuals
+            self._batch_clps.append(clps)
+
+        for label, problem in self.bag.items():
+            residuals = weighted_residuals[label]
+            if problem.weight is not None:
+                residuals = np.divide(
+                    residuals,
+                    problem.weight.values,
+                    out=self._get_buffer(("residual", label), residuals.shape),
+                )
+            self._weighted_residuals[label] = list(weighted_residuals[label].T)
+            self._residuals[label] = list(residuals.T)
+
+        self._retrieve_clps(self._batch_clps)
+
+        return self._reduced_clps, self._clps, self._weighted_residuals, self._residuals
+
+    def _retrieve_clps(self, batch_clps: list[np.ndarray]):
+        """Calculates the reduced and the full clps from the clps of the weighted matrix
+        batches."""
+        self._reduced_clps = {}
+        dataset_indices = []
+        for label, problem in self.bag.items():
+            self._reduced_clps[label] = [None] * problem.data.shape[1]
+            dataset_indices += [(label, i) for i in range(problem.data.shape[1])]
+
+        for batch, clps in zip(self.weighted_matrix_batches, batch_clps):
+            for i, index in enumerate(batch.indices):
+                label, dataset_index = dataset_indices[index]
+                self._reduced_clps[label][dataset_index] = clps[:, i]
+
+        for label, basis in self._compression_bases.items():
+            self._reduced_clps[label] = list((np.asarray(self._reduced_clps[label]).T @ basis).T)
 
         self._clps = (
             self.model.retrieve_clp_function(
@@ -136,41 +364,6 @@ class UngroupedProblem(Problem):
             else self.reduced_clps
         )
 
-        return self._reduced_clps, self._clps, self._weighted_residuals, self._residuals
-
-    def _calculate_residual_for_problem(self, label: str, problem: UngroupedProblemDescriptor):
-        self._reduced_clps[label] = []
-        self._weighted_residuals[label] = []
-        self._residuals[label] = []
-        data = problem.data
-        dataset_model = self._filled_dataset_descriptors[label]
-        global_dimension = dataset_model.get_global_dimension()
-
-        for i in range(len(problem.global_axis)):
-            matrix = (
-                self.reduced_matrices[label][i]
-                if dataset_model.index_dependent()
-                else self.reduced_matrices[label].copy()
-            )  # TODO: .copy() or not
-            if problem.dataset.scale is not None:
-                matrix *= self.filled_dataset_descriptors[label].scale
-
-            if problem.weight is not None:
-                for j in range(matrix.shape[1]):
-                    matrix[:, j] *= problem.weight.isel({global_dimension: i}).values
-
-            clp, residual = self._residual_function(
-                matrix, data.isel({global_dimension: i}).values
-            )
-            self._reduced_clps[label].append(clp)
-            self._weighted_residuals[label].append(residual)
-            if problem.weight is not None:
-                self._residuals[label].append(
-                    residual / problem.weight.isel({global_dimension: i})
-                )
-            else:
-                self._residuals[label].append(residual)
-
     def create_index_dependent_result_dataset(self, label: str, dataset: xr.Dataset) -> xr.Dataset:
         """Creates a result datasets for index dependent matrices."""
 
@@ -228,6 +421,9 @@ class UngroupedProblem(Problem):
             ),
             np.asarray(self.clps[label]),
         )
+        if label in self._compression_bases:
+            self._add_decompressed_residual_to_dataset(label, dataset)
+            return
         dataset["weighted_residual"] = (
             (
                 (model_dimension),
@@ -242,3 +438,21 @@ class UngroupedProblem(Problem):
             ),
             np.transpose(np.asarray(self.residuals[label])),
         )
+
+    def _add_decompressed_residual_to_dataset(self, label: str, dataset: xr.Dataset):
+        """Adds the residual of the full data of a compressed dataset, which is unweighted."""
+        dataset_model = self.filled_dataset_descriptors[label]
+        matrix = self.reduced_matrices[label]
+        if dataset_model.scale is not None:
+            matrix = matrix * dataset_model.scale
+        residual = dataset.data.values - matrix @ np.asarray(self.reduced_clps[label]).T
+        dimensions = (dataset_model.get_model_dimension(), dataset_model.get_global_dimension())
+        dataset["weighted_residual"] = (dimensions, residual)
+        dataset["residual"] = (dimensions, residual)
+
+
+def _select_columns(data: np.ndarray, indices: np.ndarray) -> np.ndarray:
+    """Selects columns of the data, as view if the indices are a contiguous range."""
+    if indices.size > 0 and np.all(np.diff(indices) == 1):
+        return data[:, indices[0] : indices[-1] + 1]
+    return data[:, indices]
@@ -0,0 +1,202 @@
+"""A mapping of result datasets which are created when they are accessed."""
+from __future__ import annotations
+
+import os
+import threading
+from collections.abc import MutableMapping
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING
+
+import numpy as np
+import xarray as xr
+from xarray.backends import BackendArray
+from xarray.core import indexing
+
+if TYPE_CHECKING:
+    from typing import Callable
+    from typing import Hashable
+    from typing import Iterator
+
+# renamed in xarray 0.18
+_LazilyIndexedArray = getattr(indexing, "LazilyIndexedArray", None) or getattr(
+    indexing, "LazilyOuterIndexedArray"
+)
+
+
+class LazyResultData(MutableMapping):
+    """A mapping of dataset labels to result datasets, which creates each dataset on first access.
+
+    Creating a result dataset adds the matrices, clps, residuals and their singular value
+    decompositions and runs the finalization of the model, which can take a considerable
+    amount of time for large datasets. With the lazy mapping only the accessed datasets are
+    created, :meth:`materialize` creates the remaining datasets in parallel. The singular value
+    decompositions of a created dataset are calculated once their variables are read, see
+    :func:`add_lazy_svd_to_dataset`.
+
+    The mapping can be used like a ``dict`` and gets pickled as one, with all datasets created.
+    """
+
+    def __init__(self, labels: list[str], create_dataset: Callable[[str], xr.Dataset]):
+        """Initializes a mapping without any created dataset.
+
+        Parameters
+        ----------
+        labels : list[str]
+            The labels of the datasets.
+        create_dataset : Callable[[str], xr.Dataset]
+            A function creating the result dataset of a label. It gets released once all
+            datasets have been created.
+        """
+        self._labels = list(labels)
+        self._create_dataset = create_dataset
+        self._datasets: dict[str, xr.Dataset] = {}
+        self._locks = {label: threading.Lock() for label in self._labels}
+
+    @property
+    def created_labels(self) -> list[str]:
+        """The labels of the datasets which have been created or set."""
+        return [label for label in self._labels if label in self._datasets]
+
+    def __getitem__(self, label: str) -> xr.Dataset:
+        if label not in self._datasets:
+            if label not in self._locks:
+                raise KeyError(label)
+            with self._locks[label]:
+                if label not in self._datasets:
+                    self._datasets[label] = self._create_dataset(label)
+                    self._release_create_dataset()
+        return self._datasets[label]
+
+    def __setitem__(self, label: str, dataset: xr.Dataset):
+        if label not in self._labels:
+            self._labels.append(label)
+            self._locks[label] = threading.Lock()
+        self._datasets[label] = dataset
+        self._release_create_dataset()
+
+    def __delitem__(self, label: str):
+        self._labels.remove(label)
+        del self._locks[label]
+        self._datasets.pop(label, None)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._labels))
+
+    def __len__(self) -> int:
+        return len(self._labels)
+
+    def __contains__(self, label: object) -> bool:
+        return label in self._locks
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(labels={self._labels}, created={self.created_labels})"
+
+    def __reduce__(self):
+        return dict, (self.materialize(),)
+
+    def materialize(self, number_of_workers: int | None = None) -> dict[str, xr.Dataset]:
+        """Creates all datasets which have not been created yet.
+
+        Parameters
+        ----------
+        number_of_workers : int | None
+            The number of threads creating the datasets in parallel, defaults to the number of
+            CPUs. With one worker the datasets are created serially.
+
+        Returns
+        -------
+        dict[str, xr.Dataset]
+            All datasets by label.
+        """
+        missing_labels = [label for label in self._labels if label not in self._datasets]
+        number_of_workers = min(number_of_workers or os.cpu_count() or 1, len(missing_labels))
+        if number_of_workers > 1:
+            with ThreadPoolExecutor(number_of_workers) as executor:
+                list(executor.map(self.__getitem__, missing_labels))
+        else:
+            for label in missing_labels:
+                self[label]
+        return {label: self._datasets[label] for label in self._labels}
+
+    def _release_create_dataset(self):
+        if len(self._datasets) == len(self._labels):
+            self._create_dataset = None
+
+
+def add_lazy_svd_to_dataset(
+    dataset: xr.Dataset, name: str, lsv_dim: Hashable, rsv_dim: Hashable, data_array: xr.DataArray
+):
+    """Adds the SVD of a data array to a dataset like
+    :func:`glotaran.io.prepare_dataset.add_svd_to_dataset`, but the SVD is only calculated
+    once the values of one of its variables are read.
+
+    Parameters
+    ----------
+    dataset : xr.Dataset
+        Dataset the SVD variables are added to.
+    name : str
+        The name of the data array, which prefixes the names of the SVD variables.
+    lsv_dim : Hashable
+        Name of the dimension of the left singular vectors.
+    rsv_dim : Hashable
+        Name of the dimension of the right singular vectors.
+    data_array : xr.DataArray
+        The data array with the dimensions ``(lsv_dim, rsv_dim)``.
+    """
+    if f"{name}_singular_values" in dataset:
+        return
+    svd = _LazySvd(data_array)
+    rows, columns = data_array.shape
+    size = min(rows, columns)
+    dtype = np.result_type(data_array.dtype, np.float32)
+    for index, variable, dims, shape in [
+        (0, "left_singular_vectors", (lsv_dim, "left_singular_value_index"), (rows, size)),
+        (1, "singular_values", ("singular_value_index",), (size,)),
+        (2, "right_singular_vectors", ("right_singular_value_index", rsv_dim), (size, columns)),
+    ]:
+        dataset[f"{name}_{variable}"] = xr.Variable(
+            dims, _LazilyIndexedArray(_LazySvdArray(svd, index, shape, dtype))
+        )
+
+
+class _LazySvd:
+    """The SVD of a data array, which is calculated when one of its parts is read first."""
+
+    def __init__(self, data_array: xr.DataArray):
+        self._data_array = data_array
+        self._svd: tuple[np.ndarray, np.ndarray, np.ndarray] | None = None
+        self._lock = threading.Lock()
+
+    def __getitem__(self, index: int) -> np.ndarray:
+        with self._lock:
+            if self._svd is None:
+                self._svd = np.linalg.svd(self._data_array.values, full_matrices=False)
+                self._data_array = None
+        return self._svd[index]
+
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state: dict):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+
+class _LazySvdArray(BackendArray):
+    """A part of a :class:`_LazySvd` as array of an ``xarray`` variable."""
+
+    def __init__(self, svd: _LazySvd, index: int, shape: tuple[int, ...], dtype: np.dtype):
+        self.svd = svd
+        self.index = index
+        self.shape = shape
+        self.dtype = dtype
+
+    def __getitem__(self, key: indexing.ExplicitIndexer) -> np.ndarray:
+        return indexing.explicit_indexing_adapter(
+            key, self.shape, indexing.IndexingSupport.BASIC, self._getitem
+        )
+
+    def _getitem(self, key: tuple) -> np.ndarray:
+        return self.svd[self.index][key]
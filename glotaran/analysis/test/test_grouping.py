@@ -166,3 +166,60 @@ def test_multi_dataset_overlap():
     assert np.array_equal(bag[4].descriptor[0].axis["c"], axis_c_1)
     assert np.array_equal(bag[5].descriptor[0].axis["c"], axis_c_2)
     assert [p.descriptor[0].indices["e"] for p in bag[1:4]] == [0, 1, 2]
+
+
+def test_multi_dataset_bag_buffer():
+    model = SimpleTestModel.from_dict(
+        {
+            "megacomplex": {"m1": {"is_index_dependent": False}},
+            "dataset": {
+                "dataset1": {
+                    "megacomplex": ["m1"],
+                },
+                "dataset2": {
+                    "megacomplex": ["m1"],
+                },
+            },
+        }
+    )
+    model.grouped = lambda: True
+    parameters = ParameterGroup.from_list([1, 10])
+
+    axis_e_1 = [1, 2, 4]
+    axis_c_1 = [5, 7]
+    axis_e_2 = [0, 1, 3, 4]
+    axis_c_2 = [5, 7, 9]
+    data_1 = np.arange(6, dtype=np.float64).reshape((3, 2))
+    data_2 = -np.arange(12, dtype=np.float64).reshape((4, 3))
+    data = {
+        "dataset1": xr.DataArray(data_1, coords=[("e", axis_e_1), ("c", axis_c_1)]).to_dataset(
+            name="data"
+        ),
+        "dataset2": xr.DataArray(data_2, coords=[("e", axis_e_2), ("c", axis_c_2)]).to_dataset(
+            name="data"
+        ),
+    }
+
+    scheme = Scheme(model, parameters, data)
+    problem = GroupedProblem(scheme)
+    bag = problem.bag
+
+    assert np.array_equal(problem._full_axis, [0, 1, 2, 3, 4])
+    assert [p.group for p in bag] == [
+        "dataset2",
+        "dataset1dataset2",
+        "dataset1",
+        "dataset2",
+        "dataset1dataset2",
+    ]
+    assert np.array_equal(bag.dataset_indices["dataset1"].groups, [1, 2, 4])
+    assert np.array_equal(bag.dataset_indices["dataset2"].groups, [0, 1, 3, 4])
+    assert np.array_equal(bag.dataset_indices["dataset2"].offsets, [0, 2, 0, 2])
+
+    assert bag.data.size == data_1.size + data_2.size
+    assert all(np.shares_memory(p.data, bag.data) for p in bag)
+    assert np.array_equal(bag[4].data, np.concatenate([data_1[2], data_2[3]]))
+    assert np.array_equal(bag[3].data, data_2[2])
+    assert np.array_equal(
+        bag.stack_data(np.asarray([1, 4])), np.stack([bag[1].data, bag[4].data], axis=1)
+    )
@@ -0,0 +1,98 @@
+import numpy as np
+import pytest
+
+from glotaran.analysis.matrix_cache import MatrixCache
+from glotaran.analysis.parameter_binding import ParameterBinding
+from glotaran.analysis.problem_grouped import GroupedProblem
+from glotaran.analysis.problem_ungrouped import UngroupedProblem
+from glotaran.analysis.simulation import simulate
+from glotaran.analysis.test.models import OneCompartmentDecay
+from glotaran.analysis.test.models import ThreeDatasetDecay as suite
+from glotaran.analysis.util import LabelAndMatrix
+from glotaran.project import Scheme
+
+
+def test_matrix_cache_lru():
+    cache = MatrixCache(2)
+    matrices = [LabelAndMatrix(["s1"], np.full((2, 1), i)) for i in range(3)]
+
+    cache.put("a", matrices[0])
+    cache.put("b", matrices[1])
+    assert cache.get("a") is matrices[0]
+    cache.put("c", matrices[2])
+
+    assert len(cache) == 2
+    assert cache.get("b") is None
+    assert cache.get("a") is matrices[0]
+    assert cache.get("c") is matrices[2]
+    assert cache.hits == 3
+    assert cache.misses == 1
+
+
+def test_matrix_parameter_values_exclude_scale():
+    model = OneCompartmentDecay.model
+    parameters = OneCompartmentDecay.initial_parameters.copy()
+    binding = ParameterBinding(
+        parameters, {"dataset1": model.dataset["dataset1"].fill(model, parameters)}
+    )
+    values = binding.get_matrix_parameter_values("dataset1")
+    assert values == (("1", parameters.get("1").value),)
+
+    parameters.get("2").value = 3
+    assert values == binding.get_matrix_parameter_values("dataset1")
+
+    parameters.get("1").value = 2e-3
+    assert values != binding.get_matrix_parameter_values("dataset1")
+
+
+@pytest.mark.parametrize("index_dependent", [True, False])
+@pytest.mark.parametrize("grouped", [True, False])
+def test_problem_matrix_cache(grouped, index_dependent):
+    model = suite.model
+    model.is_grouped = grouped
+    model.megacomplex["m1"].is_index_dependent = index_dependent
+
+    data = {}
+    for i in range(3):
+        e_axis = getattr(suite, "e_axis" if i == 0 else f"e_axis{i+1}")
+        c_axis = getattr(suite, "c_axis" if i == 0 else f"c_axis{i+1}")
+        data[f"dataset{i+1}"] = simulate(
+            suite.sim_model, f"dataset{i+1}", suite.wanted_parameters, {"e": e_axis, "c": c_axis}
+        )
+
+    problems = [
+        (GroupedProblem if grouped else UngroupedProblem)(
+            Scheme(
+                model=model,
+                parameters=suite.initial_parameters,
+                data=data,
+                group_tolerance=0.1,
+                matrix_cache_size=matrix_cache_size,
+            )
+        )
+        for matrix_cache_size in [None, 0]
+    ]
+    problem, uncached_problem = problems
+
+    number_of_matrices = 5 if index_dependent else 3
+    assert problem.number_of_matrices == number_of_matrices
+    assert problem.matrix_cache.size == 2 * number_of_matrices
+    assert uncached_problem.matrix_cache.size == 0
+
+    problem.full_penalty
+    assert problem.matrix_cache.misses == number_of_matrices
+    assert problem.matrix_cache.hits == 0
+
+    # only 'dataset2' and 'dataset3' read parameter '2'
+    for p in problems:
+        p.parameters.set_from_label_and_value_arrays(["2"], [0.3])
+        p.reset()
+    assert np.array_equal(problem.full_penalty, uncached_problem.full_penalty)
+    assert problem.matrix_cache.hits == 1
+    assert problem.matrix_cache.misses == 2 * number_of_matrices - 1
+    assert len(problem.matrix_cache) == 2 * number_of_matrices - 1
+    assert len(uncached_problem.matrix_cache) == 0
+
+    problem.reset()
+    problem.full_penalty
+    assert problem.matrix_cache.hits == number_of_matrices + 1
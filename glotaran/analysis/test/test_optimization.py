@@ -1,20 +1,29 @@
+import dataclasses
+import os
+
 import numpy as np
 import pytest
 import xarray as xr
 
+from glotaran.analysis.optimize import generate_start_parameters
 from glotaran.analysis.optimize import optimize
+from glotaran.analysis.optimize import optimize_many
+from glotaran.analysis.optimize import optimize_multistart
 from glotaran.analysis.simulation import simulate
 from glotaran.analysis.test.models import DecayModel
 from glotaran.analysis.test.models import MultichannelMulticomponentDecay
 from glotaran.analysis.test.models import OneCompartmentDecay
 from glotaran.analysis.test.models import ThreeDatasetDecay
 from glotaran.analysis.test.models import TwoCompartmentDecay
+from glotaran.builtin.models.kinetic_image import KineticImageModel
+from glotaran.parameter import ParameterGroup
 from glotaran.project import Scheme
 
 
 @pytest.mark.parametrize("index_dependent", [True, False])
 @pytest.mark.parametrize("grouped", [True, False])
 @pytest.mark.parametrize("weight", [True, False])
+@pytest.mark.parametrize("jacobian_method", ["FiniteDifferences", "Kaufman"])
 @pytest.mark.parametrize(
     "method",
     [
@@ -28,7 +37,7 @@ from glotaran.project import Scheme
     # MultichannelMulticomponentDecay],
     [OneCompartmentDecay, TwoCompartmentDecay, ThreeDatasetDecay, MultichannelMulticomponentDecay],
 )
-def test_optimization(suite, index_dependent, grouped, weight, method):
+def test_optimization(suite, index_dependent, grouped, weight, method, jacobian_method):
     model = suite.model
 
     model.is_grouped = grouped
@@ -95,6 +104,7 @@ def test_optimization(suite, index_dependent, grouped, weight, method):
         maximum_number_function_evaluations=10,
         group_tolerance=0.1,
         optimization_method=method,
+        jacobian_method=jacobian_method,
     )
 
     result = optimize(scheme)
@@ -144,3 +154,462 @@ def test_optimization(suite, index_dependent, grouped, weight, method):
     else:
         assert not model.constrain_matrix_function_called
         assert not model.retrieve_clp_function_called
+
+
+@pytest.mark.parametrize("index_dependent", [True, False])
+@pytest.mark.parametrize("grouped", [True, False])
+@pytest.mark.parametrize("executor", ["thread", "process"])
+def test_optimization_executor(executor, grouped, index_dependent):
+    suite = MultichannelMulticomponentDecay
+    model = suite.model
+    model.is_grouped = grouped
+    model.megacomplex["m1"].is_index_dependent = index_dependent
+
+    dataset = simulate(
+        suite.sim_model,
+        "dataset1",
+        suite.wanted_parameters,
+        {"e": suite.e_axis, "c": suite.c_axis},
+    )
+    results = []
+    for scheme_executor in ["serial", executor]:
+        scheme = Scheme(
+            model=model,
+            parameters=suite.initial_parameters,
+            data={"dataset1": dataset},
+            maximum_number_function_evaluations=5,
+            executor=scheme_executor,
+            number_of_workers=2,
+        )
+        results.append(optimize(scheme))
+
+    serial_result, executor_result = results
+    assert executor_result.success
+    assert np.allclose(executor_result.cost, serial_result.cost)
+    assert np.allclose(
+        executor_result.optimized_parameters.get_label_value_and_bounds_arrays()[1],
+        serial_result.optimized_parameters.get_label_value_and_bounds_arrays()[1],
+    )
+    assert np.allclose(
+        executor_result.data["dataset1"].residual, serial_result.data["dataset1"].residual
+    )
+
+
+@pytest.mark.parametrize("index_dependent", [True, False])
+@pytest.mark.parametrize("grouped", [True, False])
+@pytest.mark.parametrize("weight", [True, False])
+@pytest.mark.parametrize("jacobian_method", ["FiniteDifferences", "Kaufman"])
+def test_optimization_preallocate_buffers(jacobian_method, weight, grouped, index_dependent):
+    suite = MultichannelMulticomponentDecay
+    model = suite.model
+    model.is_grouped = grouped
+    model.megacomplex["m1"].is_index_dependent = index_dependent
+
+    dataset = simulate(
+        suite.sim_model,
+        "dataset1",
+        suite.wanted_parameters,
+        {"e": suite.e_axis, "c": suite.c_axis},
+    )
+    if weight:
+        dataset["weight"] = xr.full_like(dataset.data, 1e1)
+        dataset["weight"][0, 0] = 2e1
+    results = []
+    for preallocate_buffers in [False, True]:
+        scheme = Scheme(
+            model=model,
+            parameters=suite.initial_parameters,
+            data={"dataset1": dataset},
+            maximum_number_function_evaluations=10,
+            jacobian_method=jacobian_method,
+            preallocate_buffers=preallocate_buffers,
+        )
+        results.append(optimize(scheme))
+
+    result, buffered_result = results
+    assert buffered_result.success
+    assert np.allclose(buffered_result.cost, result.cost)
+    assert buffered_result.number_of_function_evaluations == result.number_of_function_evaluations
+    assert np.allclose(
+        buffered_result.optimized_parameters.get_label_value_and_bounds_arrays()[1],
+        result.optimized_parameters.get_label_value_and_bounds_arrays()[1],
+    )
+    assert np.allclose(
+        buffered_result.data["dataset1"].residual, result.data["dataset1"].residual
+    )
+
+
+def test_optimization_unsupported_executor():
+    suite = OneCompartmentDecay
+    dataset = simulate(
+        suite.sim_model,
+        "dataset1",
+        suite.wanted_parameters,
+        {"e": suite.e_axis, "c": suite.c_axis},
+    )
+    scheme = Scheme(
+        model=suite.model,
+        parameters=suite.initial_parameters,
+        data={"dataset1": dataset},
+        executor="cluster",
+    )
+    with pytest.raises(ValueError, match="Unsupported executor 'cluster'"):
+        optimize(scheme)
+
+
+@pytest.mark.parametrize("method", ["LatinHypercube", "Perturbation"])
+def test_generate_start_parameters(method):
+    parameters = TwoCompartmentDecay.initial_parameters.copy()
+    parameters.get("1").minimum = 1e-4
+    parameters.get("1").maximum = 0.1
+    labels, values, lower_bounds, upper_bounds = parameters.get_label_value_and_bounds_arrays(
+        exclude_non_vary=True
+    )
+
+    starts = generate_start_parameters(parameters, 11, method=method, spread=0.1, seed=0)
+
+    assert len(starts) == 11
+    assert np.array_equal(starts[0].get_label_value_and_bounds_arrays()[1], values)
+    start_values = np.asarray(
+        [start.get_label_value_and_bounds_arrays(exclude_non_vary=True)[1] for start in starts]
+    )
+    assert np.all(start_values >= lower_bounds)
+    assert np.all(start_values <= upper_bounds)
+    assert np.all(np.abs(start_values[:, 1] - values[1]) <= 0.1 * max(1, abs(values[1])))
+    if method == "LatinHypercube":
+        # one sample per stratum of the bounds
+        strata = np.floor((start_values[1:, 0] - 1e-4) / (0.1 - 1e-4) * 10)
+        assert sorted(strata) == list(range(10))
+
+    with pytest.raises(ValueError, match="Unsupported start method"):
+        generate_start_parameters(parameters, 2, method="Grid")
+
+
+def test_optimize_multistart():
+    suite = TwoCompartmentDecay
+    model = suite.model
+    model.is_grouped = False
+    dataset = simulate(
+        suite.sim_model,
+        "dataset1",
+        suite.wanted_parameters,
+        {"e": suite.e_axis, "c": suite.c_axis},
+    )
+    scheme = Scheme(
+        model=model,
+        parameters=suite.initial_parameters,
+        data={"dataset1": dataset},
+        maximum_number_function_evaluations=10,
+    )
+
+    serial_results = optimize_multistart(scheme, starts=3, seed=0, executor="serial")
+    process_results = optimize_multistart(
+        scheme, starts=3, seed=0, executor="process", number_of_workers=2
+    )
+
+    chi_squares = [result.chi_square for result in serial_results]
+    assert chi_squares == sorted(chi_squares)
+    for serial_result, process_result in zip(serial_results, process_results):
+        assert process_result.success
+        assert np.isclose(process_result.chi_square, serial_result.chi_square)
+        assert process_result.scheme.data is scheme.data
+        assert np.array_equal(
+            process_result.scheme.parameters.get_label_value_and_bounds_arrays()[1],
+            serial_result.scheme.parameters.get_label_value_and_bounds_arrays()[1],
+        )
+        assert np.allclose(
+            process_result.data["dataset1"].residual, serial_result.data["dataset1"].residual
+        )
+
+
+class _ExitOnUnpickle:
+    """Kills the worker process which unpickles it."""
+
+    def __reduce__(self):
+        return os._exit, (1,)
+
+
+def test_optimize_many():
+    suite = OneCompartmentDecay
+    model = suite.model
+    model.is_grouped = False
+    dataset = simulate(
+        suite.sim_model,
+        "dataset1",
+        suite.wanted_parameters,
+        {"e": suite.e_axis, "c": suite.c_axis},
+    )
+    scheme = Scheme(
+        model=model,
+        parameters=suite.initial_parameters,
+        data={"dataset1": dataset},
+        maximum_number_function_evaluations=10,
+    )
+    schemes = [
+        scheme,
+        dataclasses.replace(scheme, optimization_method="Newton"),
+        dataclasses.replace(scheme, data={"dataset1": _ExitOnUnpickle()}),
+        scheme,
+    ]
+
+    outcomes = sorted(optimize_many(schemes, number_of_workers=2))
+
+    assert [outcome.index for outcome in outcomes] == [0, 1, 2, 3]
+    expected = optimize(scheme, verbose=False)
+    for outcome in outcomes[0], outcomes[3]:
+        assert outcome.error is None
+        assert outcome.result.success
+        assert np.isclose(outcome.result.chi_square, expected.chi_square)
+        assert outcome.result.scheme.data["dataset1"] is dataset
+    assert outcomes[1].result is None
+    assert isinstance(outcomes[1].error, ValueError)
+    assert outcomes[2].result is None
+    assert outcomes[2].error is not None
+
+
+@pytest.mark.parametrize("jacobian_method", ["FiniteDifferences", "Kaufman"])
+def test_optimization_timings(jacobian_method):
+    suite = OneCompartmentDecay
+    model = suite.model
+    model.is_grouped = False
+    model.megacomplex["m1"].is_index_dependent = False
+    dataset = simulate(
+        suite.sim_model,
+        "dataset1",
+        suite.wanted_parameters,
+        {"e": suite.e_axis, "c": suite.c_axis},
+    )
+    scheme = Scheme(
+        model=model,
+        parameters=suite.initial_parameters,
+        data={"dataset1": dataset},
+        maximum_number_function_evaluations=10,
+        jacobian_method=jacobian_method,
+    )
+    result = optimize(scheme)
+    timings = result.timings
+
+    for phase in [
+        "optimize",
+        "evaluate_penalty",
+        "calculate_matrix",
+        "reduce_matrix",
+        "solve",
+        "additional_penalty",
+        "create_result_data",
+    ]:
+        assert timings[phase]["calls"] > 0
+        assert timings[phase]["time"] >= 0
+    # the finite differences of the jacobian are not counted as function evaluations
+    assert timings["evaluate_penalty"]["calls"] >= result.number_of_function_evaluations
+    assert timings["optimize"]["time"] >= timings["evaluate_penalty"]["time"]
+    # the dense finite difference Jacobian is calculated by the optimizer
+    assert ("evaluate_jacobian" in timings) == (jacobian_method == "Kaufman")
+    if jacobian_method == "Kaufman":
+        assert timings["evaluate_jacobian"]["calls"] == result.number_of_jacobian_evaluations
+    assert timings["matrix_cache"]["misses"] > 0
+    assert timings["matrix_cache"]["hits"] >= 0
+
+
+@pytest.mark.parametrize("nnls", [True, False])
+@pytest.mark.parametrize("jacobian_method", ["FiniteDifferences", "Kaufman"])
+@pytest.mark.parametrize("grouped", [True, False])
+def test_optimization_single_precision(grouped, jacobian_method, nnls):
+    suite = OneCompartmentDecay
+    model = suite.model
+    model.is_grouped = grouped
+    model.megacomplex["m1"].is_index_dependent = False
+    dataset = simulate(
+        suite.sim_model,
+        "dataset1",
+        suite.wanted_parameters,
+        {"e": suite.e_axis, "c": suite.c_axis},
+    )
+    dataset.data.values += np.random.default_rng(0).normal(scale=1e-2, size=dataset.data.shape)
+
+    results = [
+        optimize(
+            Scheme(
+                model=model,
+                parameters=suite.initial_parameters,
+                data={"dataset1": dataset},
+                jacobian_method=jacobian_method,
+                non_negative_least_squares=nnls,
+                precision=precision,
+            )
+        )
+        for precision in ["float64", "float32"]
+    ]
+    result, single_result = results
+
+    assert single_result.success
+    assert single_result.data["dataset1"].residual.dtype == np.float32
+    assert single_result.jacobian.dtype == np.float64
+    assert np.isclose(
+        single_result.optimized_parameters.get("1").value,
+        result.optimized_parameters.get("1").value,
+        rtol=1e-4,
+    )
+    assert np.isclose(single_result.chi_square, result.chi_square, rtol=1e-5)
+
+
+@pytest.mark.parametrize("jacobian_method", ["FiniteDifferences", "Kaufman"])
+def test_optimization_svd_compression(jacobian_method):
+    suite = MultichannelMulticomponentDecay
+    model = suite.model
+    model.is_grouped = False
+    model.megacomplex["m1"].is_index_dependent = False
+    dataset = simulate(
+        suite.sim_model,
+        "dataset1",
+        suite.wanted_parameters,
+        {"e": suite.e_axis, "c": suite.c_axis},
+    )
+    scheme = Scheme(
+        model=model,
+        parameters=suite.initial_parameters,
+        data={"dataset1": dataset},
+        jacobian_method=jacobian_method,
+    )
+
+    result = optimize(scheme)
+    compressed_result = optimize(dataclasses.replace(scheme, svd_compression=4))
+
+    assert compressed_result.success
+    assert compressed_result.number_of_data_points == result.number_of_data_points
+    assert compressed_result.jacobian.shape[0] < result.jacobian.shape[0]
+    assert np.isclose(compressed_result.chi_square, result.chi_square)
+    for label, parameter in result.optimized_parameters.all():
+        assert np.isclose(
+            compressed_result.optimized_parameters.get(label).value, parameter.value, rtol=1e-4
+        )
+    assert compressed_result.data["dataset1"].residual.shape == dataset.data.shape
+    assert np.allclose(
+        compressed_result.data["dataset1"].clp, result.data["dataset1"].clp, rtol=1e-3
+    )
+
+
+@pytest.mark.parametrize("nnls", [True, False])
+@pytest.mark.parametrize("weight", [True, False])
+@pytest.mark.parametrize("jacobian_method", ["FiniteDifferences", "Kaufman"])
+def test_optimization_global_chunk_size(jacobian_method, weight, nnls):
+    suite = MultichannelMulticomponentDecay
+    model = suite.model
+    model.is_grouped = False
+    model.megacomplex["m1"].is_index_dependent = False
+    dataset = simulate(
+        suite.sim_model,
+        "dataset1",
+        suite.wanted_parameters,
+        {"e": suite.e_axis, "c": suite.c_axis},
+    )
+    if weight:
+        dataset["weight"] = xr.ones_like(dataset.data) * 0.5
+        dataset.weight[:, 10:20] = 2
+    scheme = Scheme(
+        model=model,
+        parameters=suite.initial_parameters,
+        data={"dataset1": dataset},
+        jacobian_method=jacobian_method,
+        non_negative_least_squares=nnls,
+        maximum_number_function_evaluations=5,
+    )
+
+    result = optimize(scheme)
+    chunked_result = optimize(dataclasses.replace(scheme, global_chunk_size=7))
+
+    assert chunked_result.number_of_function_evaluations == result.number_of_function_evaluations
+    assert np.isclose(chunked_result.chi_square, result.chi_square)
+    # The chunks change the batches whose normal equations are solved together by the nnls
+    # method, the finite differences amplify the resulting rounding differences of the clps.
+    if jacobian_method == "Kaufman" or not nnls:
+        assert np.allclose(
+            chunked_result.jacobian, result.jacobian, atol=1e-6 * np.abs(result.jacobian).max()
+        )
+    assert np.allclose(chunked_result.data["dataset1"].residual, result.data["dataset1"].residual)
+    assert np.allclose(chunked_result.data["dataset1"].clp, result.data["dataset1"].clp)
+
+
+@pytest.mark.parametrize("method", ["TrustRegionReflection", "Dogbox", "Levenberg-Marquardt"])
+def test_optimization_jacobian_sparsity(method):
+    # a model without additional penalty, whose rows would depend on all parameters
+    model = KineticImageModel.from_dict(
+        {
+            "initial_concentration": {
+                "j1": {"compartments": ["s1"], "parameters": ["j.1"]},
+            },
+            "megacomplex": {f"mc{i}": {"k_matrix": [f"k{i}"]} for i in [1, 2]},
+            "k_matrix": {f"k{i}": {"matrix": {("s1", "s1"): f"k.{i}"}} for i in [1, 2]},
+            "dataset": {
+                f"dataset{i}": {"initial_concentration": "j1", "megacomplex": [f"mc{i}"]}
+                for i in [1, 2]
+            },
+        }
+    )
+    wanted_parameters = ParameterGroup.from_dict(
+        {"j": [["1", 1, {"vary": False}]], "k": [101e-3, 202e-3]}
+    )
+    axis = {"time": np.arange(0, 50, 1.5), "pixel": np.asarray([0, 1])}
+    clp = xr.DataArray([[1], [2]], coords=[("pixel", [0, 1]), ("clp_label", ["s1"])])
+    data = {
+        label: simulate(model, label, wanted_parameters, axis, clp)
+        for label in ["dataset1", "dataset2"]
+    }
+    initial_parameters = ParameterGroup.from_dict(
+        {"j": [["1", 1, {"vary": False}]], "k": [100e-3, 200e-3]}
+    )
+    results = [
+        optimize(
+            Scheme(
+                model=model,
+                parameters=initial_parameters,
+                data=data,
+                optimization_method=method,
+                jacobian_sparsity=jacobian_sparsity,
+            )
+        )
+        for jacobian_sparsity in [False, True]
+    ]
+    dense_result, sparse_result = results
+
+    assert sparse_result.success
+    assert sparse_result.timings["evaluate_jacobian"]["calls"] > 0
+    assert "evaluate_jacobian" not in dense_result.timings
+    assert np.allclose(
+        sparse_result.jacobian,
+        dense_result.jacobian,
+        atol=1e-6 * np.abs(dense_result.jacobian).max(),
+    )
+    for label, parameter in wanted_parameters.all():
+        assert np.isclose(sparse_result.optimized_parameters.get(label).value, parameter.value)
+    # the parameters of both datasets are perturbed together
+    assert method == "Levenberg-Marquardt" or (
+        sparse_result.timings["evaluate_penalty"]["calls"]
+        - sparse_result.number_of_function_evaluations
+        == sparse_result.number_of_jacobian_evaluations
+    )
+
+
+def test_optimization_jacobian_sparsity_unsupported(monkeypatch):
+    from glotaran.analysis import optimize as optimize_module
+
+    monkeypatch.setattr(optimize_module, "approx_derivative", None)
+    suite = ThreeDatasetDecay
+    data = {
+        label: simulate(
+            suite.sim_model, label, suite.wanted_parameters, {"e": suite.e_axis, "c": suite.c_axis}
+        )
+        for label in ["dataset1", "dataset2", "dataset3"]
+    }
+    scheme = Scheme(
+        model=suite.model,
+        parameters=suite.initial_parameters,
+        data=data,
+        maximum_number_function_evaluations=5,
+    )
+
+    result = optimize(scheme)
+    with pytest.warns(UserWarning, match="sparse finite difference Jacobian is not supported"):
+        fallback_result = optimize(dataclasses.replace(scheme, jacobian_sparsity=True))
+
+    assert np.allclose(fallback_result.jacobian, result.jacobian)
@@ -0,0 +1,82 @@
+import numpy as np
+
+from glotaran.analysis.parameter_binding import find_expression_dependencies
+from glotaran.analysis.parameter_binding import find_parameters
+from glotaran.analysis.problem_ungrouped import UngroupedProblem
+from glotaran.analysis.simulation import simulate
+from glotaran.analysis.test.models import TwoCompartmentDecay as suite
+from glotaran.parameter import ParameterGroup
+from glotaran.project import Scheme
+
+
+def create_problem(parameters: ParameterGroup) -> UngroupedProblem:
+    dataset = simulate(
+        suite.sim_model,
+        "dataset1",
+        suite.wanted_parameters,
+        {"e": suite.e_axis, "c": suite.c_axis},
+    )
+    scheme = Scheme(model=suite.model, parameters=parameters, data={"dataset1": dataset})
+    return UngroupedProblem(scheme)
+
+
+def test_parameter_binding_updates_in_place():
+    problem = create_problem(suite.initial_parameters)
+    problem.full_penalty
+    descriptor = problem.filled_dataset_descriptors["dataset1"]
+
+    problem.update_parameters(["1", "2"], [1e-3, 2e-4])
+    assert problem.filled_dataset_descriptors["dataset1"] is descriptor
+    assert [p.value for p in descriptor.kinetic] == [1e-3, 2e-4]
+    assert problem.parameters.get("2").value == 2e-4
+
+    wanted_problem = create_problem(ParameterGroup.from_list([1e-3, 2e-4]))
+    assert np.array_equal(problem.full_penalty, wanted_problem.full_penalty)
+
+    problem.parameters.get("1").value = 5e-3
+    problem.reset()
+    assert problem.filled_dataset_descriptors["dataset1"] is descriptor
+    assert descriptor.kinetic[0].value == 5e-3
+
+
+def test_parameter_binding_replaced_parameters():
+    problem = create_problem(suite.initial_parameters)
+    descriptor = problem.filled_dataset_descriptors["dataset1"]
+
+    problem.parameters = suite.wanted_parameters.copy()
+    assert problem.filled_dataset_descriptors["dataset1"] is not descriptor
+    assert [p.value for p in problem.filled_dataset_descriptors["dataset1"].kinetic] == [
+        p.value for _, p in suite.wanted_parameters.all()
+    ]
+
+
+def test_parameter_binding_expression():
+    parameters = ParameterGroup.from_list([1e-3, [0, {"expr": "$1 * 2"}]])
+    problem = create_problem(parameters)
+
+    problem.update_parameters(["1"], [4e-3])
+    descriptor = problem.filled_dataset_descriptors["dataset1"]
+    assert [p.value for p in descriptor.kinetic] == [4e-3, 8e-3]
+
+
+def test_find_parameters():
+    problem = create_problem(suite.initial_parameters)
+    descriptor = problem.filled_dataset_descriptors["dataset1"]
+    assert [p.full_label for p in find_parameters(descriptor)] == ["1", "2"]
+    assert find_parameters(descriptor, exclude=["kinetic"]) == []
+
+
+def test_parameter_binding_dataset_parameter_labels():
+    parameters = ParameterGroup.from_list(
+        [1e-3, [0, {"expr": "$3 * 2"}], [5e-3, {"expr": "$4"}], 7]
+    )
+    problem = create_problem(parameters)
+    problem.full_penalty
+
+    assert problem._parameter_binding.get_dataset_parameter_labels("dataset1") == {
+        "1",
+        "2",
+        "3",
+        "4",
+    }
+    assert find_expression_dependencies(parameters, ["1"]) == {"1"}
@@ -0,0 +1,159 @@
+import subprocess
+import sys
+import textwrap
+
+import numpy as np
+import pytest
+
+from glotaran.analysis.parameter_history import ParameterHistory
+from glotaran.analysis.problem_ungrouped import UngroupedProblem
+from glotaran.analysis.simulation import simulate
+from glotaran.analysis.test.models import TwoCompartmentDecay as suite
+from glotaran.project import Scheme
+
+
+def test_parameter_history_ring_buffer():
+    history = ParameterHistory(["a", "b"], 3)
+    for i in range(5):
+        history.append([i, 2 * i], 10 * i)
+
+    assert len(history) == 5
+    assert history.number_of_retained_records == 3
+    assert np.array_equal(history.values, [[2, 4], [3, 6], [4, 8]])
+    assert np.array_equal(history.costs, [20, 30, 40])
+
+    values, cost = history[-1]
+    assert np.array_equal(values, [4, 8])
+    assert cost == 40
+    assert np.array_equal(history[2][0], [2, 4])
+
+    # the records which are not retained are read from a temporary spill file
+    values, cost = history[1]
+    assert np.array_equal(values, [1, 2])
+    assert cost == 10
+    with pytest.raises(IndexError):
+        history[5]
+    with pytest.raises(IndexError):
+        history[-6]
+
+    history.close()
+    assert np.array_equal(history[2][0], [2, 4])
+    with pytest.raises(IndexError):
+        history[1]
+
+
+def test_parameter_history_spill_file(tmp_path):
+    spill_file = tmp_path / "history.bin"
+    spill_file.write_bytes(b"outdated")
+    history = ParameterHistory(["a", "b"], 2, spill_file)
+    for i in range(5):
+        history.append([i, 2 * i], 10 * i)
+
+    assert np.array_equal(history[0][0], [0, 0])
+    assert history[1][1] == 10
+
+    history.close()
+    records = np.fromfile(spill_file).reshape((-1, 3))
+    assert np.array_equal(records[:, 0], [0, 10, 20, 30, 40])
+    assert np.array_equal(records[:, 1:], [[i, 2 * i] for i in range(5)])
+
+    history.append([5, 10], 50)
+    history.close()
+    assert np.array_equal(np.fromfile(spill_file).reshape((-1, 3))[:, 0], np.arange(6) * 10)
+    assert history[0][1] == 0
+    history.close()
+
+
+def test_parameter_history_no_spill_without_overflow(monkeypatch):
+    def fail():
+        raise AssertionError("The history has been spilled.")
+
+    monkeypatch.setattr("tempfile.TemporaryFile", fail)
+    history = ParameterHistory(["a"], 2)
+    history.append([1], 1)
+    history.append([2], 2)
+    history.flush()
+    history.close()
+    assert history[0][1] == 1
+
+
+def test_parameter_history_invalid_size():
+    with pytest.raises(ValueError):
+        ParameterHistory(["a"], 0)
+
+
+def test_problem_parameter_history():
+    dataset = simulate(
+        suite.sim_model,
+        "dataset1",
+        suite.wanted_parameters,
+        {"e": suite.e_axis, "c": suite.c_axis},
+    )
+    scheme = Scheme(
+        model=suite.model,
+        parameters=suite.initial_parameters,
+        data={"dataset1": dataset},
+        parameter_history_size=2,
+    )
+    problem = UngroupedProblem(scheme)
+    labels = problem.parameter_history.labels
+    assert labels == ["1", "2"]
+
+    initial_cost = 0.5 * np.sum(problem.full_penalty ** 2)
+    problem.save_parameters_for_history()
+    problem.update_parameters(labels, [1e-3, 2e-4])
+    problem.full_penalty
+    problem.save_parameters_for_history()
+
+    assert len(problem.parameter_history) == 2
+    assert problem.parameter_history.costs[0] == initial_cost
+    assert np.array_equal(problem.parameter_history.values[1], [1e-3, 2e-4])
+
+    problem.restore_parameters_from_history(0)
+    assert np.array_equal(
+        [problem.parameters.get(label).value for label in labels],
+        [p.value for _, p in suite.initial_parameters.all()],
+    )
+    assert 0.5 * np.sum(problem.full_penalty ** 2) == initial_cost
+
+
+
+def test_optimize_closes_parameter_history(tmp_path):
+    script = textwrap.dedent(
+        f"""
+        import gc
+
+        from glotaran.analysis.optimize import optimize
+        from glotaran.analysis.simulation import simulate
+        from glotaran.analysis.test.models import TwoCompartmentDecay as suite
+        from glotaran.project import Scheme
+
+        dataset = simulate(
+            suite.sim_model,
+            "dataset1",
+            suite.wanted_parameters,
+            {{"e": suite.e_axis, "c": suite.c_axis}},
+        )
+        for parameter_history_file in [None, {str(tmp_path / "history.bin")!r}]:
+            optimize(
+                Scheme(
+                    model=suite.model,
+                    parameters=suite.initial_parameters,
+                    data={{"dataset1": dataset}},
+                    maximum_number_function_evaluations=5,
+                    parameter_history_size=2,
+                    parameter_history_file=parameter_history_file,
+                ),
+                verbose=False,
+            )
+            gc.collect()
+        """
+    )
+    process = subprocess.run(
+        [sys.executable, "-W", "error::ResourceWarning", "-c", script],
+        capture_output=True,
+        text=True,
+    )
+    assert process.returncode == 0, process.stderr
+    assert "ResourceWarning" not in process.stderr
+    assert "Exception ignored" not in process.stderr
@@ -0,0 +1,23 @@
+import pytest
+
+from glotaran.analysis.phase_timer import PhaseTimer
+
+
+def test_phase_timer():
+    timer = PhaseTimer()
+    for _ in range(3):
+        with timer.phase("outer"):
+            with timer.phase("inner"):
+                pass
+    timer.add("external", 2.0, calls=5)
+
+    assert timer.calls("outer") == 3
+    assert timer.calls("inner") == 3
+    assert timer.calls("unknown") == 0
+    assert timer.time("outer") >= timer.time("inner") > 0
+    assert timer.as_dict()["external"] == {"time": 2.0, "calls": 5}
+
+    with pytest.raises(ValueError):
+        with timer.phase("failing"):
+            raise ValueError
+    assert timer.calls("failing") == 1
@@ -1,15 +1,20 @@
-import collections
+import dataclasses
 
 import numpy as np
 import pytest
 import xarray as xr
 
+from glotaran.analysis.optimize import _calculate_penalty
+from glotaran.analysis.problem import GroupedBag
 from glotaran.analysis.problem import Problem
 from glotaran.analysis.problem_grouped import GroupedProblem
 from glotaran.analysis.problem_ungrouped import UngroupedProblem
+from glotaran.analysis.result_data import LazyResultData
 from glotaran.analysis.simulation import simulate
 from glotaran.analysis.test.models import MultichannelMulticomponentDecay as suite
 from glotaran.analysis.test.models import SimpleTestModel
+from glotaran.analysis.test.models import ThreeDatasetDecay
+from glotaran.analysis.variable_projection import residual_variable_projection
 from glotaran.parameter import ParameterGroup
 from glotaran.project import Scheme
 
@@ -38,7 +43,7 @@ def test_problem_bag(problem: Problem):
     bag = problem.bag
 
     if problem.grouped:
-        assert isinstance(bag, collections.deque)
+        assert isinstance(bag, GroupedBag)
         assert len(bag) == suite.e_axis.size
         assert problem.groups == {"dataset1": ["dataset1"]}
     else:
@@ -106,6 +111,121 @@ def test_problem_residuals(problem: Problem):
     )
 
 
+@pytest.mark.parametrize("index_dependent", [True, False])
+@pytest.mark.parametrize("grouped", [True, False])
+@pytest.mark.parametrize("weight", [True, False])
+def test_problem_kaufman_jacobian(index_dependent, grouped, weight):
+    model = suite.model
+    model.megacomplex["m1"].is_index_dependent = index_dependent
+    model.is_grouped = grouped
+    model.is_index_dependent = index_dependent
+
+    dataset = simulate(
+        suite.sim_model,
+        "dataset1",
+        suite.wanted_parameters,
+        {"e": suite.e_axis, "c": suite.c_axis},
+    )
+    if weight:
+        dataset["weight"] = xr.DataArray(np.ones_like(dataset.data), coords=dataset.coords)
+        dataset.weight[:, ::2] = 0.5
+    # at the true parameters the residual vanishes and the Kaufman approximation is exact
+    scheme = Scheme(model=model, parameters=suite.wanted_parameters, data={"dataset1": dataset})
+    problem = GroupedProblem(scheme) if grouped else UngroupedProblem(scheme)
+
+    labels, values, _, _ = problem.parameters.get_label_value_and_bounds_arrays(
+        exclude_non_vary=True
+    )
+    full_penalty = problem.full_penalty
+    jacobian = problem.calculate_kaufman_jacobian(labels)
+    assert jacobian.shape == (full_penalty.size, len(labels))
+    assert np.array_equal(problem.full_penalty, full_penalty)
+
+    wanted_jacobian = np.empty_like(jacobian)
+    for k, value in enumerate(values):
+        step = 1e-6 * abs(value)
+        penalties = []
+        for sign in [1, -1]:
+            perturbed_values = values.copy()
+            perturbed_values[k] += sign * step
+            problem.parameters.set_from_label_and_value_arrays(labels, perturbed_values)
+            problem.reset()
+            penalties.append(problem.full_penalty)
+        wanted_jacobian[:, k] = (penalties[0] - penalties[1]) / (2 * step)
+
+    assert np.allclose(jacobian, wanted_jacobian, rtol=1e-4, atol=1e-6 * np.abs(jacobian).max())
+
+
+@pytest.mark.parametrize("grouped", [True, False])
+def test_problem_kaufman_jacobian_additional_penalty(monkeypatch, grouped):
+    model = suite.model
+    model.megacomplex["m1"].is_index_dependent = False
+    model.is_grouped = grouped
+    model.is_index_dependent = False
+
+    def additional_penalty(parameters, clp_labels, clps, matrices, data, group_tolerance):
+        clp_sum = np.sum([np.sum(index_clps) for index_clps in clps["dataset1"]])
+        return np.asarray(
+            [clp_sum, clp_sum * parameters.get("k.1").value, np.sum(matrices["dataset1"])]
+        )
+
+    monkeypatch.setattr(model, "additional_penalty_function", additional_penalty)
+
+    dataset = simulate(
+        suite.sim_model,
+        "dataset1",
+        suite.wanted_parameters,
+        {"e": suite.e_axis, "c": suite.c_axis},
+    )
+    # at the true parameters the residual vanishes and the derivatives of the clps are exact
+    scheme = Scheme(model=model, parameters=suite.wanted_parameters, data={"dataset1": dataset})
+    problem = GroupedProblem(scheme) if grouped else UngroupedProblem(scheme)
+
+    labels, values, _, _ = problem.parameters.get_label_value_and_bounds_arrays(
+        exclude_non_vary=True
+    )
+    full_penalty = problem.full_penalty
+    jacobian = problem.calculate_kaufman_jacobian(labels)
+    assert np.array_equal(problem.full_penalty, full_penalty)
+
+    wanted_jacobian = np.empty((3, len(labels)))
+    for k, value in enumerate(values):
+        step = 1e-6 * abs(value)
+        penalties = []
+        for sign in [1, -1]:
+            perturbed_values = values.copy()
+            perturbed_values[k] += sign * step
+            problem.parameters.set_from_label_and_value_arrays(labels, perturbed_values)
+            problem.reset()
+            penalties.append(problem.additional_penalty)
+        wanted_jacobian[:, k] = (penalties[0] - penalties[1]) / (2 * step)
+
+    assert np.allclose(jacobian[-3:], wanted_jacobian, rtol=1e-4)
+
+
+@pytest.mark.parametrize("nnls", [True, False])
+def test_problem_project_matrix_derivatives(problem: Problem, monkeypatch, nnls):
+    monkeypatch.setattr(problem.scheme, "non_negative_least_squares", nnls)
+    rng = np.random.default_rng(0)
+    matrix = rng.random((20, 3))
+    clps = rng.random((3, 6))
+    clps[0, :3] = 0
+    clps[1, ::2] = 0
+    derivatives = rng.random((20, 6, 2))
+
+    projected = derivatives.copy()
+    clp_derivatives = problem._project_matrix_derivatives(matrix, clps, projected)
+
+    for i in range(clps.shape[1]):
+        free = clps[:, i] > 0 if nnls else np.ones(clps.shape[0], dtype=bool)
+        wanted_clp_derivatives, wanted_projected = residual_variable_projection(
+            matrix[:, free], derivatives[:, i]
+        )
+        assert np.allclose(projected[:, i], wanted_projected)
+        assert np.allclose(clp_derivatives[free, i], -wanted_clp_derivatives)
+        assert np.all(clp_derivatives[~free, i] == 0)
+
+
 def test_problem_result_data(problem: Problem):
 
     data = problem.create_result_data()
@@ -220,3 +340,279 @@ def test_prepare_data():
         " because weight is already supplied by dataset.",
     ):
         Problem(Scheme(model, parameters, {"dataset1": data}))
+
+
+@pytest.mark.parametrize("grouped", [True, False])
+def test_problem_preallocate_buffers(grouped):
+    model = suite.model
+    model.is_grouped = grouped
+    dataset = simulate(
+        suite.sim_model,
+        "dataset1",
+        suite.wanted_parameters,
+        {"e": suite.e_axis, "c": suite.c_axis},
+    )
+    scheme = Scheme(
+        model=model,
+        parameters=suite.initial_parameters,
+        data={"dataset1": dataset},
+        preallocate_buffers=True,
+    )
+    problem = GroupedProblem(scheme) if grouped else UngroupedProblem(scheme)
+    labels, values, _, _ = problem.parameters.get_label_value_and_bounds_arrays(
+        exclude_non_vary=True
+    )
+
+    # the first evaluation grows the buffer to the size of the additional penalty
+    penalty = _calculate_penalty(values, free_parameter_labels=labels, problem=problem)
+    buffer = problem.full_penalty
+
+    perturbed_penalty = _calculate_penalty(
+        values * 1.1, free_parameter_labels=labels, problem=problem
+    )
+    assert problem.full_penalty is buffer
+    assert all(np.shares_memory(r, buffer) for r in problem.flat_weighted_residuals)
+    assert not np.shares_memory(penalty, perturbed_penalty)
+    assert not np.allclose(penalty, perturbed_penalty)
+
+
+@pytest.mark.parametrize("grouped", [True, False])
+def test_problem_nnls_warm_start(grouped):
+    model = suite.model
+    model.is_grouped = grouped
+    dataset = simulate(
+        suite.sim_model,
+        "dataset1",
+        suite.wanted_parameters,
+        {"e": suite.e_axis, "c": suite.c_axis},
+    )
+    scheme = Scheme(
+        model=model,
+        parameters=suite.initial_parameters,
+        data={"dataset1": dataset},
+        non_negative_least_squares=True,
+    )
+    problem = GroupedProblem(scheme) if grouped else UngroupedProblem(scheme)
+    labels, values, _, _ = problem.parameters.get_label_value_and_bounds_arrays(
+        exclude_non_vary=True
+    )
+    problem.full_penalty
+    previous_batch_clps = problem._previous_batch_clps
+    assert previous_batch_clps is not None
+
+    problem.update_parameters(labels, values * 1.1)
+    warm_penalty = problem.full_penalty
+    assert problem._previous_batch_clps is not previous_batch_clps
+
+    cold_problem = GroupedProblem(scheme) if grouped else UngroupedProblem(scheme)
+    cold_problem.update_parameters(labels, values * 1.1)
+    assert np.allclose(warm_penalty, cold_problem.full_penalty)
+
+
+@pytest.mark.parametrize("grouped", [True, False])
+def test_problem_single_precision(grouped):
+    model = suite.model
+    model.is_grouped = grouped
+    dataset = simulate(
+        suite.sim_model,
+        "dataset1",
+        suite.wanted_parameters,
+        {"e": suite.e_axis, "c": suite.c_axis},
+    )
+    scheme = Scheme(
+        model=model,
+        parameters=suite.initial_parameters,
+        data={"dataset1": dataset},
+        precision="float32",
+    )
+    problem = GroupedProblem(scheme) if grouped else UngroupedProblem(scheme)
+
+    assert problem.dtype == np.float32
+    assert problem.data["dataset1"].data.dtype == np.float32
+    assert dataset.data.dtype == np.float64
+    if grouped:
+        assert problem.bag.data.dtype == np.float32
+    assert problem.full_penalty.dtype == np.float32
+    assert all(residual.dtype == np.float32 for residual in problem.flat_weighted_residuals)
+
+    with pytest.raises(ValueError, match="Unsupported precision 'float16'"):
+        Problem(dataclasses.replace(scheme, precision="float16"))
+
+
+def test_problem_svd_compression():
+    model = suite.model
+    model.is_grouped = False
+    model.megacomplex["m1"].is_index_dependent = False
+    dataset = simulate(
+        suite.sim_model,
+        "dataset1",
+        suite.wanted_parameters,
+        {"e": suite.e_axis, "c": suite.c_axis},
+    )
+    scheme = Scheme(
+        model=model,
+        parameters=suite.initial_parameters,
+        data={"dataset1": dataset},
+        svd_compression=4,
+    )
+    problem = UngroupedProblem(scheme)
+    uncompressed_problem = UngroupedProblem(dataclasses.replace(scheme, svd_compression=None))
+
+    assert problem.bag["dataset1"].data.shape == (suite.c_axis.size, 4)
+    assert problem.full_penalty.size < uncompressed_problem.full_penalty.size
+    assert problem.number_of_data_points == uncompressed_problem.number_of_data_points
+    assert np.allclose(
+        np.asarray(problem.reduced_clps["dataset1"]),
+        np.asarray(uncompressed_problem.reduced_clps["dataset1"]),
+    )
+    assert np.isclose(
+        np.sum(problem.full_penalty ** 2), np.sum(uncompressed_problem.full_penalty ** 2)
+    )
+
+    result_data = problem.create_result_data()["dataset1"]
+    uncompressed_result_data = uncompressed_problem.create_result_data()["dataset1"]
+    assert result_data.residual.shape == uncompressed_result_data.residual.shape
+    assert np.allclose(result_data.residual, uncompressed_result_data.residual)
+
+    with pytest.raises(ValueError, match="SVD compression is not supported for grouped"):
+        model.is_grouped = True
+        GroupedProblem(scheme)
+    model.is_grouped = False
+    with pytest.raises(ValueError, match="non-negative least-squares"):
+        UngroupedProblem(dataclasses.replace(scheme, non_negative_least_squares=True)).bag
+    with pytest.raises(ValueError, match="Cannot compress index dependent dataset"):
+        model.megacomplex["m1"].is_index_dependent = True
+        UngroupedProblem(scheme).bag
+    model.megacomplex["m1"].is_index_dependent = False
+
+
+@pytest.mark.parametrize("grouped", [True, False])
+def test_problem_result_data_modes(monkeypatch, grouped):
+    model = suite.model
+    model.is_grouped = grouped
+    model.megacomplex["m1"].is_index_dependent = False
+    dataset = simulate(
+        suite.sim_model,
+        "dataset1",
+        suite.wanted_parameters,
+        {"e": suite.e_axis, "c": suite.c_axis},
+    )
+    scheme = Scheme(model=model, parameters=suite.initial_parameters, data={"dataset1": dataset})
+    problem = GroupedProblem(scheme) if grouped else UngroupedProblem(scheme)
+
+    eager_data = problem.create_result_data()
+    lazy_data = problem.create_result_data(mode="lazy")
+    parallel_data = problem.create_result_data(mode="parallel")
+
+    assert isinstance(eager_data, dict)
+    assert isinstance(lazy_data, LazyResultData)
+    assert lazy_data.created_labels == []
+    assert isinstance(parallel_data, dict)
+
+    # the singular value decompositions of lazy datasets are calculated when they are read
+    svd_calls = []
+    svd = np.linalg.svd
+
+    def counted_svd(*args, **kwargs):
+        svd_calls.append(1)
+        return svd(*args, **kwargs)
+
+    monkeypatch.setattr(np.linalg, "svd", counted_svd)
+    lazy_dataset = lazy_data["dataset1"]
+    assert svd_calls == []
+    lazy_dataset.residual_singular_values.values
+    lazy_dataset.residual_left_singular_vectors.values
+    assert svd_calls == [1]
+    monkeypatch.undo()
+    for result_data in [lazy_data, parallel_data]:
+        xr.testing.assert_identical(result_data["dataset1"], eager_data["dataset1"])
+    assert problem.timings["create_result_dataset"]["calls"] == 2
+
+    with pytest.raises(ValueError, match="Unsupported result data mode 'deferred'"):
+        problem.create_result_data(mode="deferred")
+    with pytest.raises(ValueError, match="Unsupported result data mode 'deferred'"):
+        Problem(dataclasses.replace(scheme, result_data_mode="deferred"))
+
+
+@pytest.mark.parametrize("grouped", [True, False])
+def test_problem_jacobian_sparsity(grouped):
+    model = ThreeDatasetDecay.model
+    model.is_grouped = grouped
+    data = {
+        label: simulate(
+            ThreeDatasetDecay.sim_model,
+            label,
+            ThreeDatasetDecay.wanted_parameters,
+            {"e": getattr(ThreeDatasetDecay, f"e_axis{suffix}"), "c": c_axis},
+        )
+        for label, suffix, c_axis in [
+            ("dataset1", "", ThreeDatasetDecay.c_axis),
+            ("dataset2", "2", ThreeDatasetDecay.c_axis2),
+            ("dataset3", "3", ThreeDatasetDecay.c_axis3),
+        ]
+    }
+    scheme = Scheme(model=model, parameters=ThreeDatasetDecay.initial_parameters, data=data)
+    problem = GroupedProblem(scheme) if grouped else UngroupedProblem(scheme)
+    labels = ["1", "2"]
+
+    sparsity = problem.calculate_jacobian_sparsity(labels).toarray()
+    penalty = problem.full_penalty
+    assert sparsity.shape == (penalty.size, 2)
+    assert sparsity[-1].all()
+
+    jacobian = np.empty(sparsity.shape)
+    values = problem.parameters.get_label_value_and_bounds_arrays()[1]
+    for i in range(2):
+        perturbed_values = values.copy()
+        perturbed_values[i] *= 1.01
+        problem.update_parameters(labels, perturbed_values)
+        jacobian[:, i] = problem.full_penalty - penalty
+    assert np.all(sparsity[jacobian != 0])
+
+    if not grouped:
+        sizes = [dataset.data.size for dataset in data.values()]
+        assert np.all(sparsity[: sizes[0]] == [True, False])
+        assert np.all(sparsity[sizes[0] : sizes[0] + sizes[1]])
+        assert np.all(sparsity[sizes[0] + sizes[1] : -1] == [False, True])
+
+
+def test_problem_executor_lifetime():
+    model = suite.model
+    model.is_grouped = False
+    model.megacomplex["m1"].is_index_dependent = True
+    dataset = simulate(
+        suite.sim_model,
+        "dataset1",
+        suite.wanted_parameters,
+        {"e": suite.e_axis, "c": suite.c_axis},
+    )
+    scheme = Scheme(
+        model=model,
+        parameters=suite.initial_parameters,
+        data={"dataset1": dataset},
+        executor="process",
+        number_of_workers=2,
+    )
+    with UngroupedProblem(scheme) as problem:
+        assert problem._executor is None
+        penalty = problem.full_penalty
+        executor = problem._executor
+        assert executor is not None
+    assert problem._executor is None
+    with pytest.raises(RuntimeError):
+        executor.submit(print)
+
+    # a closed problem creates a new executor when it is evaluated again
+    labels, values, _, _ = problem.parameters.get_label_value_and_bounds_arrays(
+        exclude_non_vary=True
+    )
+    problem.update_parameters(labels, values)
+    assert np.allclose(problem.full_penalty, penalty)
+
+    # lazily created result datasets don't create a new executor
+    lazy_data = problem.create_result_data(mode="lazy")
+    problem.close()
+    with problem._map_serially():
+        assert problem.parallel_map(abs, [-1, 2]) == [1, 2]
+    lazy_data["dataset1"]
+    assert problem._executor is None
@@ -0,0 +1,106 @@
+import numpy as np
+import pytest
+
+from glotaran.analysis.nnls import residual_nnls
+from glotaran.analysis.variable_projection import residual_variable_projection
+
+
+@pytest.mark.parametrize("residual_function", [residual_variable_projection, residual_nnls])
+def test_residual_function_batched(residual_function):
+    rng = np.random.default_rng(0)
+    matrix = rng.random((50, 3))
+    data = rng.random((50, 7))
+
+    clps, residuals = residual_function(matrix, data)
+
+    assert clps.shape == (3, 7)
+    assert residuals.shape == (50, 7)
+    for i in range(data.shape[1]):
+        clp, residual = residual_function(matrix, data[:, i])
+        assert clp.shape == (3,)
+        assert residual.shape == (50,)
+        assert np.allclose(clps[:, i], clp)
+        assert np.allclose(residuals[:, i], residual)
+
+
+@pytest.mark.parametrize("number_of_clps", [1, 3, 8])
+def test_residual_nnls_warm_start(number_of_clps):
+    from scipy.optimize import nnls
+
+    rng = np.random.default_rng(number_of_clps)
+    matrix = rng.normal(size=(50, number_of_clps))
+    data = rng.normal(size=(50, 20))
+
+    clps, residuals = residual_nnls(matrix, data)
+    for i in range(data.shape[1]):
+        clp, residual_norm = nnls(matrix, data[:, i])
+        assert np.allclose(clps[:, i], clp)
+        assert np.isclose(np.linalg.norm(residuals[:, i]), residual_norm)
+
+    data += rng.normal(scale=0.01, size=data.shape)
+    cold_clps, cold_residuals = residual_nnls(matrix, data)
+    for initial_clps in [clps, np.ones_like(clps), np.zeros_like(clps)]:
+        warm_clps, warm_residuals = residual_nnls(matrix, data, initial_clps)
+        assert np.allclose(warm_clps, cold_clps)
+        assert np.allclose(warm_residuals, cold_residuals)
+    assert (cold_clps >= 0).all()
+
+
+@pytest.mark.parametrize("residual_function", [residual_variable_projection, residual_nnls])
+def test_residual_function_single_precision(residual_function):
+    rng = np.random.default_rng(0)
+    matrix = rng.random((50, 3))
+    data = rng.random((50, 7))
+
+    clps, residuals = residual_function(matrix, data)
+    single_clps, single_residuals = residual_function(
+        matrix.astype(np.float32), data.astype(np.float32)
+    )
+
+    assert single_clps.dtype == np.float32
+    assert single_residuals.dtype == np.float32
+    assert np.allclose(single_clps, clps, rtol=1e-4, atol=1e-5)
+    assert np.allclose(single_residuals, residuals, rtol=1e-4, atol=1e-5)
+
+
+def test_residual_nnls_ill_conditioned():
+    from scipy.optimize import nnls
+
+    # exponential decays with close rates
+    times = np.linspace(0, 10, 200)
+    matrix = np.exp(-np.outer(times, [1.0, 1.02, 1.04]))
+    data = matrix @ np.array([[1.0, 0.5], [2.0, 0.0], [0.5, 1.0]])
+    assert np.linalg.cond(matrix.T @ matrix) > 1e8
+
+    clps, _ = residual_nnls(matrix, data)
+    for i in range(data.shape[1]):
+        assert np.allclose(clps[:, i], nnls(matrix, data[:, i])[0], rtol=1e-12, atol=0)
+
+
+@pytest.mark.parametrize("scale", [1e-14, 1, 1e6])
+def test_residual_nnls_scale(scale):
+    from scipy.optimize import nnls
+
+    rng = np.random.default_rng(0)
+    times = np.linspace(0, 10, 100)
+    matrix = np.exp(-np.outer(times, [0.2, 0.7, 1.5, 3.0]))
+    data = (matrix @ rng.uniform(0, 1, (4, 10)) + rng.normal(size=(100, 10))) * scale
+
+    clps, _ = residual_nnls(matrix, data)
+    for i in range(data.shape[1]):
+        assert np.allclose(clps[:, i], nnls(matrix, data[:, i])[0], rtol=1e-6, atol=0)
+
+
+def test_fnnls_not_converged():
+    from glotaran.analysis.nnls import _fnnls
+
+    gram = np.eye(3)
+    cross = np.ones((3, 2))
+    passive_set = np.zeros((3, 2), dtype=np.bool_)
+
+    clps, converged = _fnnls(gram, cross, passive_set, 3)
+    assert converged.all()
+    assert np.allclose(clps, 1)
+
+    _, converged = _fnnls(gram, cross, passive_set, 2)
+    assert not converged.any()
@@ -0,0 +1,39 @@
+import pickle
+
+import xarray as xr
+
+from glotaran.analysis.result_data import LazyResultData
+
+
+def test_lazy_result_data():
+    created = []
+
+    def create_dataset(label):
+        created.append(label)
+        return xr.Dataset({"label": label})
+
+    result_data = LazyResultData(["a", "b", "c"], create_dataset)
+
+    assert len(result_data) == 3
+    assert list(result_data) == ["a", "b", "c"]
+    assert "b" in result_data
+    assert "d" not in result_data
+    assert created == []
+
+    assert result_data["b"].label == "b"
+    assert result_data["b"].label == "b"
+    assert created == ["b"]
+    assert result_data.created_labels == ["b"]
+
+    result_data["d"] = xr.Dataset({"label": "d"})
+    del result_data["a"]
+    assert list(result_data) == ["b", "c", "d"]
+
+    materialized = result_data.materialize(number_of_workers=2)
+    assert list(materialized) == ["b", "c", "d"]
+    assert sorted(created) == ["b", "c"]
+    assert result_data._create_dataset is None
+
+    unpickled = pickle.loads(pickle.dumps(LazyResultData(["a"], lambda label: materialized["b"])))
+    assert isinstance(unpickled, dict)
+    assert unpickled["a"].label == "b"
@@ -0,0 +1,102 @@
+import pickle
+from multiprocessing import resource_tracker
+
+import numpy as np
+import pytest
+import xarray as xr
+
+from glotaran.analysis import util
+from glotaran.analysis.util import SharedDatasets
+from glotaran.analysis.util import align_axes
+from glotaran.analysis.util import find_identical_columns
+from glotaran.analysis.util import find_overlap
+from glotaran.analysis.util import validate_executor
+
+
+def test_find_identical_columns():
+    array = np.asarray(
+        [
+            [1, 2, 1, 3, 2, 1],
+            [1, 2, 1, 3, 2, 1],
+        ]
+    )
+    groups = find_identical_columns(array)
+
+    assert len(groups) == 3
+    assert [list(group) for group in groups] == [[0, 2, 5], [1, 4], [3]]
+
+
+def test_find_overlap():
+    a = np.asarray([1, 2, 3, 5])
+    b = np.asarray([0, 1.4, 2.4, 2.7, 3.4, 9])
+    i1, i2 = find_overlap(a, b, atol=0.5)
+
+    assert list(i1) == [0, 1, 2]
+    assert list(i2) == [1, 2, 3]
+
+
+def test_align_axes():
+    axes = [
+        np.asarray([1, 2, 4]),
+        np.asarray([0, 1.1, 3, 4]),
+        np.asarray([4.05, 3.9, 0.1, -1]),
+    ]
+    full_axis, indices = align_axes(axes, atol=0.2)
+
+    # '3.9' is not matched, since '4.05' is closer to '4'
+    assert np.array_equal(full_axis, [-1, 0, 1, 2, 3, 3.9, 4])
+    assert [list(i) for i in indices] == [[2, 3, 6], [1, 2, 4, 6], [6, 5, 1, 0]]
+
+
+def test_shared_datasets():
+    data = xr.DataArray(
+        np.arange(2000, dtype=np.float64).reshape(100, 20),
+        coords=[("time", np.arange(100)), ("spectral", np.arange(20))],
+    )
+    shared = SharedDatasets({"dataset1": data})
+    try:
+        serialized = pickle.dumps(shared)
+        assert len(serialized) < data.nbytes
+
+        attached = pickle.loads(serialized)
+        dataset = attached.datasets["dataset1"]
+        assert np.array_equal(dataset.data, data)
+        assert np.array_equal(dataset.coords["time"], data.coords["time"])
+
+        # both point to the same memory
+        shared.datasets["dataset1"].data[0, 0] = -1
+        assert dataset.data[0, 0] == -1
+
+        del dataset
+        attached.close()
+        assert shared.datasets["dataset1"].data[0, 0] == -1
+    finally:
+        shared.unlink()
+
+
+def test_shared_datasets_attach_untracked(monkeypatch):
+    registered = []
+    monkeypatch.setattr(
+        resource_tracker, "register", lambda name, rtype: registered.append((name, rtype))
+    )
+    shared = SharedDatasets({"dataset1": xr.DataArray(np.ones((10, 2)), dims=("time", "pixel"))})
+    try:
+        assert len(registered) == 1
+        attached = pickle.loads(pickle.dumps(shared))
+        assert len(registered) == 1
+        assert np.array_equal(attached.datasets["dataset1"].data, np.ones((10, 2)))
+        attached.close()
+    finally:
+        shared.unlink()
+
+
+def test_validate_executor(monkeypatch):
+    assert util.numba_threading_layer() in ["tbb", "omp", "workqueue"]
+    monkeypatch.setattr(util, "numba_threading_layer", lambda: "workqueue")
+
+    validate_executor("serial")
+    validate_executor("process")
+    with pytest.raises(ValueError, match="threading layer 'workqueue'"):
+        validate_executor("thread")
+    with pytest.raises(ValueError, match="Unsupported executor 'cluster'"):
+        validate_executor("cluster")
@@ -1,34 +1,162 @@
 from __future__ import annotations
 
+import functools
 import itertools
+import multiprocessing
+import os
+import sys
+import threading
+from concurrent.futures import Executor
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+from typing import TYPE_CHECKING
 from typing import NamedTuple
 
 import numpy as np
+import xarray as xr
 
 from glotaran.model import DatasetDescriptor
 from glotaran.model import Model
 from glotaran.parameter import ParameterGroup
 
+if TYPE_CHECKING:
+    from typing import Any
+    from typing import Callable
+    from typing import Iterable
+
+SUPPORTED_EXECUTORS = ["serial", "thread", "process"]
+
+THREADSAFE_NUMBA_THREADING_LAYERS = ["tbb", "omp"]
+"""The numba threading layers which can run parallel kernels from concurrent threads."""
+
+CHUNKS_PER_WORKER = 4
+"""The number of chunks per worker, which the items of :func:`parallel_map` get split into."""
+
 
 class LabelAndMatrix(NamedTuple):
     clp_label: list[str]
     matrix: np.ndarray
 
 
-def find_overlap(a, b, rtol=1e-05, atol=1e-08):
-    ovr_a = []
-    ovr_b = []
-    start_b = 0
-    for i, ai in enumerate(a):
-        for j, bj in itertools.islice(enumerate(b), start_b, None):
-            if np.isclose(ai, bj, rtol=rtol, atol=atol, equal_nan=False):
-                ovr_a.append(i)
-                ovr_b.append(j)
-            elif bj > ai:  # (more than tolerance)
-                break  # all the rest will be farther away
-            else:  # bj < ai (more than tolerance)
-                start_b += 1  # ignore further tests of this item
-    return (ovr_a, ovr_b)
+def find_overlap(
+    a: np.ndarray, b: np.ndarray, rtol: float = 1e-05, atol: float = 1e-08
+) -> tuple[np.ndarray, np.ndarray]:
+    """Finds the overlapping values of two axes.
+
+    Each value of ``b`` gets matched with its closest value in ``a``, if they are equal within
+    the tolerance. Every value of ``a`` is matched at most once.
+
+    Parameters
+    ----------
+    a : np.ndarray
+        The first axis.
+    b : np.ndarray
+        The second axis.
+    rtol : float
+        The relative tolerance, see :func:`numpy.isclose`.
+    atol : float
+        The absolute tolerance, see :func:`numpy.isclose`.
+
+    Returns
+    -------
+    tuple[np.ndarray, np.ndarray]
+        The indices of the overlapping values in ``a`` and ``b``, ordered by the indices in ``b``.
+    """
+    a = np.asarray(a, dtype=np.float64)
+    order = np.argsort(a, kind="stable")
+    matches = _match_closest(a[order], np.asarray(b, dtype=np.float64), rtol, atol)
+    (overlap_b,) = np.nonzero(matches >= 0)
+    return order[matches[overlap_b]], overlap_b
+
+
+def align_axes(
+    axes: list[np.ndarray], rtol: float = 1e-05, atol: float = 1e-08
+) -> tuple[np.ndarray, list[np.ndarray]]:
+    """Aligns multiple axes on a common sorted axis.
+
+    The axes get aligned in the given order. Each value gets matched with the closest value of
+    the common axis, if they are equal within the tolerance, otherwise it is added to the common
+    axis. A value of the common axis is matched at most once per axis and keeps the value of
+    the first axis it originates from.
+
+    Parameters
+    ----------
+    axes : list[np.ndarray]
+        The axes to align.
+    rtol : float
+        The relative tolerance, see :func:`numpy.isclose`.
+    atol : float
+        The absolute tolerance, see :func:`numpy.isclose`.
+
+    Returns
+    -------
+    tuple[np.ndarray, list[np.ndarray]]
+        The common axis and for each axis the indices of its values on the common axis.
+    """
+    # values are stored in the order they get added, 'order' sorts them
+    values = np.empty(0, dtype=np.float64)
+    order = np.empty(0, dtype=np.int64)
+    value_indices = []
+    for axis in axes:
+        axis = np.asarray(axis, dtype=np.float64)
+        matches = _match_closest(values[order], axis, rtol, atol)
+        indices = np.empty(axis.size, dtype=np.int64)
+        matched = matches >= 0
+        indices[matched] = order[matches[matched]]
+        indices[~matched] = values.size + np.arange(axis.size - np.count_nonzero(matched))
+        values = np.concatenate([values, axis[~matched]])
+        order = np.argsort(values, kind="stable")
+        value_indices.append(indices)
+
+    rank = np.empty_like(order)
+    rank[order] = np.arange(order.size)
+    return values[order], [rank[indices] for indices in value_indices]
+
+
+def _match_closest(sorted_axis: np.ndarray, values: np.ndarray, rtol: float, atol: float):
+    """Matches values with the closest value of a sorted axis within the tolerance.
+
+    Returns the index in the sorted axis for each value, or ``-1`` for unmatched values.
+    If multiple values are close to the same index, only the closest one is matched.
+    """
+    matches = np.full(values.size, -1, dtype=np.int64)
+    if sorted_axis.size == 0 or values.size == 0:
+        return matches
+
+    right = np.searchsorted(sorted_axis, values).clip(0, sorted_axis.size - 1)
+    left = (right - 1).clip(0, None)
+    left_distance = np.abs(sorted_axis[left] - values)
+    right_distance = np.abs(sorted_axis[right] - values)
+    closest = np.where(left_distance <= right_distance, left, right)
+    distance = np.minimum(left_distance, right_distance)
+
+    (candidates,) = np.nonzero(distance <= atol + rtol * np.abs(values))
+    # keep only the closest candidate for each index in the sorted axis
+    candidates = candidates[np.lexsort((distance[candidates], closest[candidates]))]
+    _, first = np.unique(closest[candidates], return_index=True)
+    candidates = candidates[first]
+    matches[candidates] = closest[candidates]
+    return matches
+
+
+def find_identical_columns(array: np.ndarray) -> list[np.ndarray]:
+    """Groups the column indices of a 2D array by identical column values.
+
+    Parameters
+    ----------
+    array : np.ndarray
+        The array to group the columns of.
+
+    Returns
+    -------
+    list[np.ndarray]
+        A list of index arrays, one for each group of identical columns.
+    """
+    _, inverse = np.unique(array, axis=1, return_inverse=True)
+    order = np.argsort(inverse, kind="stable")
+    return np.split(order, np.cumsum(np.bincount(inverse))[:-1])
 
 
 def find_closest_index(index: float, axis: np.ndarray):
@@ -65,7 +193,9 @@ def calculate_matrix(
             matrix = this_matrix
         else:
             tmp_clp_labels = clp_labels + [c for c in this_clp_labels if c not in clp_labels]
-            tmp_matrix = np.zeros((matrix.shape[0], len(tmp_clp_labels)), dtype=np.float64)
+            tmp_matrix = np.zeros(
+                (matrix.shape[0], len(tmp_clp_labels)), dtype=np.result_type(matrix, this_matrix)
+            )
             for idx, label in enumerate(tmp_clp_labels):
                 if label in clp_labels:
                     tmp_matrix[:, idx] += matrix[:, clp_labels.index(label)]
@@ -101,7 +231,7 @@ def combine_matrices(labels_and_matrices: list[LabelAndMatrix]) -> LabelAndMatri
         (clp_label, matrix) = label_and_matrix
         sizes.append(matrix.shape[0])
         if full_clp_labels is None:
-            full_clp_labels = clp_label
+            full_clp_labels = list(clp_label)
             masks.append([i for i, _ in enumerate(clp_label)])
         else:
             mask = []
@@ -112,7 +242,9 @@ def combine_matrices(labels_and_matrices: list[LabelAndMatrix]) -> LabelAndMatri
             masks.append(mask)
     dim1 = np.sum(sizes)
     dim2 = len(full_clp_labels)
-    full_matrix = np.zeros((dim1, dim2), dtype=np.float64)
+    full_matrix = np.zeros(
+        (dim1, dim2), dtype=np.result_type(*(matrix for _, matrix in labels_and_matrices))
+    )
     start = 0
     for i, m in enumerate(labels_and_matrices):
         end = start + sizes[i]
@@ -120,3 +252,281 @@ def combine_matrices(labels_and_matrices: list[LabelAndMatrix]) -> LabelAndMatri
         start = end
 
     return LabelAndMatrix(full_clp_labels, full_matrix)
+
+
+@functools.lru_cache(maxsize=1)
+def numba_threading_layer() -> str:
+    """Gets the threading layer numba runs parallel kernels with.
+
+    The threading layer is chosen when the first parallel kernel runs, so a small kernel is
+    compiled and run if none has run yet.
+
+    Returns
+    -------
+    str
+        The name of the threading layer, e.g. ``'tbb'``, ``'omp'`` or ``'workqueue'``.
+    """
+    import numba as nb
+
+    @nb.jit(nopython=True, parallel=True)
+    def launch_threads(size: int) -> int:
+        total = 0
+        for i in nb.prange(size):
+            total += i
+        return total
+
+    launch_threads(2)
+    return nb.threading_layer()
+
+
+def validate_executor(executor: str):
+    """Checks that an executor is supported.
+
+    Parameters
+    ----------
+    executor : str
+        The kind of executor, one of ``'serial'``, ``'thread'`` or ``'process'``.
+
+    Raises
+    ------
+    ValueError
+        If the executor is not supported, or if it is the thread executor and the threading
+        layer of numba can't run parallel kernels from concurrent threads.
+    """
+    if executor not in SUPPORTED_EXECUTORS:
+        raise ValueError(
+            f"Unsupported executor '{executor}'. Supported executors are '{SUPPORTED_EXECUTORS}'"
+        )
+    if executor == "thread":
+        threading_layer = numba_threading_layer()
+        if threading_layer not in THREADSAFE_NUMBA_THREADING_LAYERS:
+            raise ValueError(
+                "The thread executor runs parallel numba kernels from concurrent threads, "
+                f"which the numba threading layer '{threading_layer}' does not support. "
+                "Install tbb, select a threadsafe layer with the environment variable "
+                "'NUMBA_THREADING_LAYER' or use the process executor."
+            )
+
+
+def create_executor(
+    executor: str,
+    number_of_workers: int | None = None,
+    initializer: Callable[..., Any] | None = None,
+    initargs: tuple = (),
+) -> Executor | None:
+    """Creates an executor to spread work across cores.
+
+    Parameters
+    ----------
+    executor : str
+        The kind of executor, one of ``'serial'``, ``'thread'`` or ``'process'``.
+    number_of_workers : int | None
+        The number of workers of the executor. Defaults to the number of CPUs.
+    initializer : Callable[..., Any] | None
+        A function called at the start of each worker. Not called for serial execution.
+    initargs : tuple
+        The arguments of the initializer.
+
+    Returns
+    -------
+    Executor | None
+        The executor or ``None`` for serial execution.
+
+    Raises
+    ------
+    ValueError
+        If the executor is not supported, see :func:`validate_executor`.
+    """
+    validate_executor(executor)
+    if executor == "serial":
+        return None
+    number_of_workers = number_of_workers or os.cpu_count()
+    if executor == "thread":
+        return ThreadPoolExecutor(
+            max_workers=number_of_workers, initializer=initializer, initargs=initargs
+        )
+    # Forking a process which already runs threads of the numerical libraries can deadlock.
+    return ProcessPoolExecutor(
+        max_workers=number_of_workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=initializer,
+        initargs=initargs,
+    )
+
+
+def parallel_map(
+    executor: Executor | None,
+    number_of_workers: int,
+    function: Callable[..., Any],
+    *iterables: Iterable,
+) -> list[Any]:
+    """Maps a function over iterables, spreading chunks of items across an executor.
+
+    The order of the results is the same as with the builtin ``map``. With a process executor
+    ``function`` must be picklable.
+
+    Parameters
+    ----------
+    executor : Executor | None
+        The executor to use, ``None`` maps serially.
+    number_of_workers : int
+        The number of workers of the executor.
+    function : Callable[..., Any]
+        The function to map.
+    *iterables : Iterable
+        The iterables providing the arguments of ``function``.
+
+    Returns
+    -------
+    list[Any]
+        The results of the function calls.
+    """
+    if executor is None:
+        return list(map(function, *iterables))
+    items = list(zip(*iterables))
+    if len(items) < 2:
+        return [function(*arguments) for arguments in items]
+    number_of_chunks = min(len(items), number_of_workers * CHUNKS_PER_WORKER)
+    chunk_size = -(-len(items) // number_of_chunks)
+    chunks = [items[i : i + chunk_size] for i in range(0, len(items), chunk_size)]
+    results = executor.map(_map_chunk, itertools.repeat(function), chunks)
+    return [result for chunk in results for result in chunk]
+
+
+def _map_chunk(function: Callable[..., Any], chunk: list[tuple[Any, ...]]) -> list[Any]:
+    return [function(*arguments) for arguments in chunk]
+
+
+_attach_lock = threading.Lock()
+
+
+def _skip_registration(name: str, rtype: str):
+    pass
+
+
+def _attach_shared_memory(name: str) -> SharedMemory:
+    """Attaches to an existing shared memory block without registering it with the resource
+    tracker.
+
+    The resource tracker warns about the registered blocks of a process which are left when it
+    exits and unlinks them, but the block is owned by the process which created it. Python 3.13
+    can skip the registration with ``track=False``, before it is skipped while attaching.
+    """
+    if sys.version_info >= (3, 13):
+        return SharedMemory(name=name, track=False)
+    with _attach_lock:
+        register = resource_tracker.register
+        resource_tracker.register = _skip_registration
+        try:
+            return SharedMemory(name=name)
+        finally:
+            resource_tracker.register = register
+
+
+class SharedVariable(NamedTuple):
+    """The description of a data variable stored in a shared memory block."""
+
+    memory_name: str
+    dims: tuple[str, ...]
+    shape: tuple[int, ...]
+    dtype: str
+    attrs: dict
+
+
+class SharedDatasets:
+    """Datasets with their numeric data variables stored in shared memory.
+
+    Pickling only serializes the names of the shared memory blocks together with the coordinates
+    and attributes of the datasets. Unpickling in another process attaches to the shared memory,
+    so the data is not copied through a pipe for every worker.
+
+    The process which created the datasets owns the shared memory and must call
+    :meth:`unlink` once the workers are done. The other processes attach to the shared memory
+    without owning it and should call :meth:`close` once they are done.
+    """
+
+    def __init__(self, data: dict[str, xr.DataArray | xr.Dataset]):
+        """Copies the data variables of datasets into shared memory.
+
+        Parameters
+        ----------
+        data : dict[str, xr.DataArray | xr.Dataset]
+            The datasets. Data arrays get converted to datasets with a variable ``data``.
+        """
+        self._memories: dict[str, SharedMemory] = {}
+        self._skeletons: dict[str, xr.Dataset] = {}
+        self._shared_variables: dict[str, dict[str, SharedVariable]] = {}
+        self._datasets: dict[str, xr.Dataset] | None = None
+        for label, dataset in data.items():
+            if isinstance(dataset, xr.DataArray):
+                dataset = dataset.to_dataset(name="data")
+            shared_variables = {}
+            for name, variable in dataset.data_vars.items():
+                values = variable.values
+                if values.dtype.kind not in "biufc" or values.size == 0:
+                    continue
+                memory = SharedMemory(create=True, size=values.nbytes)
+                self._memories[memory.name] = memory
+                np.ndarray(values.shape, dtype=values.dtype, buffer=memory.buf)[...] = values
+                shared_variables[name] = SharedVariable(
+                    memory.name, variable.dims, values.shape, values.dtype.str, variable.attrs
+                )
+            self._skeletons[label] = dataset.drop_vars(list(shared_variables))
+            self._shared_variables[label] = shared_variables
+
+    @property
+    def datasets(self) -> dict[str, xr.Dataset]:
+        """The datasets, with the shared data variables as views of the shared memory."""
+        if self._datasets is None:
+            self._datasets = {
+                label: skeleton.assign(
+                    {
+                        name: xr.Variable(
+                            variable.dims,
+                            np.ndarray(
+                                variable.shape,
+                                dtype=variable.dtype,
+                                buffer=self._memories[variable.memory_name].buf,
+                            ),
+                            attrs=variable.attrs,
+                        )
+                        for name, variable in self._shared_variables[label].items()
+                    }
+                )
+                for label, skeleton in self._skeletons.items()
+            }
+        return self._datasets
+
+    def close(self):
+        """Closes the attached shared memory without releasing it.
+
+        The datasets must not be used afterwards.
+        """
+        self._datasets = None
+        for memory in self._memories.values():
+            try:
+                memory.close()
+            except BufferError:
+                # views of the memory are still alive, it gets unmapped with the process
+                pass
+        self._memories = {}
+
+    def unlink(self):
+        """Releases the shared memory. Only to be called by the process which created it."""
+        self._datasets = None
+        for memory in self._memories.values():
+            memory.close()
+            memory.unlink()
+        self._memories = {}
+
+    def __getstate__(self):
+        return self._skeletons, self._shared_variables
+
+    def __setstate__(self, state):
+        self._skeletons, self._shared_variables = state
+        self._datasets = None
+        self._memories = {
+            variable.memory_name: _attach_shared_memory(variable.memory_name)
+            for shared_variables in self._shared_variables.values()
+            for variable in shared_variables.values()
+        }
@@ -13,6 +13,13 @@ def residual_variable_projection(
     """Calculates the conditionally linear parameters and residual with the variable projection
     method.
 
+    The data can either be a single vector or a 2D array where each column is a data vector
+    sharing the same matrix. In the latter case the matrix gets factorized only once and the
+    clps and residuals of all columns are calculated in a single LAPACK call.
+
+    The LAPACK routines are chosen by the dtypes of the matrix and the data, so single
+    precision input is solved in single precision.
+
     Parameters
     ----------
     matrix :
@@ -22,18 +29,23 @@ def residual_variable_projection(
     """
     # TODO: Reference Kaufman paper
 
+    # the workspace of dormqr must be at least the number of columns of the data
+    lwork = max(1, data.shape[1] if data.ndim == 2 else 1, matrix.shape[1])
+
+    geqrf, ormqr, trtrs = lapack.get_lapack_funcs(("geqrf", "ormqr", "trtrs"), (matrix, data))
+
     # Kaufman Q2 step 3
-    qr, tau, _, _ = lapack.dgeqrf(matrix)
+    qr, tau, _, _ = geqrf(matrix)
 
     # Kaufman Q2 step 4
-    temp, _, _ = lapack.dormqr("L", "T", qr, tau, data, max(1, matrix.shape[1]), overwrite_c=0)
+    temp, _, _ = ormqr("L", "T", qr, tau, data, lwork, overwrite_c=0)
 
-    clp, _ = lapack.dtrtrs(qr, temp)
+    clp, _ = trtrs(qr, temp)
 
     for i in range(matrix.shape[1]):
         temp[i] = 0
 
     # Kaufman Q2 step 5
 
-    residual, _, _ = lapack.dormqr("L", "N", qr, tau, temp, max(1, matrix.shape[1]), overwrite_c=0)
+    residual, _, _ = ormqr("L", "N", qr, tau, temp, lwork, overwrite_c=0)
     return clp[: matrix.shape[1]], residual
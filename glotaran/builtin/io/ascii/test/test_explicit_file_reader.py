@@ -1,8 +1,11 @@
+import io
 from pathlib import Path
 
 import numpy as np
+import pytest
 import xarray as xr
 
+from glotaran.builtin.io.ascii import wavelength_time_explicit_file as explicit_file
 from glotaran.builtin.io.ascii.wavelength_time_explicit_file import ExplicitFile
 
 DATA_DIR = Path(__file__).parent
@@ -38,3 +41,35 @@ def test_write_explicit_file(tmp_path):
     test_data_file_write.write(comment="written \n in \n test.", overwrite=True)
     test_dataarray_reread = test_data_file_write.read(prepare=False)
     assert np.array_equal(test_dataarray_read.values, test_dataarray_reread.values)
+
+
+@pytest.mark.parametrize("number_format", ["%.10e", "%.3E", "%.14e", "%.5f"])
+@pytest.mark.parametrize("shape", [(1000, 1), (40, 25)])
+def test_write_values(tmp_path, monkeypatch, number_format, shape):
+    monkeypatch.setattr(explicit_file, "MIN_VECTORIZED_SIZE", 0)
+    rng = np.random.default_rng(0)
+    values = rng.normal(size=shape) * 10.0 ** rng.integers(-30, 30, size=shape)
+    values.ravel()[:10] = [0.0, -0.0, np.nan, np.inf, -np.inf, 1e300, -5e-324, 0.125, 1.5, 9.5]
+    values.ravel()[10:18] = [9.999999999999e5, 1e-100, -1e22, 1e23, 1.0, -2.5, 1e-5, 0.1]
+
+    explicit_file.write_values(tmp_path / "values.txt", values, "head\ner", number_format)
+    np.savetxt(
+        tmp_path / "expected.txt", values, number_format, "\t", header="head\ner", comments=""
+    )
+
+    assert (tmp_path / "values.txt").read_text() == (tmp_path / "expected.txt").read_text()
+
+
+def test_read_values():
+    text = "  1.0\t2.5E-02 nan\n-inf 3 4\n\n5 6 7\n"
+    expected = np.array([[1.0, 0.025, np.nan], [-np.inf, 3, 4], [5, 6, 7]])
+
+    for block_size in [1, 8, 1000]:
+        values = explicit_file.read_values(io.StringIO(text), 3, block_size=block_size)
+        assert np.array_equal(values, expected, equal_nan=True)
+
+    with pytest.raises(ValueError, match="can not be split into lines of 2 values"):
+        explicit_file.read_values(io.StringIO(text), 2)
+
+    with pytest.raises(ValueError, match="contains values which are not numbers"):
+        explicit_file.read_values(io.StringIO("1 2\n3 x\n"), 2)
@@ -4,18 +4,42 @@ import os.path
 import re
 import warnings
 from enum import Enum
+from typing import TYPE_CHECKING
 
+import numba as nb
 import numpy as np
-import pandas as pd
 import xarray as xr
 
 from glotaran.io import DataIoInterface
 from glotaran.io import register_data_io
 from glotaran.io.prepare_dataset import prepare_time_trace_dataset
 
+if TYPE_CHECKING:
+    from typing import TextIO
+
 #  from glotaran.io.reader import file_reader
 
 
+READ_BLOCK_SIZE = 2 ** 24
+"""The number of characters :func:`read_values` parses at once."""
+
+WRITE_BLOCK_SIZE = 2 ** 18
+"""The number of values :func:`write_values` formats at once."""
+
+MIN_VECTORIZED_SIZE = 2 ** 16
+"""The smallest number of values :func:`write_values` formats vectorized, which is only worth
+the compilation of the kernels for large arrays."""
+
+MAX_VECTORIZED_PRECISION = 14
+"""The largest precision of scientific number formats, which are formatted vectorized."""
+
+MAX_EXACT_POWER_OF_TEN = 22
+"""The largest power of ten, which can be represented exactly by a double."""
+
+_POWERS_OF_TEN = 10.0 ** np.arange(MAX_EXACT_POWER_OF_TEN + 1)
+_ZERO, _POINT, _PLUS, _MINUS, _TAB, _NEWLINE = (ord(char) for char in "0.+-\t\n")
+
+
 class DataFileType(Enum):
     time_explicit = "Time explicit"
     wavelength_explicit = "Wavelength explicit"
@@ -97,16 +121,7 @@ class ExplicitFile:
         else:
             raise NotImplementedError
 
-        np.savetxt(
-            self._file,
-            raw_data,
-            fmt=number_format,
-            delimiter="\t",
-            newline="\n",
-            header=header,
-            footer="",
-            comments="",
-        )
+        write_values(self._file, raw_data, header=header, number_format=number_format)
 
     def read(self, prepare: bool = True):
         if not os.path.isfile(self._file):
@@ -117,14 +132,11 @@ class ExplicitFile:
             # The third line defines the ExplicitFileFormat (Time or Wavelength explicit)
             self._file_data_format = get_data_file_format(f.readline())
             # The fourth line define the number of elements on the explicit axis, which
-            # we can ignore because pandas is intelligent enough to read it
-        # read the first line (explicit_axis) separately
-        explicit_axis = pd.read_csv(
-            self._file, skiprows=4, delimiter=r"\s+", header=None, nrows=1
-        ).values
-        explicit_axis = explicit_axis[0, :]  # reshape to (n,)
-        # then the rest of the data:
-        rest_of_data = pd.read_csv(self._file, skiprows=5, delimiter=r"\s+", header=None).values
+            # we can ignore because the fifth line contains the explicit axis
+            f.readline()
+            explicit_axis = np.array(f.readline().split(), dtype=np.float64)
+            # then the rest of the data, with the secondary axis in the first column
+            rest_of_data = read_values(f, explicit_axis.size + 1)
         secondary_axis = rest_of_data[:, 0]
         observations = rest_of_data[:, 1:]
         if self._file_data_format == DataFileType.time_explicit:
@@ -242,9 +254,283 @@ def get_data_file_format(line):
     return data_file_format
 
 
+def read_values(
+    file: TextIO, number_of_columns: int, block_size: int = READ_BLOCK_SIZE
+) -> np.ndarray:
+    """Reads whitespace separated values until the end of a file.
+
+    The file is parsed in blocks of whole lines, which are streamed into a preallocated array,
+    so that the text of large files is never held in memory at once.
+
+    Parameters
+    ----------
+    file : TextIO
+        The file, positioned at the first line of values.
+    number_of_columns : int
+        The number of values in each line.
+    block_size : int
+        The number of characters parsed at once.
+
+    Returns
+    -------
+    np.ndarray
+        The values with shape ``(number_of_lines, number_of_columns)``.
+
+    Raises
+    ------
+    ValueError
+        If the file contains text which is not a number or the number of values is not a
+        multiple of the number of columns.
+    """
+    file_name = getattr(file, "name", "")
+    try:
+        file_size = os.fstat(file.fileno()).st_size
+    except OSError:
+        file_size = 0
+    values = np.empty(0)
+    size = 0
+    while True:
+        block = file.read(block_size)
+        if not block:
+            break
+        block += file.readline()
+        # numpy parses a string of only whitespace as -1
+        if block.isspace():
+            continue
+        with warnings.catch_warnings():
+            warnings.simplefilter("error", DeprecationWarning)
+            try:
+                block_values = np.fromstring(block, sep=" ")
+            except DeprecationWarning as error:
+                raise ValueError(
+                    f"The file {file_name!r} contains values which are not numbers."
+                ) from error
+
+        if size + block_values.size > values.size:
+            # estimate the number of values in the file from the characters per value
+            estimate = int(1.05 * file_size * block_values.size / len(block))
+            grown = np.empty(max(estimate, 2 * values.size, size + block_values.size))
+            grown[:size] = values[:size]
+            values = grown
+        values[size : size + block_values.size] = block_values
+        size += block_values.size
+
+    if size % number_of_columns != 0:
+        raise ValueError(
+            f"The file {file_name!r} contains {size} values, which can not be split into lines "
+            f"of {number_of_columns} values."
+        )
+    return values[:size].reshape(-1, number_of_columns)
+
+
+def write_values(
+    file_name: str,
+    values: np.ndarray,
+    header: str = "",
+    number_format: str = "%.10e",
+    block_size: int = WRITE_BLOCK_SIZE,
+):
+    """Writes values as tab separated lines after a header, like :func:`numpy.savetxt`.
+
+    Scientific number formats like ``'%.10e'`` of large arrays are formatted by compiled
+    kernels, with the same result as the ``%`` operator. Other formats are applied to whole
+    blocks of lines with a single ``%`` operation.
+
+    Parameters
+    ----------
+    file_name : str
+        The file to write to.
+    values : np.ndarray
+        The values with one row per line.
+    header : str
+        Text written before the values.
+    number_format : str
+        The ``%`` format of each value.
+    block_size : int
+        The number of values formatted at once.
+    """
+    number_of_columns = values.shape[1]
+    lines_per_block = max(block_size // max(number_of_columns, 1), 1)
+    scientific_format = re.fullmatch(r"%\.(\d+)([eE])", number_format)
+    if (
+        values.size >= MIN_VECTORIZED_SIZE
+        and scientific_format
+        and 1 <= int(scientific_format[1]) <= MAX_VECTORIZED_PRECISION
+    ):
+        precision, exponent_char = int(scientific_format[1]), scientific_format[2]
+
+        def format_block(block: np.ndarray) -> bytes:
+            return _format_scientific(block, precision, exponent_char)
+
+    else:
+        line_format = "\t".join([number_format] * number_of_columns) + "\n"
+
+        def format_block(block: np.ndarray) -> bytes:
+            return ((line_format * block.shape[0]) % tuple(block.ravel().tolist())).encode()
+
+    with open(file_name, "wb") as file:
+        if header:
+            file.write((header + "\n").encode("latin1"))
+        for start in range(0, values.shape[0], lines_per_block):
+            file.write(format_block(values[start : start + lines_per_block]))
+
+
+def _format_scientific(block: np.ndarray, precision: int, exponent_char: str) -> bytes:
+    """Formats the rows of a block as tab separated lines with ``'%.<precision>e'``.
+
+    Values which can't be rounded exactly by :func:`_scientific_parts` are formatted by the
+    ``%`` operator instead.
+    """
+    values = np.asarray(block, dtype=np.float64).ravel()
+    significands, exponents, fallback = _scientific_parts(values, precision)
+    negative = np.signbit(values)
+    lengths = negative + precision + 7 + (np.abs(exponents) >= 100)
+    number_format = f"%.{precision}{exponent_char}"
+    fallback_indices = np.flatnonzero(fallback)
+    fallback_values = [(number_format % values[index]).encode() for index in fallback_indices]
+    lengths[fallback_indices] = [len(formatted) + 1 for formatted in fallback_values]
+    ends = np.cumsum(lengths)
+
+    characters = np.empty(ends[-1] if ends.size else 0, dtype=np.uint8)
+    _fill_scientific(
+        characters,
+        ends - lengths,
+        significands,
+        exponents,
+        negative,
+        fallback,
+        block.shape[1],
+        precision,
+        ord(exponent_char),
+    )
+    for index, formatted in zip(fallback_indices, fallback_values):
+        characters[ends[index] - lengths[index] : ends[index] - 1] = np.frombuffer(
+            formatted, dtype=np.uint8
+        )
+    return characters.tobytes()
+
+
+@nb.jit(nopython=True, parallel=True, nogil=True, cache=True)
+def _scientific_parts(
+    values: np.ndarray, precision: int
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Calculates the significant digits and the decimal exponents of values.
+
+    The significant digits are the rounded product of the value and a power of ten, which are
+    both exact, so the product has a single rounding error. Values where this error could
+    change the rounding, i.e. close to a tie, which are out of the range of exact powers of
+    ten or which are not finite, are marked as fallback.
+
+    Parameters
+    ----------
+    values : np.ndarray
+        The values.
+    precision : int
+        The number of digits after the decimal point.
+
+    Returns
+    -------
+    tuple[np.ndarray, np.ndarray, np.ndarray]
+        The significant digits as integer, the exponents and the fallback marks.
+    """
+    lower = 10.0 ** precision
+    upper = 10.0 ** (precision + 1)
+    tolerance = 4 * np.finfo(np.float64).eps
+    significands = np.zeros(values.size, dtype=np.int64)
+    exponents = np.zeros(values.size, dtype=np.int64)
+    fallback = np.zeros(values.size, dtype=np.bool_)
+    for index in nb.prange(values.size):
+        magnitude = abs(values[index])
+        if magnitude == 0:
+            continue
+        if not np.isfinite(magnitude):
+            fallback[index] = True
+            continue
+
+        # log10 can be off by one close to powers of ten, which the second pass corrects
+        exponent = int(np.floor(np.log10(magnitude)))
+        scaled = 0.0
+        exact = False
+        for _ in range(2):
+            shift = precision - exponent
+            if abs(shift) > MAX_EXACT_POWER_OF_TEN:
+                break
+            if shift >= 0:
+                scaled = magnitude * _POWERS_OF_TEN[shift]
+            else:
+                scaled = magnitude / _POWERS_OF_TEN[-shift]
+            if scaled >= upper:
+                exponent += 1
+            elif scaled < lower:
+                exponent -= 1
+            else:
+                exact = True
+                break
+        if not exact or abs(scaled - np.floor(scaled) - 0.5) <= tolerance * scaled:
+            fallback[index] = True
+            continue
+
+        significand = np.rint(scaled)
+        # rounding up can carry into an additional digit
+        if significand >= upper:
+            significand /= 10
+            exponent += 1
+        significands[index] = int(significand)
+        exponents[index] = exponent
+    return significands, exponents, fallback
+
+
+@nb.jit(nopython=True, parallel=True, nogil=True, cache=True)
+def _fill_scientific(
+    characters: np.ndarray,
+    offsets: np.ndarray,
+    significands: np.ndarray,
+    exponents: np.ndarray,
+    negative: np.ndarray,
+    skip: np.ndarray,
+    number_of_columns: int,
+    precision: int,
+    exponent_char: int,
+):
+    """Writes the characters of the values in scientific format and the separators after them.
+
+    The values to skip only get their separator.
+    """
+    for index in nb.prange(significands.size):
+        position = offsets[index]
+        if not skip[index]:
+            if negative[index]:
+                characters[position] = _MINUS
+                position += 1
+            significand = significands[index]
+            for digit in range(precision, 0, -1):
+                characters[position + 1 + digit] = _ZERO + significand % 10
+                significand //= 10
+            characters[position] = _ZERO + significand
+            characters[position + 1] = _POINT
+            position += precision + 2
+
+            exponent = exponents[index]
+            characters[position] = exponent_char
+            characters[position + 1] = _MINUS if exponent < 0 else _PLUS
+            exponent = abs(exponent)
+            position += 2
+            if exponent >= 100:
+                characters[position] = _ZERO + exponent // 100
+                position += 1
+            characters[position] = _ZERO + exponent // 10 % 10
+            characters[position + 1] = _ZERO + exponent % 10
+            position += 2
+        else:
+            position = offsets[index + 1] - 1 if index + 1 < offsets.size else characters.size - 1
+        characters[position] = _NEWLINE if (index + 1) % number_of_columns == 0 else _TAB
+
+
 #  @file_reader(extension="ascii", name="Wavelength-/Time-Explicit ASCII")
 @register_data_io("ascii")
 class AsciiDataIo(DataIoInterface):
+    cache_datasets = True
+
     def load_dataset(self, file_name: str) -> xr.Dataset | xr.DataArray:
         """Reads an ascii file in wavelength- or time-explicit format.
 
@@ -9,6 +9,8 @@ from __future__ import annotations
 import os
 from typing import TYPE_CHECKING
 
+import pandas as pd
+
 from glotaran.io.interface import ProjectIoInterface
 from glotaran.plugin_system.project_io_registration import register_project_io
 
@@ -31,6 +33,7 @@ class FolderProjectIo(ProjectIoInterface):
         The following files are saved:
         * `result.md`: The result with the model formatted as markdown text.
         * `optimized_parameters.csv`: The optimized parameter as csv file.
+        * `timings.csv`: The timings of the optimization phases, if recorded.
         * `{dataset_label}.nc`: The result data for each dataset as NetCDF file.
 
         Parameters
@@ -66,6 +69,13 @@ class FolderProjectIo(ProjectIoInterface):
         result.optimized_parameters.to_csv(csv_path)
         paths.append(csv_path)
 
+        if result.timings is not None:
+            timings_path = os.path.join(result_path, "timings.csv")
+            pd.DataFrame.from_dict(result.timings, orient="index").to_csv(
+                timings_path, index_label="phase"
+            )
+            paths.append(timings_path)
+
         for label, data in result.data.items():
             nc_path = os.path.join(result_path, f"{label}.nc")
             data.to_netcdf(nc_path, engine="netcdf4")
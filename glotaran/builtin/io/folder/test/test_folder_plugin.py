@@ -3,6 +3,7 @@ from __future__ import annotations
 from pathlib import Path
 from typing import TYPE_CHECKING
 
+import pandas as pd
 import pytest
 
 from glotaran.io import save_result
@@ -52,3 +53,21 @@ def test_save_result_folder_error_path_is_file(
             result=dummy_result,
             allow_overwrite=True,
         )
+
+
+@pytest.mark.parametrize("format_name", ("folder", "legacy"))
+def test_save_result_folder_timings(
+    tmpdir: TmpDir,
+    dummy_result: Result,  # noqa: F811
+    format_name: Literal["folder", "legacy"],
+):
+    """Timings are saved as csv with one row per phase."""
+
+    result_dir = Path(tmpdir / "testresult")
+    save_result(result_path=str(result_dir), format_name=format_name, result=dummy_result)
+
+    timings = pd.read_csv(result_dir / "timings.csv", index_col="phase")
+    assert timings.loc["calculate_matrix", "calls"] == dummy_result.timings[
+        "calculate_matrix"
+    ]["calls"]
+    assert timings.loc["matrix_cache", "misses"] == dummy_result.timings["matrix_cache"]["misses"]
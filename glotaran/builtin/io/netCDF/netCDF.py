@@ -10,8 +10,28 @@ from glotaran.project import default_data_filters
 
 @register_data_io("nc")
 class NetCDFDataIo(DataIoInterface):
-    def load_dataset(self, file_name: str) -> xr.Dataset | xr.DataArray:
-        return xr.open_dataset(file_name)
+    def load_dataset(
+        self, file_name: str, *, chunks: int | dict | str | None = None
+    ) -> xr.Dataset | xr.DataArray:
+        """Opens a netCDF file, the variables are read from disk when they are accessed first.
+
+        Parameters
+        ----------
+        file_name : str
+            The path of the file.
+        chunks : int | dict | str | None
+            Chunk sizes by dimension, e.g. ``{"pixel": 4096}``, to open the variables as chunked
+            ``dask`` arrays. Requires ``dask``. This only defers loading the data, the data and
+            weight of a dataset are loaded into memory as a whole once an optimization problem
+            is created from it, so the memory usage of an optimization is not bounded by the
+            chunk sizes.
+
+        Returns
+        -------
+        xr.Dataset | xr.DataArray
+            The dataset.
+        """
+        return xr.open_dataset(file_name, chunks=chunks)
 
     def save_dataset(
         self,
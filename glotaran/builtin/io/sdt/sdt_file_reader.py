@@ -6,6 +6,7 @@ from __future__ import annotations
 import warnings
 
 import numpy as np
+import pandas as pd
 import xarray as xr
 from sdtfile import SdtFile
 
@@ -16,6 +17,8 @@ from glotaran.io.prepare_dataset import prepare_time_trace_dataset
 
 @register_data_io("sdt")
 class SdtDataIo(DataIoInterface):
+    cache_datasets = True
+
     def load_dataset(
         self,
         file_name: str,
@@ -101,12 +104,25 @@ class SdtDataIo(DataIoInterface):
             if orig_time_axis_index != 2:
                 np.swapaxes(raw_data, 2, orig_time_axis_index)
 
-            full_data = xr.DataArray(raw_data, coords={"time": times}, dims=["x", "y", "time"])
-            data = full_data.stack(pixel=("x", "y")).to_dataset(name="data")
-            data["full_data"] = full_data.rename({"x": "pixel_x", "y": "pixel_y"})
-            data["data_intensity_map"] = (
-                data.data.groupby("pixel").sum().unstack().rename({"x": "pixel_x", "y": "pixel_y"})
+            # the stacked data is a view of the full data, so that the cube is held only once
+            raw_data = np.ascontiguousarray(raw_data)
+            pixel_index = pd.MultiIndex.from_product(
+                [np.arange(raw_data.shape[0]), np.arange(raw_data.shape[1])], names=["x", "y"]
+            )
+            data = xr.Dataset(
+                {"data": (("time", "pixel"), raw_data.reshape(-1, raw_data.shape[2]).T)},
+                coords={"time": times, "pixel": pixel_index},
+            )
+            data["full_data"] = xr.DataArray(
+                raw_data,
+                coords={
+                    "pixel_x": np.arange(raw_data.shape[0]),
+                    "pixel_y": np.arange(raw_data.shape[1]),
+                    "time": times,
+                },
+                dims=["pixel_x", "pixel_y", "time"],
             )
+            data["data_intensity_map"] = data.full_data.sum("time")
         else:
             if swap_axis:
                 raw_data = raw_data.T
@@ -4,6 +4,8 @@ import pytest
 import xarray as xr
 
 from glotaran.builtin.io.sdt.sdt_file_reader import SdtDataIo
+from glotaran.builtin.io.sdt.test import FLIM_DATA
+from glotaran.builtin.io.sdt.test import LEGACY_FILES
 from glotaran.builtin.io.sdt.test import TEMPORAL_DATA
 
 
@@ -29,3 +31,18 @@ def test_read_sdt(test_file_path, result_file_path, index):
 
     assert test_dataset.data.T.shape == result_traces.values.shape
     assert np.allclose(test_dataset.time, np.array(result_traces.columns))
+
+
+def test_read_sdt_flim():
+
+    sdt_reader = SdtDataIo("sdt")
+    test_dataset = sdt_reader.load_dataset(FLIM_DATA["sdt"], flim=True)
+    legacy_intensity_map = np.loadtxt(LEGACY_FILES["flim_map"])
+
+    assert test_dataset.data.dims == ("time", "pixel")
+    assert test_dataset.data.shape == (256, 64 * 64)
+    assert np.shares_memory(test_dataset.data.values, test_dataset.full_data.values)
+    assert np.array_equal(
+        test_dataset.data.sel(pixel=(1, 2)).values, test_dataset.full_data.values[1, 2]
+    )
+    assert np.array_equal(test_dataset.data_intensity_map.values, legacy_intensity_map)
@@ -3,6 +3,9 @@ from __future__ import annotations
 from pathlib import Path
 from typing import TYPE_CHECKING
 
+import xarray as xr
+import yaml
+
 from glotaran.io import save_result
 from glotaran.project.test.test_result import dummy_result  # noqa: F401
 
@@ -29,3 +32,37 @@ def test_save_result_yml(
     assert (result_dir / "dataset1.nc").exists()
     assert (result_dir / "dataset2.nc").exists()
     assert (result_dir / "dataset3.nc").exists()
+
+
+def test_save_result_yml_twice(
+    tmpdir: TmpDir,
+    dummy_result: Result,  # noqa: F811
+):
+    """Saving doesn't replace the datasets of the result and its scheme with paths."""
+
+    scheme = dummy_result.scheme
+    data = dict(dummy_result.data)
+    scheme_data = dict(scheme.data)
+
+    for result_dir in (Path(tmpdir / "first"), Path(tmpdir / "second")):
+        save_result(result_path=result_dir, format_name="yml", result=dummy_result)
+
+        assert dummy_result.scheme is scheme
+        assert dummy_result.data == data
+        assert scheme.data == scheme_data
+        for label, dataset in data.items():
+            assert xr.load_dataset(result_dir / f"{label}.nc").data.equals(dataset.data)
+
+
+def test_save_result_yml_timings(
+    tmpdir: TmpDir,
+    dummy_result: Result,  # noqa: F811
+):
+    """Timings are saved in the result file."""
+
+    result_dir = Path(tmpdir / "testresult")
+    save_result(result_path=result_dir, format_name="yml", result=dummy_result)
+
+    with open(result_dir / "result.yml") as result_file:
+        timings = yaml.unsafe_load(result_file)["timings"]
+    assert timings == dummy_result.timings
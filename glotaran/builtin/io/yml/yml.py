@@ -117,6 +117,18 @@ class YmlProjectIo(ProjectIoInterface):
                 raise ValueError(f"Error loading dataset '{label}': {e}")
 
         optimization_method = scheme.get("optimization_method", "TrustRegionReflection")
+        jacobian_method = scheme.get("jacobian_method", "FiniteDifferences")
+        jacobian_sparsity = scheme.get("jacobian_sparsity", False)
+        executor = scheme.get("executor", "serial")
+        number_of_workers = scheme.get("number_of_workers", None)
+        matrix_cache_size = scheme.get("matrix_cache_size", None)
+        parameter_history_size = scheme.get("parameter_history_size", 1000)
+        parameter_history_file = scheme.get("parameter_history_file", None)
+        preallocate_buffers = scheme.get("preallocate_buffers", False)
+        precision = scheme.get("precision", "float64")
+        svd_compression = scheme.get("svd_compression", None)
+        global_chunk_size = scheme.get("global_chunk_size", None)
+        result_data_mode = scheme.get("result_data_mode", "eager")
         nnls = scheme.get("non-negative-least-squares", False)
         nfev = scheme.get("maximum-number-function-evaluations", None)
         ftol = scheme.get("ftol", 1e-8)
@@ -135,6 +147,18 @@ class YmlProjectIo(ProjectIoInterface):
             xtol=xtol,
             group_tolerance=group_tolerance,
             optimization_method=optimization_method,
+            jacobian_method=jacobian_method,
+            jacobian_sparsity=jacobian_sparsity,
+            executor=executor,
+            number_of_workers=number_of_workers,
+            matrix_cache_size=matrix_cache_size,
+            parameter_history_size=parameter_history_size,
+            parameter_history_file=parameter_history_file,
+            preallocate_buffers=preallocate_buffers,
+            precision=precision,
+            svd_compression=svd_compression,
+            global_chunk_size=global_chunk_size,
+            result_data_mode=result_data_mode,
             saving=saving,
         )
 
@@ -155,8 +179,9 @@ class YmlProjectIo(ProjectIoInterface):
                 f.write(str(result.markdown()))
 
         scheme_path = os.path.join(result_path, "scheme.yml")
-        result_scheme = dataclasses.replace(result.scheme)
-        result = dataclasses.replace(result)
+        # the data is replaced by paths, which must not alter the saved result
+        result_scheme = dataclasses.replace(result.scheme, data=dict(result.scheme.data))
+        result = dataclasses.replace(result, data=dict(result.data))
         result.scheme = scheme_path
 
         parameters_format = options.parameter_format
@@ -76,12 +76,9 @@ class KineticDecayMegacomplex(Megacomplex):
         model_dimension = dataset_model.get_model_dimension()
         model_axis = axis[model_dimension]
 
-        # init the matrix
-        size = (model_axis.size, rates.size)
-        matrix = np.zeros(size, dtype=np.float64)
-
-        kinetic_image_matrix_implementation(
-            matrix, rates, global_index, global_axis, model_axis, dataset_model
+        a_matrix = k_matrix.a_matrix(initial_concentration)
+        matrix = kinetic_image_matrix_implementation(
+            rates, a_matrix, global_index, global_axis, model_axis, dataset_model
         )
 
         if not np.all(np.isfinite(matrix)):
@@ -90,21 +87,54 @@ class KineticDecayMegacomplex(Megacomplex):
                 f"{k_matrix.matrix_as_markdown(fill_parameters=True)}"
             )
 
-        # apply A matrix
-        matrix = matrix @ k_matrix.a_matrix(initial_concentration)
-
         # done
         return (compartments, matrix)
 
 
+PARALLEL_KINETIC_MATRIX_MIN_SIZE = 2 ** 14
+"""The minimum number of time points times rates times gaussians of the irf to calculate a
+kinetic matrix with a gaussian irf in parallel. Smaller matrices are calculated serially,
+since starting the threads takes longer than the calculation."""
+
+
 def kinetic_image_matrix_implementation(
-    matrix: np.ndarray,
     rates: np.ndarray,
+    a_matrix: np.ndarray,
     global_index: int,
     global_axis: np.ndarray,
     model_axis: np.ndarray,
     dataset_model: DatasetDescriptor,
-):
+) -> np.ndarray:
+    """Calculates the kinetic matrix of a dataset, the decays of the rates multiplied with the
+    A matrix.
+
+    Parameters
+    ----------
+    rates : np.ndarray
+        The rates of the k matrix.
+    a_matrix : np.ndarray
+        The A matrix of the k matrix with one row per rate.
+    global_index : int
+        The index on the global axis.
+    global_axis : np.ndarray
+        The global axis.
+    model_axis : np.ndarray
+        The model axis, i.e. the times.
+    dataset_model : DatasetDescriptor
+        The dataset descriptor.
+
+    Returns
+    -------
+    np.ndarray
+        The matrix with one row per time point and one column per column of the A matrix.
+    """
+    # the kernels are compiled for contiguous float64 arrays, so that the specializations
+    # cached on disk or compiled by glotaran.warmup match every call
+    rates = np.ascontiguousarray(rates, dtype=np.float64)
+    a_matrix = np.ascontiguousarray(a_matrix, dtype=np.float64)
+    model_axis = np.ascontiguousarray(model_axis, dtype=np.float64)
+    matrix = np.empty((model_axis.size, a_matrix.shape[1]), dtype=np.float64)
+
     if isinstance(dataset_model.irf, IrfMultiGaussian):
 
         (
@@ -116,25 +146,37 @@ def kinetic_image_matrix_implementation(
             backsweep_period,
         ) = dataset_model.irf.parameter(global_index, global_axis)
 
-        for center, width, irf_scale in zip(centers, widths, irf_scales):
-            calculate_kinetic_matrix_gaussian_irf(
-                matrix,
-                rates,
-                model_axis,
-                center - shift,
-                width,
-                irf_scale,
-                backsweep,
-                backsweep_period,
-            )
-        if dataset_model.irf.normalize:
-            matrix /= np.sum(irf_scale)
+        centers = np.asarray(centers, dtype=np.float64) - float(shift)
+        widths = np.asarray(widths, dtype=np.float64)
+        irf_scales = np.asarray(irf_scales, dtype=np.float64)
+        normalization = float(np.sum(irf_scales)) if dataset_model.irf.normalize else 1.0
+
+        kernel = (
+            calculate_kinetic_matrix_multi_gaussian_irf_parallel
+            if model_axis.size * rates.size * centers.size >= PARALLEL_KINETIC_MATRIX_MIN_SIZE
+            else calculate_kinetic_matrix_multi_gaussian_irf
+        )
+        kernel(
+            matrix,
+            rates,
+            a_matrix,
+            model_axis,
+            centers,
+            widths,
+            irf_scales / normalization,
+            bool(backsweep),
+            float(backsweep_period),
+        )
 
     else:
-        calculate_kinetic_matrix_no_irf(matrix, rates, model_axis)
+        decays = np.zeros((model_axis.size, rates.size), dtype=np.float64)
+        calculate_kinetic_matrix_no_irf(decays, rates, model_axis)
+        np.matmul(decays, a_matrix, out=matrix)
 
+    return matrix
 
-@nb.jit(nopython=True, parallel=True)
+
+@nb.jit(nopython=True, parallel=True, nogil=True, cache=True)
 def calculate_kinetic_matrix_no_irf(matrix, rates, times):
     for n_r in nb.prange(rates.size):
         r_n = rates[n_r]
@@ -146,43 +188,143 @@ def calculate_kinetic_matrix_no_irf(matrix, rates, times):
 sqrt2 = np.sqrt(2)
 
 
-@nb.jit(nopython=True, parallel=True)
-def calculate_kinetic_matrix_gaussian_irf(
-    matrix, rates, times, center, width, scale, backsweep, backsweep_period
+ERF_SATURATION = 6.0
+"""The argument above which ``1 + erf`` rounds to 2 in double precision."""
+
+KINETIC_MATRIX_BLOCK_SIZE = 256
+"""The number of time points of a kinetic matrix with a gaussian irf calculated at once."""
+
+
+@nb.jit(nopython=True, nogil=True, cache=True, error_model="numpy")
+def _calculate_kinetic_matrix_block(
+    matrix, block, rates, a_matrix, times, centers, widths, scales, backsweep, backsweep_period
 ):
-    """Calculates a kinetic matrix with a gaussian irf."""
-    for n_r in nb.prange(rates.size):
+    """Calculates a block of rows of a kinetic matrix with a multi gaussian irf.
+
+    The decay of each rate is the sum of its convolutions with the gaussians, which then gets
+    multiplied with the A matrix while the decays of the block are in the cache.
+    """
+    start = block * KINETIC_MATRIX_BLOCK_SIZE
+    stop = min(start + KINETIC_MATRIX_BLOCK_SIZE, times.size)
+    decays = np.zeros((stop - start, rates.size), dtype=np.float64)
+    for n_r in range(rates.size):
         r_n = -rates[n_r]
         backsweep_valid = abs(r_n) * backsweep_period > 0.001
-        alpha = (r_n * width) / sqrt2
-        for n_t in nb.prange(times.size):
-            t_n = times[n_t]
-            beta = (t_n - center) / (width * sqrt2)
-            thresh = beta - alpha
-            if thresh < -1:
-                matrix[n_t, n_r] += scale * 0.5 * erfcx(-thresh) * np.exp(-beta * beta)
-            else:
-                matrix[n_t, n_r] += (
-                    scale * 0.5 * (1 + erf(thresh)) * np.exp(alpha * (alpha - 2 * beta))
-                )
-            if backsweep and backsweep_valid:
-                x1 = np.exp(-r_n * (t_n - center + backsweep_period))
-                x2 = np.exp(-r_n * ((backsweep_period / 2) - (t_n - center)))
-                x3 = np.exp(-r_n * backsweep_period)
-                matrix[n_t, n_r] += scale * (x1 + x2) / (1 - x3)
+        for n_g in range(centers.size):
+            center = centers[n_g]
+            width = widths[n_g]
+            scale = scales[n_g]
+            alpha = (r_n * width) / sqrt2
+            for n_t in range(start, stop):
+                t_n = times[n_t]
+                beta = (t_n - center) / (width * sqrt2)
+                thresh = beta - alpha
+                if thresh < -1:
+                    decay = scale * 0.5 * erfcx(-thresh) * np.exp(-beta * beta)
+                elif thresh < ERF_SATURATION:
+                    decay = scale * 0.5 * (1 + erf(thresh)) * np.exp(alpha * (alpha - 2 * beta))
+                else:
+                    # 1 + erf(thresh) is exactly 2, the same as calling erf
+                    decay = scale * np.exp(alpha * (alpha - 2 * beta))
+                if backsweep and backsweep_valid:
+                    x1 = np.exp(-r_n * (t_n - center + backsweep_period))
+                    x2 = np.exp(-r_n * ((backsweep_period / 2) - (t_n - center)))
+                    x3 = np.exp(-r_n * backsweep_period)
+                    decay += scale * (x1 + x2) / (1 - x3)
+                decays[n_t - start, n_r] += decay
+
+    matrix[start:stop, :] = 0
+    for n_t in range(start, stop):
+        for n_r in range(rates.size):
+            decay = decays[n_t - start, n_r]
+            for n_c in range(a_matrix.shape[1]):
+                matrix[n_t, n_c] += decay * a_matrix[n_r, n_c]
+
+
+@nb.jit(nopython=True, nogil=True, cache=True)
+def calculate_kinetic_matrix_multi_gaussian_irf(
+    matrix, rates, a_matrix, times, centers, widths, scales, backsweep, backsweep_period
+):
+    """Calculates a kinetic matrix with a multi gaussian irf, serially.
+
+    Parameters
+    ----------
+    matrix : np.ndarray
+        The matrix to write to, with one row per time point and one column per column of the
+        A matrix.
+    rates : np.ndarray
+        The rates.
+    a_matrix : np.ndarray
+        The A matrix with one row per rate.
+    times : np.ndarray
+        The time points.
+    centers : np.ndarray
+        The centers of the gaussians, shifted for the global index.
+    widths : np.ndarray
+        The widths of the gaussians.
+    scales : np.ndarray
+        The normalized scales of the gaussians.
+    backsweep : bool
+        Whether to add the backsweep.
+    backsweep_period : float
+        The period of the backsweep.
+    """
+    for block in range((times.size + KINETIC_MATRIX_BLOCK_SIZE - 1) // KINETIC_MATRIX_BLOCK_SIZE):
+        _calculate_kinetic_matrix_block(
+            matrix,
+            block,
+            rates,
+            a_matrix,
+            times,
+            centers,
+            widths,
+            scales,
+            backsweep,
+            backsweep_period,
+        )
 
 
-import ctypes  # noqa: E402
+@nb.jit(nopython=True, parallel=True, nogil=True, cache=True)
+def calculate_kinetic_matrix_multi_gaussian_irf_parallel(
+    matrix, rates, a_matrix, times, centers, widths, scales, backsweep, backsweep_period
+):
+    """Calculates a kinetic matrix with a multi gaussian irf, with blocks of time points split
+    across threads.
+
+    See :func:`calculate_kinetic_matrix_multi_gaussian_irf` for the parameters.
+    """
+    number_of_blocks = (times.size + KINETIC_MATRIX_BLOCK_SIZE - 1) // KINETIC_MATRIX_BLOCK_SIZE
+    for block in nb.prange(number_of_blocks):
+        _calculate_kinetic_matrix_block(
+            matrix,
+            block,
+            rates,
+            a_matrix,
+            times,
+            centers,
+            widths,
+            scales,
+            backsweep,
+            backsweep_period,
+        )
 
-# This is a work around to use scipy.special function with numba
-from numba.extending import get_cython_function_address  # noqa: E402
 
-_dble = ctypes.c_double
+# This is a work around to use scipy.special function with numba. The functions are called by
+# the symbol of their cython implementation, which unlike a ctypes function pointer allows numba
+# to cache the compiled kernels on disk.
+import llvmlite.binding as llvm  # noqa: E402
+from numba.extending import get_cython_function_address  # noqa: E402
 
-functype = ctypes.CFUNCTYPE(_dble, _dble)
+_float64_function = nb.float64(nb.float64)
 
-erf_addr = get_cython_function_address("scipy.special.cython_special", "__pyx_fuse_1erf")
-erfcx_addr = get_cython_function_address("scipy.special.cython_special", "__pyx_fuse_1erfcx")
+llvm.add_symbol(
+    "glotaran_erf",
+    get_cython_function_address("scipy.special.cython_special", "__pyx_fuse_1erf"),
+)
+llvm.add_symbol(
+    "glotaran_erfcx",
+    get_cython_function_address("scipy.special.cython_special", "__pyx_fuse_1erfcx"),
+)
 
-erf = functype(erf_addr)
-erfcx = functype(erfcx_addr)
+erf = nb.types.ExternalFunction("glotaran_erf", _float64_function)
+erfcx = nb.types.ExternalFunction("glotaran_erfcx", _float64_function)
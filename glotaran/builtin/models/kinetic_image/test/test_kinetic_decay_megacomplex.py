@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+from scipy.special import erf
+
+from glotaran.builtin.models.kinetic_image.kinetic_decay_megacomplex import (
+    calculate_kinetic_matrix_multi_gaussian_irf,
+)
+from glotaran.builtin.models.kinetic_image.kinetic_decay_megacomplex import (
+    calculate_kinetic_matrix_multi_gaussian_irf_parallel,
+)
+
+
+def kinetic_matrix_reference(rates, a_matrix, times, centers, widths, scales):
+    decays = sum(
+        scale
+        * 0.5
+        * np.exp(-rates * (times[:, None] - center) + (rates * width) ** 2 / 2)
+        * (1 + erf((times[:, None] - center - rates * width ** 2) / (width * np.sqrt(2))))
+        for center, width, scale in zip(centers, widths, scales)
+    )
+    return decays @ a_matrix
+
+
+@pytest.mark.parametrize(
+    "kernel",
+    [
+        calculate_kinetic_matrix_multi_gaussian_irf,
+        calculate_kinetic_matrix_multi_gaussian_irf_parallel,
+    ],
+)
+@pytest.mark.parametrize("number_of_gaussians", [1, 3])
+def test_calculate_kinetic_matrix_multi_gaussian_irf(kernel, number_of_gaussians):
+    rng = np.random.default_rng(42)
+    # more than one block of time points
+    times = np.linspace(-1, 100, 1000)
+    rates = np.array([2.0, 0.5, 0.01])
+    a_matrix = rng.uniform(-1, 1, (rates.size, 4))
+    centers = np.linspace(0, 0.5, number_of_gaussians)
+    widths = np.linspace(0.1, 0.3, number_of_gaussians)
+    scales = np.linspace(1, 0.5, number_of_gaussians)
+
+    matrix = np.full((times.size, a_matrix.shape[1]), np.nan)
+    # the kernels take the eigenvalues of the k matrix, which are the negative rates
+    kernel(matrix, -rates, a_matrix, times, centers, widths, scales, False, 0.0)
+
+    assert np.allclose(
+        matrix, kinetic_matrix_reference(rates, a_matrix, times, centers, widths, scales)
+    )
+
+
+def test_calculate_kinetic_matrix_multi_gaussian_irf_parallel_backsweep():
+    times = np.linspace(-1, 100, 1000)
+    rates = np.array([-2.0, -0.5, -0.01])
+    a_matrix = np.eye(rates.size)
+    args = (times, np.array([0.0, 0.3]), np.array([0.1, 0.2]), np.array([0.7, 0.3]), True, 13.0)
+
+    serial = np.empty((times.size, rates.size))
+    calculate_kinetic_matrix_multi_gaussian_irf(serial, rates, a_matrix, *args)
+    parallel = np.empty((times.size, rates.size))
+    calculate_kinetic_matrix_multi_gaussian_irf_parallel(parallel, rates, a_matrix, *args)
+
+    assert np.array_equal(serial, parallel)
+    assert np.all(np.isfinite(serial))
@@ -48,7 +48,12 @@ class CoherentArtifactMegacomplex(Megacomplex):
         center = center[0]
         width = self.width.value if self.width is not None else width[0]
 
-        matrix = _calculate_coherent_artifact_matrix(center, width, model_axis, self.order)
+        matrix = _calculate_coherent_artifact_matrix(
+            float(center),
+            float(width),
+            np.ascontiguousarray(model_axis, dtype=np.float64),
+            int(self.order),
+        )
         return (self.compartments(), matrix)
 
     def compartments(self):
@@ -58,7 +63,7 @@ class CoherentArtifactMegacomplex(Megacomplex):
         return False
 
 
-@nb.jit(nopython=True, parallel=True)
+@nb.jit(nopython=True, parallel=True, nogil=True, cache=True)
 def _calculate_coherent_artifact_matrix(center, width, axis, order):
     matrix = np.zeros((axis.size, order), dtype=np.float64)
 
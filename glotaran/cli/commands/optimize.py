@@ -3,11 +3,8 @@ import typing
 
 import click
 
-from glotaran.analysis.optimize import optimize
 from glotaran.cli.commands import util
-from glotaran.io import save_result
 from glotaran.plugin_system.data_io_registration import known_data_formats
-from glotaran.project.scheme import Scheme
 
 
 @click.option(
@@ -59,6 +56,11 @@ def optimize_cmd(
     glotaran optimize --
 
     """
+    # imported here, so that the other commands don't have to wait for the analysis modules
+    from glotaran.analysis.optimize import optimize
+    from glotaran.io import save_result
+    from glotaran.project.scheme import Scheme
+
     if scheme_file is not None:
         scheme = util.load_scheme_file(scheme_file, verbose=True)
         if nfev is not None:
@@ -1,7 +1,7 @@
 import click
 
-from glotaran.model import known_model_names
 from glotaran.plugin_system.data_io_registration import known_data_formats
+from glotaran.plugin_system.model_registration import known_model_names
 from glotaran.plugin_system.project_io_registration import known_project_formats
 
 
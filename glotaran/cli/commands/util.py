@@ -110,9 +110,8 @@ def select_data(data, dim, selection):
 
 
 def write_data(data, out):
-    df = data.to_dataframe()
-    if len(data.dims) == 2:
-        df = df.reset_index().pivot(index=data.dims[0], columns=data.dims[1], values=data.name)
+    # 2D data converts directly to a frame, without stacking and pivoting all values
+    df = data.to_pandas() if len(data.dims) == 2 else data.to_dataframe()
     df.to_csv(out)
 
 
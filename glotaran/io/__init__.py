@@ -6,9 +6,10 @@ Since Io functionality is purely plugin based this package mostly
 reexports functions from the pluginsystem from a common place.
 """
 
+from glotaran.io.dataset_cache import clear_dataset_cache
+from glotaran.io.dataset_cache import configure_dataset_cache
 from glotaran.io.interface import DataIoInterface
 from glotaran.io.interface import ProjectIoInterface
-from glotaran.io.prepare_dataset import prepare_time_trace_dataset
 from glotaran.plugin_system.data_io_registration import data_io_plugin_table
 from glotaran.plugin_system.data_io_registration import get_dataloader
 from glotaran.plugin_system.data_io_registration import get_datasaver
@@ -35,6 +36,12 @@ from glotaran.plugin_system.project_io_registration import show_project_io_metho
 def __getattr__(attribute_name: str):
     from glotaran.deprecation.deprecation_utils import deprecate_module_attribute
 
+    # imported on first access, since it imports xarray
+    if attribute_name == "prepare_time_trace_dataset":
+        from glotaran.io.prepare_dataset import prepare_time_trace_dataset
+
+        return prepare_time_trace_dataset
+
     if attribute_name == "read_data_file":
         return deprecate_module_attribute(
             deprecated_qual_name="glotaran.io.read_data_file",
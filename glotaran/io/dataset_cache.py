@@ -0,0 +1,261 @@
+"""A persistent on-disk cache of loaded datasets.
+
+Parsing text files or decoding binary files of measurement devices can take much longer than
+reading the resulting :xarraydoc:`Dataset` back from a binary file. Data io plugins which set
+:attr:`glotaran.io.DataIoInterface.cache_datasets` get their loaded datasets stored in the
+cache directory, so that loading the same unchanged file again with the same options is
+nearly instant.
+
+The entries are netCDF files, which are read without executing any code. An entry is keyed by
+the version of glotaran and xarray, the resolved path, the modification time and the size of
+the file, the format and the options of the loader. Datasets which can't be stored as netCDF,
+e.g. because of attributes of unsupported types, bypass the cache. The least recently used
+entries are removed once the cache exceeds its maximum size. Warnings of the loader are only
+shown when the file is read.
+
+The cache is deactivated by default. It can be activated and configured with
+:func:`configure_dataset_cache` or with the environment variables ``GLOTARAN_DATASET_CACHE``
+(set to ``1`` to activate the cache), ``GLOTARAN_DATASET_CACHE_DIR`` and
+``GLOTARAN_DATASET_CACHE_SIZE`` (in bytes). A cache directory which doesn't exist is created
+accessible by the current user only.
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import pickle
+import tempfile
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from os import PathLike
+    from typing import Any
+    from typing import Callable
+
+    import xarray as xr
+
+CACHE_FILE_SUFFIX = ".nc"
+"""The suffix of the cache entries."""
+
+_ENTRY_READERS = {".dataset": "load_dataset", ".dataarray": "load_dataarray"}
+
+DEFAULT_MAX_CACHE_SIZE = 2 ** 30
+"""The default maximum size of the cache in bytes."""
+
+
+def _touch(entry: Path):
+    # the coarse timestamps of the file system can't order entries written in quick succession
+    now = time.time_ns()
+    os.utime(entry, ns=(now, now))
+
+
+def _default_cache_directory() -> Path:
+    cache_home = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(cache_home) / "glotaran" / "datasets"
+
+
+class DatasetCache:
+    """A directory of datasets stored as netCDF, keyed by their source file and loader options."""
+
+    def __init__(
+        self,
+        directory: str | PathLike[str],
+        max_size: int = DEFAULT_MAX_CACHE_SIZE,
+        enabled: bool = True,
+    ):
+        """Initializes a cache.
+
+        Parameters
+        ----------
+        directory : str | PathLike[str]
+            The directory to store the cache entries in, created on the first store accessible
+            by the current user only.
+        max_size : int
+            The maximum size of all entries in bytes.
+        enabled : bool
+            Whether datasets are looked up and stored.
+        """
+        self.directory = Path(directory)
+        self.max_size = max_size
+        self.enabled = enabled
+
+    @classmethod
+    def from_environment(cls) -> DatasetCache:
+        """Creates a cache configured by the ``GLOTARAN_DATASET_CACHE*`` environment variables.
+
+        The cache is only enabled if ``GLOTARAN_DATASET_CACHE`` is set to ``1``.
+
+        Returns
+        -------
+        DatasetCache
+            The configured cache.
+        """
+        return cls(
+            directory=os.environ.get("GLOTARAN_DATASET_CACHE_DIR") or _default_cache_directory(),
+            max_size=int(os.environ.get("GLOTARAN_DATASET_CACHE_SIZE", DEFAULT_MAX_CACHE_SIZE)),
+            enabled=os.environ.get("GLOTARAN_DATASET_CACHE", "0").lower()
+            in ("1", "true", "yes", "on"),
+        )
+
+    @property
+    def size(self) -> int:
+        """The size of all entries in bytes."""
+        return sum(entry.stat().st_size for entry in self._entries())
+
+    def load(
+        self,
+        file_name: str | PathLike[str],
+        format_name: str,
+        options: dict[str, Any],
+        loader: Callable[..., xr.Dataset | xr.DataArray],
+    ) -> xr.Dataset | xr.DataArray:
+        """Loads a dataset from the cache or with the loader, storing the loaded dataset.
+
+        Files which don't exist, options which can't be pickled for the key and datasets
+        which can't be stored as netCDF bypass the cache.
+
+        Parameters
+        ----------
+        file_name : str | PathLike[str]
+            The file containing the data.
+        format_name : str
+            The format of the file.
+        options : dict[str, Any]
+            The keyword arguments of the loader.
+        loader : Callable[..., xr.Dataset | xr.DataArray]
+            The function loading the file, called with the file name and the options.
+
+        Returns
+        -------
+        xr.Dataset | xr.DataArray
+            The loaded dataset.
+        """
+        key = self._key(file_name, format_name, options) if self.enabled else None
+        if key is None:
+            return loader(str(file_name), **options)
+
+        import xarray as xr
+
+        for kind, reader in _ENTRY_READERS.items():
+            entry = self.directory / f"{key}{kind}{CACHE_FILE_SUFFIX}"
+            if entry.is_file():
+                try:
+                    dataset = getattr(xr, reader)(entry)
+                    _touch(entry)
+                    return dataset
+                except (OSError, ValueError, KeyError):
+                    pass
+
+        dataset = loader(str(file_name), **options)
+        self._store(key, dataset)
+        return dataset
+
+    def clear(self):
+        """Removes all entries."""
+        for entry in self._entries():
+            entry.unlink(missing_ok=True)
+
+    def _key(
+        self, file_name: str | PathLike[str], format_name: str, options: dict[str, Any]
+    ) -> str | None:
+        import xarray as xr
+
+        from glotaran import __version__
+
+        try:
+            path = Path(file_name).resolve()
+            stat = path.stat()
+            return hashlib.sha256(
+                pickle.dumps(
+                    (
+                        __version__,
+                        xr.__version__,
+                        str(path),
+                        stat.st_mtime_ns,
+                        stat.st_size,
+                        format_name,
+                        options,
+                    )
+                )
+            ).hexdigest()
+        except (OSError, pickle.PicklingError, TypeError, AttributeError):
+            return None
+
+    def _store(self, key: str, dataset: xr.Dataset | xr.DataArray):
+        import xarray as xr
+
+        kind = ".dataarray" if isinstance(dataset, xr.DataArray) else ".dataset"
+        entry = self.directory / f"{key}{kind}{CACHE_FILE_SUFFIX}"
+        temporary = None
+        try:
+            self.directory.mkdir(mode=0o700, parents=True, exist_ok=True)
+            # write to a temporary file first, so that concurrent loads never see partial entries
+            handle, temporary = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            os.close(handle)
+            dataset.to_netcdf(temporary)
+            if os.path.getsize(temporary) > self.max_size:
+                return
+            os.replace(temporary, entry)
+            temporary = None
+            _touch(entry)
+            self._evict()
+        except (OSError, ValueError, TypeError):
+            pass
+        finally:
+            if temporary is not None:
+                Path(temporary).unlink(missing_ok=True)
+
+    def _evict(self):
+        entries = sorted(
+            ((entry.stat(), entry) for entry in self._entries()),
+            key=lambda stat_and_entry: stat_and_entry[0].st_mtime_ns,
+        )
+        size = sum(stat.st_size for stat, _ in entries)
+        for stat, entry in entries:
+            if size <= self.max_size:
+                break
+            entry.unlink(missing_ok=True)
+            size -= stat.st_size
+
+    def _entries(self) -> list[Path]:
+        if not self.directory.is_dir():
+            return []
+        return list(self.directory.glob(f"*{CACHE_FILE_SUFFIX}"))
+
+
+dataset_cache = DatasetCache.from_environment()
+"""The cache used by :func:`glotaran.io.load_dataset`."""
+
+
+def configure_dataset_cache(
+    *,
+    enabled: bool | None = None,
+    directory: str | PathLike[str] | None = None,
+    max_size: int | None = None,
+):
+    """Configures the cache used by :func:`glotaran.io.load_dataset`.
+
+    Options which aren't given keep their current value.
+
+    Parameters
+    ----------
+    enabled : bool | None
+        Whether loaded datasets are cached.
+    directory : str | PathLike[str] | None
+        The directory to store the cache entries in.
+    max_size : int | None
+        The maximum size of the cache in bytes.
+    """
+    if enabled is not None:
+        dataset_cache.enabled = enabled
+    if directory is not None:
+        dataset_cache.directory = Path(directory)
+    if max_size is not None:
+        dataset_cache.max_size = max_size
+
+
+def clear_dataset_cache():
+    """Removes all datasets from the cache used by :func:`glotaran.io.load_dataset`."""
+    dataset_cache.clear()
@@ -32,6 +32,11 @@ if TYPE_CHECKING:
 class DataIoInterface:
     """Baseclass for Data IO plugins."""
 
+    cache_datasets: bool = False
+    """Whether :func:`glotaran.io.load_dataset` stores the loaded datasets in the
+    :mod:`dataset cache<glotaran.io.dataset_cache>`, which is worth it for formats that are
+    slow to parse."""
+
     def __init__(self, format_name: str) -> None:
         """Initialize a Data IO plugin with the name of the format.
 
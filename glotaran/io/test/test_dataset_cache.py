@@ -0,0 +1,203 @@
+from __future__ import annotations
+
+import os
+from typing import TYPE_CHECKING
+
+import numpy as np
+import pytest
+import xarray as xr
+
+from glotaran.io import clear_dataset_cache
+from glotaran.io import configure_dataset_cache
+from glotaran.io import load_dataset
+from glotaran.io import save_dataset
+from glotaran.io.dataset_cache import DatasetCache
+from glotaran.io.dataset_cache import dataset_cache
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    from _pytest.monkeypatch import MonkeyPatch
+
+
+class CountingLoader:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, file_name: str, **kwargs) -> xr.DataArray:
+        self.calls += 1
+        with open(file_name) as file:
+            content = file.read()
+        return xr.DataArray(np.full(1000, len(content), dtype=np.float64), attrs=kwargs)
+
+
+@pytest.fixture
+def data_file(tmp_path: Path) -> Path:
+    file_path = tmp_path / "data.txt"
+    file_path.write_text("data")
+    return file_path
+
+
+@pytest.fixture
+def cache_directory(tmp_path: Path, monkeypatch: MonkeyPatch) -> Path:
+    directory = tmp_path / "cache"
+    monkeypatch.setattr(dataset_cache, "directory", directory)
+    monkeypatch.setattr(dataset_cache, "enabled", True)
+    return directory
+
+
+def test_dataset_cache_load(tmp_path: Path, data_file: Path):
+    cache = DatasetCache(tmp_path / "cache")
+    loader = CountingLoader()
+
+    first = cache.load(data_file, "txt", {"option": 1}, loader)
+    second = cache.load(data_file, "txt", {"option": 1}, loader)
+
+    assert loader.calls == 1
+    assert second.identical(first)
+    assert second is not first
+    assert cache.size > 0
+
+    cache.load(data_file, "txt", {"option": 2}, loader)
+    assert loader.calls == 2
+
+    stat = data_file.stat()
+    data_file.write_text("changed data")
+    os.utime(data_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+    changed = cache.load(data_file, "txt", {"option": 1}, loader)
+    assert loader.calls == 3
+    assert changed[0] == len("changed data")
+
+    cache.clear()
+    assert cache.size == 0
+    cache.load(data_file, "txt", {"option": 1}, loader)
+    assert loader.calls == 4
+
+
+def test_dataset_cache_bypass(tmp_path: Path, data_file: Path):
+    loader = CountingLoader()
+
+    disabled_cache = DatasetCache(tmp_path / "disabled", enabled=False)
+    disabled_cache.load(data_file, "txt", {}, loader)
+    disabled_cache.load(data_file, "txt", {}, loader)
+    assert loader.calls == 2
+    assert disabled_cache.size == 0
+
+    cache = DatasetCache(tmp_path / "cache")
+    unpicklable_options = {"option": lambda: None}
+    cache.load(data_file, "txt", unpicklable_options, loader)
+    cache.load(data_file, "txt", unpicklable_options, loader)
+    assert loader.calls == 4
+    assert cache.size == 0
+
+
+def test_dataset_cache_entries(tmp_path: Path, data_file: Path):
+    cache = DatasetCache(tmp_path / "cache")
+    loader = CountingLoader()
+    cache.load(data_file, "txt", {"option": 1}, loader)
+
+    (entry,) = cache.directory.iterdir()
+    assert entry.name.endswith(".dataarray.nc")
+    assert xr.load_dataarray(entry).identical(loader(str(data_file), option=1))
+    if os.name == "posix":
+        assert cache.directory.stat().st_mode & 0o777 == 0o700
+
+    entry.write_bytes(b"corrupted")
+    cache.load(data_file, "txt", {"option": 1}, loader)
+    assert loader.calls == 3
+    assert len(list(cache.directory.iterdir())) == 1
+
+
+def test_dataset_cache_unsupported_dataset(tmp_path: Path, data_file: Path):
+    cache = DatasetCache(tmp_path / "cache")
+    calls = []
+
+    def loader(file_name: str) -> xr.Dataset:
+        calls.append(file_name)
+        return xr.Dataset({"data": ("x", [1.0])}, attrs={"unsupported": {"nested": 1}})
+
+    cache.load(data_file, "txt", {}, loader)
+    loaded = cache.load(data_file, "txt", {}, loader)
+
+    assert len(calls) == 2
+    assert loaded.attrs == {"unsupported": {"nested": 1}}
+    assert list(cache.directory.iterdir()) == []
+
+
+def test_dataset_cache_eviction(tmp_path: Path, data_file: Path):
+    loader = CountingLoader()
+    cache = DatasetCache(tmp_path / "cache")
+    cache.load(data_file, "txt", {"option": 0}, loader)
+    entry_size = cache.size
+    cache.clear()
+
+    cache.max_size = int(2.5 * entry_size)
+    for option in range(4):
+        cache.load(data_file, "txt", {"option": option}, loader)
+    assert cache.size <= cache.max_size
+    assert len(list(cache.directory.iterdir())) == 2
+
+    # the least recently used entries have been removed
+    cache.load(data_file, "txt", {"option": 3}, loader)
+    assert loader.calls == 5
+    cache.load(data_file, "txt", {"option": 0}, loader)
+    assert loader.calls == 6
+
+    cache.max_size = entry_size - 1
+    cache.clear()
+    cache.load(data_file, "txt", {"option": 0}, loader)
+    assert cache.size == 0
+
+
+def test_configure_dataset_cache(tmp_path: Path, monkeypatch: MonkeyPatch):
+    monkeypatch.setattr(dataset_cache, "directory", dataset_cache.directory)
+    monkeypatch.setattr(dataset_cache, "max_size", dataset_cache.max_size)
+    monkeypatch.setattr(dataset_cache, "enabled", dataset_cache.enabled)
+
+    configure_dataset_cache(enabled=False, directory=tmp_path, max_size=10)
+    assert not dataset_cache.enabled
+    assert dataset_cache.directory == tmp_path
+    assert dataset_cache.max_size == 10
+
+    configure_dataset_cache(enabled=True)
+    assert dataset_cache.enabled
+    assert dataset_cache.directory == tmp_path
+
+
+def test_dataset_cache_from_environment(tmp_path: Path, monkeypatch: MonkeyPatch):
+    monkeypatch.setenv("GLOTARAN_DATASET_CACHE", "0")
+    monkeypatch.setenv("GLOTARAN_DATASET_CACHE_DIR", str(tmp_path))
+    monkeypatch.setenv("GLOTARAN_DATASET_CACHE_SIZE", "1000")
+
+    cache = DatasetCache.from_environment()
+
+    assert not cache.enabled
+    assert cache.directory == tmp_path
+    assert cache.max_size == 1000
+
+
+def test_dataset_cache_from_environment_default(monkeypatch: MonkeyPatch):
+    monkeypatch.delenv("GLOTARAN_DATASET_CACHE", raising=False)
+
+    assert not DatasetCache.from_environment().enabled
+
+
+def test_load_dataset_cache(tmp_path: Path, cache_directory: Path):
+    data = xr.DataArray(
+        np.arange(12, dtype=np.float64).reshape(3, 4),
+        coords=[("time", [0.0, 1.0, 2.0]), ("spectral", [400.0, 500.0, 600.0, 700.0])],
+    )
+    file_path = tmp_path / "data.ascii"
+    save_dataset(data, file_path)
+
+    loaded = load_dataset(file_path)
+    assert len(list(cache_directory.iterdir())) == 1
+
+    cached = load_dataset(file_path)
+    assert cached.identical(loaded)
+    assert load_dataset(file_path, use_cache=False).identical(loaded)
+
+    clear_dataset_cache()
+    assert len(list(cache_directory.iterdir())) == 0
+    load_dataset(file_path, use_cache=False)
+    assert len(list(cache_directory.iterdir())) == 0
@@ -427,6 +427,22 @@ class ParameterGroup(dict):
         """Special method used by ``ipython`` to render markdown."""
         return str(self.markdown())
 
+    def __getstate__(self):
+        """Get state for pickle."""
+        state = self.__dict__.copy()
+        # the expression evaluator holds references to stdout and stderr
+        del state["_evaluator"]
+        return state
+
+    def __setstate__(self, state):
+        """Set state from pickle."""
+        self.__dict__.update(state)
+        self._evaluator = (
+            asteval.Interpreter(symtable=asteval.make_symbol_table(group=self))
+            if self._root_group is None
+            else None
+        )
+
     def __repr__(self):
         """Representation used by repl and tracebacks."""
         if self.label is None:
@@ -1,3 +1,5 @@
+import pickle
+
 from IPython.core.formatters import format_display_data
 
 from glotaran.io import load_parameters
@@ -91,3 +93,18 @@ def test_param_group_ipython_rendering():
 
     assert "text/markdown" in rendered_markdown_return
     assert rendered_markdown_return["text/markdown"].startswith("  * __foo__")
+
+
+def test_param_group_pickle():
+    """Pickled groups keep values and can still evaluate expressions."""
+    parameters = ParameterGroup.from_dict(
+        {"rates": [["k1", 1.0], ["k2", {"expr": "$rates.k1 * 2"}]], "scale": [0.5]}
+    )
+
+    pickled_parameters = pickle.loads(pickle.dumps(parameters))
+
+    assert pickled_parameters.get("rates.k2").value == 2
+    assert pickled_parameters.get("scale.1").value == 0.5
+    pickled_parameters.get("rates.k1").value = 3.0
+    pickled_parameters.update_parameter_expression()
+    assert pickled_parameters.get("rates.k2").value == 6
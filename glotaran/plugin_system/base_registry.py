@@ -7,6 +7,7 @@ This is to prevent issues with circular imports.
 from __future__ import annotations
 
 import os
+from collections.abc import MutableMapping as MutableMappingBase
 from importlib import metadata
 from typing import TYPE_CHECKING
 from warnings import warn
@@ -14,6 +15,7 @@ from warnings import warn
 if TYPE_CHECKING:
     from typing import Any
     from typing import Callable
+    from typing import Iterator
     from typing import MutableMapping
     from typing import Sequence
     from typing import Type
@@ -31,15 +33,117 @@ if TYPE_CHECKING:
     GenericPluginInstance = TypeVar("GenericPluginInstance", bound=object)
 
 
+class LazyPluginRegistry(MutableMappingBase):
+    """Plugin registry which imports the modules implementing plugins on first use.
+
+    The entry points of the plugin modules are added by :func:`load_plugins` and their names
+    are the names the plugins get registered under, so the names of all plugins are known
+    without importing any plugin module. Looking up a name imports the modules of the entry
+    points with that name, looking up an unknown name or iterating the registry imports
+    the modules of all entry points. The names of the entry points are checked once their
+    modules are imported, names which no plugin got registered under are dropped with a
+    :class:`PluginEntryPointNameWarning`.
+    """
+
+    def __init__(self):
+        """Initialize a registry without any plugin or entry point."""
+        self._plugins: dict[str, Any] = {}
+        self._entry_points: dict[str, list[metadata.EntryPoint]] = {}
+
+    @property
+    def loaded(self) -> dict[str, Any]:
+        """The plugins registered so far, without importing any module."""
+        return self._plugins
+
+    @property
+    def names(self) -> list[str]:
+        """Names of the registered plugins and of the entry points which aren't loaded yet.
+
+        The name of an entry point which isn't loaded yet is only listed until its module gets
+        imported, if that module doesn't register a plugin under the name.
+        """
+        return list(dict.fromkeys([*self._plugins, *self._entry_points]))
+
+    def add_entry_point(self, entry_point: metadata.EntryPoint):
+        """Add an entry point, whose module gets imported when a plugin with its name is used.
+
+        Parameters
+        ----------
+        entry_point : metadata.EntryPoint
+            Entry point of a module registering a plugin with the name of the entry point.
+        """
+        entry_points = self._entry_points.setdefault(entry_point.name, [])
+        if entry_point not in entry_points:
+            entry_points.append(entry_point)
+
+    def load(self, name: str | None = None):
+        """Import the modules of the entry points with a name, or of all entry points.
+
+        Parameters
+        ----------
+        name : str | None
+            Name of the entry points, defaults to all entry points.
+        """
+        names = list(self._entry_points) if name is None else [name]
+        entry_points = [
+            entry_point for name in names for entry_point in self._entry_points.get(name, [])
+        ]
+        # a module registers all of its plugins, so all of its entry points are done
+        modules = {entry_point.value for entry_point in entry_points}
+        for name in list(self._entry_points):
+            self._entry_points[name] = [
+                entry_point
+                for entry_point in self._entry_points[name]
+                if entry_point.value not in modules
+            ]
+            if not self._entry_points[name]:
+                del self._entry_points[name]
+        for entry_point in entry_points:
+            entry_point.load()
+        for entry_point in entry_points:
+            if entry_point.name not in self._plugins:
+                warn(PluginEntryPointNameWarning(entry_point), stacklevel=3)
+
+    def _load_plugin(self, key: str):
+        if key not in self._plugins:
+            if key in self._entry_points:
+                self.load(key)
+            if key not in self._plugins:
+                self.load()
+
+    def __getitem__(self, key: str) -> Any:
+        self._load_plugin(key)
+        return self._plugins[key]
+
+    def __setitem__(self, key: str, plugin: Any):
+        self._plugins[key] = plugin
+
+    def __delitem__(self, key: str):
+        del self._plugins[key]
+
+    def __contains__(self, key: object) -> bool:
+        if isinstance(key, str):
+            self._load_plugin(key)
+        return key in self._plugins
+
+    def __iter__(self) -> Iterator[str]:
+        self.load()
+        return iter(list(self._plugins))
+
+    def __len__(self) -> int:
+        self.load()
+        return len(self._plugins)
+
+
 class __PluginRegistry:
     """Central Plugin Registry.
 
     This is super private since if anyone messes with it, the pluginsystem could break.
     """
 
-    model: MutableMapping[str, type[Model]] = {}
-    data_io: MutableMapping[str, DataIoInterface] = {}
-    project_io: MutableMapping[str, ProjectIoInterface] = {}
+    model: MutableMapping[str, type[Model]] = LazyPluginRegistry()
+    data_io: MutableMapping[str, DataIoInterface] = LazyPluginRegistry()
+    project_io: MutableMapping[str, ProjectIoInterface] = LazyPluginRegistry()
 
 
 def full_plugin_name(plugin: object | type[object]) -> str:
@@ -106,6 +210,27 @@ class PluginOverwriteWarning(UserWarning):
         super().__init__(message, *args)
 
 
+class PluginEntryPointNameWarning(UserWarning):
+    """Warning used if the module of an entry point doesn't register a plugin with its name."""
+
+    def __init__(self, entry_point: metadata.EntryPoint, *args: Any):
+        """Name the entry point and its module in the warning message.
+
+        Parameters
+        ----------
+        entry_point : metadata.EntryPoint
+            Entry point whose module didn't register a plugin with its name.
+        *args : Any
+            Additional args passed to the super constructor.
+        """
+        message = (
+            f"The module {entry_point.value!r} of the entry point {entry_point.name!r} didn't "
+            f"register a plugin named {entry_point.name!r}, so it was listed as a plugin until "
+            "it got imported. Name the entry points of a module like the plugins it registers."
+        )
+        super().__init__(message, *args)
+
+
 def load_plugins():
     """Initialize plugins registered under the entrypoint 'glotaran.plugins'.
 
@@ -117,12 +242,24 @@ def load_plugins():
     - ``glotaran.plugins.data_io``
     - ``glotaran.plugins.model``
     - ``glotaran.plugins.project_io``
+
+    The modules of those entry points are imported when one of their plugins is used,
+    which requires the name of an entry point to be the name its module registers a plugin
+    under (e.g. the format name of an io plugin). A module registering multiple plugins
+    needs an entry point for each name. Entry points whose module doesn't register a plugin
+    with their name are only found by importing all plugin modules and cause a
+    :class:`PluginEntryPointNameWarning` once their module is imported. The modules of other
+    entry points are imported right away.
     """
     if "DEACTIVATE_GTA_PLUGINS" not in os.environ:  # pragma: no branch
         for entry_point_name, entry_points in metadata.entry_points().items():
             if entry_point_name.startswith("glotaran.plugins"):
+                registry = getattr(__PluginRegistry, entry_point_name.rpartition(".")[2], None)
                 for entry_point in entry_points:
-                    entry_point.load()
+                    if isinstance(registry, LazyPluginRegistry):
+                        registry.add_entry_point(entry_point)
+                    else:
+                        entry_point.load()
 
 
 def set_plugin(
@@ -219,14 +356,20 @@ def add_plugin_to_registry(
             "The character '.' isn't allowed in the name of a plugin, "
             f"you provided the name {plugin_register_key!r}."
         )
-    if plugin_register_key in plugin_registry:
+    # a plugin is only compared to the plugins registered so far, like in the order of imports
+    known_plugins = (
+        plugin_registry.loaded
+        if isinstance(plugin_registry, LazyPluginRegistry)
+        else plugin_registry
+    )
+    if plugin_register_key in known_plugins:
         old_key = plugin_register_key
         plugin_register_key = full_plugin_name(plugin)
-        if full_plugin_name(plugin_registry[old_key]) != full_plugin_name(plugin):
+        if full_plugin_name(known_plugins[old_key]) != full_plugin_name(plugin):
             warn(
                 PluginOverwriteWarning(
                     old_key=old_key,
-                    old_plugin=plugin_registry[old_key],
+                    old_plugin=known_plugins[old_key],
                     new_plugin=plugin,
                     plugin_set_func_name=plugin_set_func_name,
                 ),
@@ -298,7 +441,13 @@ def registered_plugins(
         return sorted(plugin_registry.keys())
 
     else:
-        return sorted(filter(lambda key: "." not in key, plugin_registry.keys()))
+        # the names of lazy plugins are known without importing them
+        names = (
+            plugin_registry.names
+            if isinstance(plugin_registry, LazyPluginRegistry)
+            else plugin_registry.keys()
+        )
+        return sorted(filter(lambda key: "." not in key, names))
 
 
 def is_registered_plugin(
@@ -12,6 +12,7 @@ from typing import TYPE_CHECKING
 
 from tabulate import tabulate
 
+from glotaran.io.dataset_cache import dataset_cache
 from glotaran.io.interface import DataIoInterface
 from glotaran.plugin_system.base_registry import __PluginRegistry
 from glotaran.plugin_system.base_registry import add_instantiated_plugin_to_registry
@@ -171,16 +172,27 @@ def get_data_io(format_name: str) -> DataIoInterface:
 
 @not_implemented_to_value_error
 def load_dataset(
-    file_name: str | PathLike[str], format_name: str = None, **kwargs: Any
+    file_name: str | PathLike[str],
+    format_name: str = None,
+    *,
+    use_cache: bool = True,
+    **kwargs: Any,
 ) -> xr.Dataset | xr.DataArray:
     """Read data from a file to :xarraydoc:`Dataset` or :xarraydoc:`DataArray`.
 
+    If the :mod:`dataset cache<glotaran.io.dataset_cache>` is activated, datasets of formats
+    which are slow to parse are stored in it, so loading an unchanged file again with the
+    same arguments reads the stored dataset.
+
     Parameters
     ----------
     file_name : str | PathLike[str]
         File containing the data.
     format_name : str
         Format the file is in, if not provided it will be inferred from the file extension.
+    use_cache : bool
+        Whether to use the dataset cache, if it is activated. Set to ``False`` to always
+        read the file.
     **kwargs : Any
         Additional keyword arguments passes to the ``read_dataset`` implementation
         of the data io plugin. If you aren't sure about those use ``get_dataloader``
@@ -191,7 +203,10 @@ def load_dataset(
     xr.Dataset|xr.DataArray
         Data loaded from the file.
     """
-    io = get_data_io(format_name or inferr_file_format(file_name))
+    format_name = format_name or inferr_file_format(file_name)
+    io = get_data_io(format_name)
+    if use_cache and io.cache_datasets:
+        return dataset_cache.load(file_name, format_name, kwargs, io.load_dataset)
     return io.load_dataset(str(file_name), **kwargs)  # type: ignore[call-arg]
 
 
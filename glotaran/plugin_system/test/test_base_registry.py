@@ -1,6 +1,10 @@
 from __future__ import annotations
 
+import subprocess
+import sys
 from copy import copy
+from importlib import metadata
+from textwrap import dedent
 from typing import TYPE_CHECKING
 from typing import MutableMapping
 from typing import Type
@@ -15,6 +19,8 @@ from glotaran.builtin.models.kinetic_image import KineticImageModel
 from glotaran.io.interface import DataIoInterface
 from glotaran.io.interface import ProjectIoInterface
 from glotaran.model.base_model import Model
+from glotaran.plugin_system.base_registry import LazyPluginRegistry
+from glotaran.plugin_system.base_registry import PluginEntryPointNameWarning
 from glotaran.plugin_system.base_registry import PluginOverwriteWarning
 from glotaran.plugin_system.base_registry import add_instantiated_plugin_to_registry
 from glotaran.plugin_system.base_registry import add_plugin_to_registry
@@ -29,7 +35,10 @@ from glotaran.plugin_system.base_registry import set_plugin
 from glotaran.plugin_system.base_registry import show_method_help
 
 if TYPE_CHECKING:
+    from pathlib import Path
+
     from _pytest.capture import CaptureFixture
+    from _pytest.monkeypatch import MonkeyPatch
 
     from glotaran.plugin_system.base_registry import _PluginInstantiableType
     from glotaran.plugin_system.base_registry import _PluginType
@@ -248,6 +257,114 @@ def test_set_plugin_no_dot_full_name():
         set_plugin("yml", "sdt", plugin_registry)
 
 
+@pytest.fixture
+def lazy_registry(tmp_path: Path, monkeypatch: MonkeyPatch):
+    """Registry with entry points of two plugin modules, which aren't imported yet."""
+    registry = LazyPluginRegistry()
+    monkeypatch.setattr(sys.modules[__name__], "lazy_registry_instance", registry, raising=False)
+    for module_name, plugin_names in (
+        ("lazy_plugin_module", ["lazy", "lazy_alias"]),
+        ("other_plugin_module", ["other"]),
+    ):
+        (tmp_path / f"{module_name}.py").write_text(
+            dedent(
+                f"""
+                from {__name__} import lazy_registry_instance
+                from glotaran.plugin_system.base_registry import add_plugin_to_registry
+
+                class Plugin:
+                    pass
+
+                for name in {plugin_names}:
+                    add_plugin_to_registry(name, Plugin, lazy_registry_instance, "")
+                """
+            )
+        )
+    monkeypatch.syspath_prepend(str(tmp_path))
+    group = "glotaran.plugins.data_io"
+    registry.add_entry_point(metadata.EntryPoint("lazy", "lazy_plugin_module", group))
+    registry.add_entry_point(metadata.EntryPoint("lazy_alias", "lazy_plugin_module", group))
+    registry.add_entry_point(metadata.EntryPoint("unmatched", "other_plugin_module", group))
+    yield registry
+    sys.modules.pop("lazy_plugin_module", None)
+    sys.modules.pop("other_plugin_module", None)
+
+
+def test_lazy_plugin_registry(lazy_registry: LazyPluginRegistry):
+    """Modules are imported when one of their plugins is used."""
+    assert registered_plugins(lazy_registry) == ["lazy", "lazy_alias", "unmatched"]
+    assert "lazy_plugin_module" not in sys.modules
+
+    assert lazy_registry["lazy_alias"].__module__ == "lazy_plugin_module"
+    assert "lazy_plugin_module" in sys.modules
+    assert "other_plugin_module" not in sys.modules
+    assert "lazy" in lazy_registry
+
+    # the plugins of entry points which aren't named like them are found by importing all
+    with pytest.warns(PluginEntryPointNameWarning, match="'unmatched'"):
+        plugin = get_plugin_from_registry("other", lazy_registry, "")
+    assert plugin.__module__ == "other_plugin_module"
+    assert "unmatched" not in lazy_registry
+    assert registered_plugins(lazy_registry) == ["lazy", "lazy_alias", "other"]
+    assert len(lazy_registry) == 5
+
+
+def test_lazy_plugin_registry_full_names(lazy_registry: LazyPluginRegistry):
+    """Listing and setting full names imports all modules."""
+    assert "other_plugin_module.Plugin" not in registered_plugins(lazy_registry)
+    with pytest.warns(PluginEntryPointNameWarning):
+        full_names = registered_plugins(lazy_registry, full_names=True)
+    assert "other_plugin_module.Plugin" in full_names
+
+    set_plugin("lazy", "other_plugin_module.Plugin", lazy_registry)
+    assert lazy_registry["lazy"].__module__ == "other_plugin_module"
+
+
+def test_builtin_entry_point_names_are_registered():
+    """The modules of the builtin entry points register plugins under their names."""
+    script = dedent(
+        """
+        import warnings
+        from importlib import metadata
+
+        from glotaran.plugin_system.base_registry import __PluginRegistry as registries
+
+        warnings.simplefilter("error")
+        for group, entry_points in metadata.entry_points().items():
+            if group.startswith("glotaran.plugins"):
+                registry = getattr(registries, group.rpartition(".")[2])
+                registry.load()
+                for entry_point in entry_points:
+                    assert entry_point.name in registry.loaded, entry_point
+        """
+    )
+    subprocess.run([sys.executable, "-c", script], check=True)
+
+
+def test_import_glotaran_imports_no_plugin():
+    """Importing glotaran and the cli records the plugins without importing them."""
+    script = dedent(
+        """
+        import sys
+
+        import glotaran
+        import glotaran.cli.main
+        from glotaran.plugin_system.data_io_registration import known_data_formats
+        from glotaran.plugin_system.model_registration import known_model_names
+
+        known_data_formats()
+        known_model_names()
+        print(" ".join(sys.modules))
+        """
+    )
+    modules = subprocess.run(
+        [sys.executable, "-c", script], capture_output=True, check=True, text=True
+    ).stdout.split()
+
+    for heavy_module in ["glotaran.builtin", "numba", "numpy", "scipy", "xarray", "pandas"]:
+        assert heavy_module not in modules
+
+
 def test_registered_plugins():
     """List of registered names"""
     result = [
@@ -2,6 +2,7 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
+from typing import TYPE_CHECKING
 
 import numpy as np
 import xarray as xr
@@ -15,6 +16,9 @@ from glotaran.parameter import ParameterGroup
 from glotaran.project.scheme import Scheme
 from glotaran.utils.ipython import MarkdownStr
 
+if TYPE_CHECKING:
+    from typing import Mapping
+
 
 @dataclass
 class Result:
@@ -23,9 +27,14 @@ class Result:
     additional_penalty: np.ndarray | None
     """A vector with the value for each additional penalty, or None"""
     cost: ArrayLike
-    data: dict[str, xr.Dataset]
+    data: Mapping[str, xr.Dataset]
     """The resulting data as a dictionary of :xarraydoc:`Dataset`.
 
+    With :attr:`Scheme.result_data_mode` ``'lazy'`` this is a
+    :class:`glotaran.analysis.result_data.LazyResultData`, which creates each dataset when it
+    is accessed first and keeps the problem of the optimization alive until all datasets are
+    created.
+
     Notes
     -----
     The actual content of the data depends on the actual model and can be found in the
@@ -78,6 +87,13 @@ class Result:
 
     :math:`rms = \sqrt{\chi^2_{red}}`
     """
+    timings: dict[str, dict[str, float]] | None = None
+    """The wall ``'time'`` in seconds and number of ``'calls'`` of the phases of the optimization,
+    e.g. ``'calculate_matrix'``, ``'solve'`` or ``'create_result_data'``, and the ``'hits'`` and
+    ``'misses'`` of the ``'matrix_cache'``.
+
+    See also: :class:`glotaran.analysis.phase_timer.PhaseTimer`
+    """
 
     @property
     def model(self) -> Model:
@@ -110,6 +126,18 @@ class Result:
             gtol=self.scheme.gtol,
             xtol=self.scheme.xtol,
             optimization_method=self.scheme.optimization_method,
+            jacobian_method=self.scheme.jacobian_method,
+            jacobian_sparsity=self.scheme.jacobian_sparsity,
+            executor=self.scheme.executor,
+            number_of_workers=self.scheme.number_of_workers,
+            matrix_cache_size=self.scheme.matrix_cache_size,
+            parameter_history_size=self.scheme.parameter_history_size,
+            parameter_history_file=self.scheme.parameter_history_file,
+            preallocate_buffers=self.scheme.preallocate_buffers,
+            precision=self.scheme.precision,
+            svd_compression=self.scheme.svd_compression,
+            global_chunk_size=self.scheme.global_chunk_size,
+            result_data_mode=self.scheme.result_data_mode,
         )
 
     def markdown(self, with_model: bool = True, base_heading_level: int = 1) -> MarkdownStr:
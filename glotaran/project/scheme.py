@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
+from dataclasses import fields
 from typing import TYPE_CHECKING
 
 from glotaran.deprecation import deprecate
@@ -18,6 +19,19 @@ if TYPE_CHECKING:
 
 default_data_filters = {"minimal": ["fitted_data", "residual"], "full": None}
 
+_MARKDOWN_EXCLUDED_FIELDS = [
+    "model",
+    "parameters",
+    "data",
+    "non_negative_least_squares",
+    "maximum_number_function_evaluations",
+    "group_tolerance",
+    "saving",
+    "result_path",
+]
+"""The fields of a :class:`Scheme` which are not listed with the non-default options in its
+markdown."""
+
 
 @dataclass
 class SavingOptions:
@@ -45,6 +59,89 @@ class Scheme:
         "Dogbox",
         "Levenberg-Marquardt",
     ] = "TrustRegionReflection"
+    jacobian_method: Literal["FiniteDifferences", "Kaufman"] = "FiniteDifferences"
+    """The method calculating the Jacobian of the penalty.
+
+    ``'FiniteDifferences'`` lets the optimizer take forward differences of the full penalty.
+    ``'Kaufman'`` uses the variable projection approximation of Kaufman, which projects the
+    derivatives of the weighted matrices instead of solving for the clps of every perturbed
+    parameter. The derivatives of the matrices are forward differences of the matrix
+    calculation, not analytic derivatives of the megacomplexes, so it still calculates the
+    matrices once per free parameter and only saves the clp solves. The additional penalty is
+    evaluated once per free parameter with the approximated clps.
+    """
+    jacobian_sparsity: bool = False
+    """Whether the finite difference Jacobian perturbs parameters which don't share a row of the
+    penalty at once, defaults to ``False``.
+
+    Parameters which only affect different datasets are grouped, so that the Jacobian takes
+    fewer penalty evaluations than free parameters. It is ignored by the ``'Kaufman'``
+    :attr:`jacobian_method`. Finding the groups costs one sparsity analysis per size of the
+    penalty. It uses private finite difference functions of scipy, if they are missing or have
+    changed, the dense finite differences are used with a warning.
+    """
+    executor: Literal["serial", "thread", "process"] = "serial"
+    """The executor calculating the matrices and solving the clps, defaults to ``'serial'``.
+
+    ``'thread'`` shares the memory of the problem, but is refused if the threading layer of
+    numba can't run parallel kernels from concurrent threads. ``'process'`` pickles the
+    arguments of every task, which only pays off for expensive matrices.
+    """
+    number_of_workers: int | None = None
+    """The number of workers of the :attr:`executor`, defaults to the number of CPUs."""
+    matrix_cache_size: int | None = None
+    """The number of matrices the least recently used matrix cache keeps, defaults to twice the
+    number of matrices of the problem.
+
+    A cached matrix is reused as long as the parameters it reads don't change, which saves
+    the matrix calculation of datasets which don't depend on a perturbed parameter. ``0``
+    deactivates the cache, which saves the memory of the cached matrices.
+    """
+    parameter_history_size: int = 1000
+    """The number of parameter history records retained in memory, defaults to ``1000``.
+
+    Older records are spilled to the parameter history file and stay accessible.
+    """
+    parameter_history_file: str | None = None
+    """The file to write all parameter history records to, defaults to a temporary file."""
+    preallocate_buffers: bool = False
+    """Whether the work arrays of an evaluation are allocated once and reused, defaults to
+    ``False``.
+
+    This saves the allocations of every evaluation, but the penalty and the residuals of the
+    problem get overwritten by the next evaluation, so they must be copied to be kept.
+    """
+    precision: Literal["float64", "float32"] = "float64"
+    """The floating point precision of the data, the matrices and the clps, defaults to
+    ``'float64'``.
+
+    ``'float32'`` halves the memory and speeds up the solves, but the penalty is only accurate
+    to about seven significant digits, which can stop the optimization before it has
+    converged as closely as in double precision. The finite differences use a larger step.
+    """
+    svd_compression: int | None = None
+    """The number of singular values the data of each dataset is compressed to, defaults to no
+    compression.
+
+    The compressed data is exact if the number is at least the rank of the data, otherwise
+    the components of the smaller singular values are not fitted, which changes the optimized
+    parameters. Only supported for ungrouped problems.
+    """
+    global_chunk_size: int | None = None
+    """The maximum number of global indices of an index independent dataset solved at once,
+    defaults to all indices.
+
+    Smaller chunks bound the memory of the solves of large datasets, at the cost of more and
+    smaller solves. The results don't depend on the chunk size apart from rounding.
+    """
+    result_data_mode: Literal["eager", "lazy", "parallel"] = "eager"
+    """How the result datasets are created, defaults to ``'eager'``.
+
+    ``'lazy'`` creates each dataset on first access and its singular value decompositions when
+    they are read, which saves the time of unused results, but keeps the problem alive until all
+    datasets are created. ``'parallel'`` creates all datasets with :attr:`number_of_workers`
+    threads. See :meth:`glotaran.analysis.problem.Problem.create_result_data`.
+    """
     saving: SavingOptions = SavingOptions()
     result_path: str | None = None
 
@@ -71,6 +168,10 @@ class Scheme:
         markdown_str += f"* *nnls*: {self.non_negative_least_squares}\n"
         markdown_str += f"* *nfev*: {self.maximum_number_function_evaluations}\n"
         markdown_str += f"* *group_tolerance*: {self.group_tolerance}\n"
+        for field in fields(self):
+            value = getattr(self, field.name)
+            if field.name not in _MARKDOWN_EXCLUDED_FIELDS and value != field.default:
+                markdown_str += f"* *{field.name}*: {value}\n"
 
         return MarkdownStr(markdown_str)
 
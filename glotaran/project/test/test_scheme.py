@@ -67,6 +67,20 @@ def test_scheme(mock_scheme: Scheme):
     assert not mock_scheme.saving.report
 
 
+def test_scheme_markdown_options(mock_scheme: Scheme):
+    markdown = str(mock_scheme.markdown())
+    assert "* *nnls*: True\n" in markdown
+    assert "* *nfev*: 42\n" in markdown
+    assert "precision" not in markdown
+
+    mock_scheme.precision = "float32"
+    mock_scheme.global_chunk_size = 10
+    markdown = str(mock_scheme.markdown())
+    assert "* *precision*: float32\n" in markdown
+    assert "* *global_chunk_size*: 10\n" in markdown
+    assert "result_data_mode" not in markdown
+
+
 def test_scheme_ipython_rendering(mock_scheme: Scheme):
     """Autorendering in ipython"""
 
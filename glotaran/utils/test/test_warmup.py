@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import numpy as np
+import xarray as xr
+
+import glotaran
+from glotaran.analysis.nnls import _fnnls
+from glotaran.analysis.problem_grouped import GroupedProblem
+from glotaran.builtin.io.ascii.wavelength_time_explicit_file import _fill_scientific
+from glotaran.builtin.io.ascii.wavelength_time_explicit_file import _scientific_parts
+from glotaran.builtin.models.kinetic_image.kinetic_decay_megacomplex import (
+    calculate_kinetic_matrix_multi_gaussian_irf,
+)
+from glotaran.builtin.models.kinetic_image.kinetic_decay_megacomplex import (
+    calculate_kinetic_matrix_multi_gaussian_irf_parallel,
+)
+from glotaran.builtin.models.kinetic_image.kinetic_decay_megacomplex import (
+    calculate_kinetic_matrix_no_irf,
+)
+from glotaran.builtin.models.kinetic_spectrum import KineticSpectrumModel
+from glotaran.builtin.models.kinetic_spectrum.coherent_artifact_megacomplex import (
+    _calculate_coherent_artifact_matrix,
+)
+from glotaran.parameter import ParameterGroup
+from glotaran.project import Scheme
+
+KERNELS = [
+    calculate_kinetic_matrix_multi_gaussian_irf,
+    calculate_kinetic_matrix_multi_gaussian_irf_parallel,
+    calculate_kinetic_matrix_no_irf,
+    _calculate_coherent_artifact_matrix,
+    _fnnls,
+    _scientific_parts,
+    _fill_scientific,
+]
+
+
+def test_warmup():
+    """The kernels are compiled once and an analysis needs no further compilation."""
+    glotaran.warmup()
+    signatures = [kernel.signatures for kernel in KERNELS]
+    assert all(len(kernel_signatures) == 1 for kernel_signatures in signatures)
+
+    model = KineticSpectrumModel.from_dict(
+        {
+            "initial_concentration": {
+                "j1": {"compartments": ["s1", "s2"], "parameters": ["j.1", "j.0"]},
+            },
+            "k_matrix": {
+                "k1": {"matrix": {("s2", "s1"): "rates.1", ("s2", "s2"): "rates.2"}},
+                "k2": {"matrix": {("s1", "s1"): "rates.1", ("s2", "s1"): "rates.2"}},
+            },
+            "megacomplex": {
+                "m1": {"k_matrix": ["k1"]},
+                "m2": {"k_matrix": ["k2"]},
+                "cocoa": {"type": "coherent-artifact", "order": 3},
+            },
+            "irf": {
+                "irf1": {"type": "gaussian", "center": "irf.center", "width": "irf.width"},
+            },
+            "dataset": {
+                "dataset1": {
+                    "initial_concentration": "j1",
+                    "megacomplex": ["m1", "cocoa"],
+                    "irf": "irf1",
+                },
+                "dataset2": {"initial_concentration": "j1", "megacomplex": ["m2"]},
+            },
+        }
+    )
+    parameters = ParameterGroup.from_dict(
+        {
+            "j": [["1", 1, {"vary": False}], ["0", 0, {"vary": False}]],
+            "rates": [0.5, 0.1],
+            "irf": [["center", 0.3], ["width", 0.1]],
+        }
+    )
+    # integer axes, which the callers of the kernels convert to float64
+    data = xr.DataArray(
+        np.ones((21, 10)), coords=[("time", np.arange(-1, 20)), ("spectral", np.arange(10))]
+    ).to_dataset(name="data")
+    scheme = Scheme(
+        model,
+        parameters,
+        {"dataset1": data, "dataset2": data},
+        non_negative_least_squares=True,
+    )
+    GroupedProblem(scheme).full_penalty
+
+    assert [kernel.signatures for kernel in KERNELS] == signatures
@@ -0,0 +1,44 @@
+"""Compilation of the numba kernels ahead of their first use."""
+from __future__ import annotations
+
+import numpy as np
+
+
+def warmup():
+    """Compiles the numba kernels of the analysis and the builtin plugins.
+
+    The kernels are compiled on their first call and cached on disk next to their modules, so
+    only the first process after an installation or an update pays the full compilation.
+    Calling this function moves the compilation, or the loading from the disk cache, out of
+    the first evaluation, e.g. into the start of a worker process or before timing an analysis.
+
+    The kernels are called with small contiguous float64 arrays, which are the types their
+    callers pass, so no further compilation happens during an analysis.
+    """
+    from glotaran.analysis.nnls import residual_nnls
+    from glotaran.builtin.io.ascii.wavelength_time_explicit_file import _format_scientific
+    from glotaran.builtin.models.kinetic_image.kinetic_decay_megacomplex import (
+        calculate_kinetic_matrix_multi_gaussian_irf,
+    )
+    from glotaran.builtin.models.kinetic_image.kinetic_decay_megacomplex import (
+        calculate_kinetic_matrix_multi_gaussian_irf_parallel,
+    )
+    from glotaran.builtin.models.kinetic_image.kinetic_decay_megacomplex import (
+        calculate_kinetic_matrix_no_irf,
+    )
+    from glotaran.builtin.models.kinetic_spectrum.coherent_artifact_megacomplex import (
+        _calculate_coherent_artifact_matrix,
+    )
+
+    times = np.linspace(-1.0, 1.0, 4)
+    rates = np.array([1.0, 0.5])
+    matrix = np.zeros((times.size, rates.size), dtype=np.float64)
+
+    calculate_kinetic_matrix_no_irf(matrix, rates, times)
+    irf = (np.array([0.0]), np.array([0.1]), np.array([1.0]), False, 0.0)
+    a_matrix = np.eye(rates.size)
+    calculate_kinetic_matrix_multi_gaussian_irf(matrix, rates, a_matrix, times, *irf)
+    calculate_kinetic_matrix_multi_gaussian_irf_parallel(matrix, rates, a_matrix, times, *irf)
+    _calculate_coherent_artifact_matrix(0.0, 0.1, times, 3)
+    residual_nnls(matrix, np.ones((times.size, 2)))
+    _format_scientific(np.ones((2, 2)), 10, "e")